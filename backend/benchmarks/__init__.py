@@ -0,0 +1,19 @@
+# backend/benchmarks/__init__.py
+
+"""
+Benchmarks
+
+Each module benchmarks one part of ChatWeaver on synthetic data, independently
+of the live chatweaver.db and faiss_index.bin:
+
+- retrieval: the FAISS backends used by VectorDB.
+- schema: the hot read queries before and after the schema migrations.
+- serializer: comment tree serialization with and without Pydantic models.
+
+All of them are run from one command line and write the same report format
+(see report.py), so any two runs of a suite can be compared with --baseline:
+
+    python -m backend.benchmarks retrieval --sizes 10000 --output bench.json
+    python -m backend.benchmarks retrieval --sizes 10000 --baseline bench.json
+    python -m backend.benchmarks compare bench.json other.json
+"""
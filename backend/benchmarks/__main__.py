@@ -0,0 +1,60 @@
+# backend/benchmarks/__main__.py
+
+"""
+Benchmark Command Line
+
+Runs one benchmark suite and writes its report, optionally comparing it with
+an earlier report of the same suite, or compares two saved reports.
+
+Usage:
+    python -m backend.benchmarks <retrieval|schema|serializer> [options] [--output FILE] [--baseline FILE]
+    python -m backend.benchmarks compare BASELINE CURRENT
+"""
+
+import argparse
+import logging
+from typing import Dict
+
+from backend.benchmarks import retrieval, schema, serializer
+from backend.benchmarks.report import compare_results, load_report, write_report
+
+SUITES = {module.SUITE: module for module in (retrieval, schema, serializer)}
+
+
+def report_regressions(baseline: Dict, current: Dict):
+    """
+    Print regressions of `current` against `baseline` and exit non-zero if there are any.
+    """
+    regressions = compare_results(baseline, current)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ChatWeaver's benchmarks on synthetic data.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, module in SUITES.items():
+        suite_parser = commands.add_parser(name, help=module.__doc__.strip().splitlines()[0])
+        module.add_arguments(suite_parser)
+        suite_parser.add_argument("--output", type=str, help="Write the report as JSON to this file.")
+        suite_parser.add_argument("--baseline", type=str, help="Report from an earlier run to compare against.")
+    compare_parser = commands.add_parser("compare", help="Compare two saved reports of the same suite.")
+    compare_parser.add_argument("baseline", type=str)
+    compare_parser.add_argument("current", type=str)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        report_regressions(load_report(args.baseline), load_report(args.current))
+        return
+
+    logging.basicConfig(level=logging.INFO)
+    report = SUITES[args.command].run(args)
+    write_report(report, args.output)
+    if args.baseline:
+        report_regressions(load_report(args.baseline), report)
+
+
+if __name__ == "__main__":
+    main()
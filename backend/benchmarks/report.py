@@ -0,0 +1,136 @@
+# backend/benchmarks/report.py
+
+"""
+Benchmark Reports
+
+This module defines the report format shared by every benchmark suite and
+compares two reports of the same suite. A report is:
+
+    {
+        "suite": "retrieval",
+        "environment": {"commit": ..., "timestamp": ..., ...},
+        "config": {...},           # the suite's parameters
+        "results": [               # one entry per measured case
+            {"name": "hnsw@10000", "p50_ms": ..., "p99_ms": ..., ...},
+        ],
+        "summary": {...},          # optional suite-specific values
+    }
+
+Results are matched across runs by name, and every metric listed below that
+both runs report is compared.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+# Relative increase (timings) or decrease (throughput) reported as a regression
+LATENCY_TOLERANCE = 0.2
+# Absolute drop in recall reported as a regression
+RECALL_TOLERANCE = 0.01
+
+LOWER_IS_BETTER = ("p50_ms", "p99_ms", "build_seconds", "load_seconds", "seconds")
+HIGHER_IS_BETTER = ("qps",)
+ACCURACY = ("recall_at_k",)
+
+
+def environment() -> Dict:
+    """
+    Commit and machine details recorded with every run.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "faiss": faiss.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def make_report(suite: str, config: Dict, results: List[Dict], summary: Optional[Dict] = None) -> Dict:
+    """
+    Assemble a report in the shared format.
+
+    Args:
+        suite (str): Benchmark suite, e.g. "retrieval".
+        config (Dict): Parameters of the run.
+        results (List[Dict]): One dict per case, each with a unique "name".
+        summary (Optional[Dict]): Suite-specific values that are not compared.
+
+    Returns:
+        Dict: The report.
+    """
+    report = {"suite": suite, "environment": environment(), "config": config, "results": results}
+    if summary is not None:
+        report["summary"] = summary
+    return report
+
+
+def latency_summary(timings_ms: List[float]) -> Dict:
+    """
+    p50/p99 of a list of timings in milliseconds.
+    """
+    return {
+        "p50_ms": float(np.percentile(timings_ms, 50)),
+        "p99_ms": float(np.percentile(timings_ms, 99)),
+    }
+
+
+def compare_results(baseline: Dict, current: Dict) -> List[str]:
+    """
+    List regressions of `current` against `baseline`: timings up or throughput
+    down by more than LATENCY_TOLERANCE, and recall down by more than
+    RECALL_TOLERANCE. Only results present in both runs are compared.
+
+    Raises:
+        ValueError: If the reports are of different suites.
+    """
+    if baseline.get("suite") != current.get("suite"):
+        raise ValueError(f"Cannot compare a '{current.get('suite')}' run with a '{baseline.get('suite')}' baseline.")
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        label = result["name"]
+        for metric in LOWER_IS_BETTER:
+            if metric in result and metric in before and result[metric] > before[metric] * (1 + LATENCY_TOLERANCE):
+                regressions.append(f"{label}: {metric} {before[metric]:.3f} -> {result[metric]:.3f}")
+        for metric in HIGHER_IS_BETTER:
+            if metric in result and metric in before and result[metric] < before[metric] * (1 - LATENCY_TOLERANCE):
+                regressions.append(f"{label}: {metric} {before[metric]:.0f} -> {result[metric]:.0f}")
+        for metric in ACCURACY:
+            if metric in result and metric in before and result[metric] < before[metric] - RECALL_TOLERANCE:
+                regressions.append(f"{label}: {metric} {before[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+
+def load_report(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def write_report(report: Dict, path: Optional[str] = None):
+    """
+    Write a report as JSON to `path`, or print it if no path is given.
+    """
+    if path:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,245 @@
+# backend/benchmarks/retrieval.py
+
+"""
+Retrieval Benchmark
+
+This module benchmarks the FAISS backends used by VectorDB on synthetic
+corpora, independently of the live chatweaver.db and faiss_index.bin. For each
+corpus size and backend it measures build time, on-disk size and memory-mapped
+load time, single-query p50/p99 latency, QPS under concurrent queries, process
+RSS, and recall@k against brute force. Results are named "<index_type>@<size>".
+
+Usage:
+    python -m backend.benchmarks retrieval --sizes 10000 100000 1000000 --output bench.json
+    python -m backend.benchmarks retrieval --sizes 10000 --baseline bench.json
+"""
+
+import argparse
+import logging
+import os
+import platform
+import resource
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import faiss
+import numpy as np
+
+from backend.benchmarks.report import make_report
+from embeddings.index_factory import (
+    DEFAULT_INDEX_PARAMS,
+    INDEX_FACTORY_STRINGS,
+    brute_force_neighbours,
+    create_index,
+    evaluate_index,
+    min_training_points,
+    train_index,
+)
+
+SUITE = "retrieval"
+DIMENSIONS = 384
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def synthetic_corpus(n_vectors: int, n_queries: int, dimensions: int = DIMENSIONS, seed: int = 0):
+    """
+    Generate unit-norm vectors clustered around random topic centres, which
+    resembles sentence embeddings more closely than uniform noise does.
+
+    Args:
+        n_vectors (int): Corpus size.
+        n_queries (int): Number of queries, drawn from the same distribution.
+        dimensions (int): Vector dimensionality.
+        seed (int): Random seed; the same seed gives the same corpus.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (vectors, queries) as float32.
+    """
+    rng = np.random.default_rng(seed)
+    n_topics = max(1, int(np.sqrt(n_vectors)))
+    centres = rng.standard_normal((n_topics, dimensions), dtype=np.float32)
+
+    def sample(n: int) -> np.ndarray:
+        points = np.empty((n, dimensions), dtype=np.float32)
+        # Generate in blocks to keep peak memory near the size of the result
+        for start in range(0, n, 100_000):
+            stop = min(start + 100_000, n)
+            topics = rng.integers(0, n_topics, stop - start)
+            block = centres[topics] + 0.5 * rng.standard_normal((stop - start, dimensions), dtype=np.float32)
+            points[start:stop] = block / np.linalg.norm(block, axis=1, keepdims=True)
+        return points
+
+    return sample(n_vectors), sample(n_queries)
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size of this process in MiB (peak RSS where /proc is unavailable).
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def measure_qps(index: faiss.Index, queries: np.ndarray, k: int, concurrency: int) -> float:
+    """
+    Queries per second with `concurrency` threads each issuing one query at a
+    time, as VectorDB does from its executor. FAISS releases the GIL while searching.
+    """
+    def _worker(rows: np.ndarray):
+        for query in rows:
+            index.search(query.reshape(1, -1), k)
+
+    chunks = np.array_split(queries, concurrency)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(_worker, chunks))
+    return len(queries) / (time.perf_counter() - start)
+
+
+def benchmark_backend(
+    index_type: str,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    ground_truth: np.ndarray,
+    workdir: str,
+    k: int = 10,
+    concurrency: int = 4,
+    params: Optional[Dict] = None,
+) -> Dict:
+    """
+    Build, persist, reload (memory-mapped) and query one backend.
+
+    Args:
+        index_type (str): Backend, one of INDEX_FACTORY_STRINGS.
+        vectors (np.ndarray): Corpus vectors.
+        queries (np.ndarray): Query vectors.
+        ground_truth (np.ndarray): Exact neighbours of the queries.
+        workdir (str): Directory the index file is written to.
+        k (int): Number of neighbours per query.
+        concurrency (int): Threads used for the QPS measurement.
+        params (Optional[Dict]): Parameter overrides, e.g. nprobe or ef_search.
+
+    Returns:
+        Dict: Metrics for this backend.
+    """
+    backend_params = {**DEFAULT_INDEX_PARAMS, **(params or {}), "index_type": index_type}
+    rss_before = rss_mb()
+
+    start = time.perf_counter()
+    index = create_index(vectors.shape[1], backend_params, n_vectors=len(vectors))
+    train_index(index, vectors)
+    index = faiss.IndexIDMap2(index)
+    index.add_with_ids(vectors, np.arange(len(vectors), dtype="int64"))
+    build_seconds = time.perf_counter() - start
+    rss_built = rss_mb()
+
+    path = os.path.join(workdir, f"{index_type}.bin")
+    faiss.write_index(index, path)
+    del index
+    start = time.perf_counter()
+    index = faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+    load_seconds = time.perf_counter() - start
+
+    metrics = evaluate_index(
+        index, vectors, queries, k,
+        ids=np.arange(len(vectors), dtype="int64"),
+        ground_truth=ground_truth,
+    )
+    result = {
+        "name": f"{index_type}@{len(vectors)}",
+        "index_type": index_type,
+        "n_vectors": len(vectors),
+        "build_seconds": build_seconds,
+        "load_seconds": load_seconds,
+        "file_bytes": os.path.getsize(path),
+        "rss_mb": rss_mb(),
+        "build_rss_delta_mb": rss_built - rss_before,
+        "qps": measure_qps(index, queries, k, concurrency),
+        "concurrency": concurrency,
+        **metrics,
+    }
+    del index
+    os.remove(path)
+    return result
+
+
+def run_benchmark(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    index_types: Optional[Sequence[str]] = None,
+    n_queries: int = 200,
+    k: int = 10,
+    concurrency: int = 4,
+    params: Optional[Dict] = None,
+    seed: int = 0,
+) -> Dict:
+    """
+    Benchmark every requested backend on a synthetic corpus of each size.
+
+    Args:
+        sizes (Sequence[int]): Corpus sizes.
+        index_types (Optional[Sequence[str]]): Backends; all of INDEX_FACTORY_STRINGS if None.
+        n_queries (int): Queries per corpus.
+        k (int): Number of neighbours per query.
+        concurrency (int): Threads used for the QPS measurement.
+        params (Optional[Dict]): Parameter overrides applied to every backend.
+        seed (int): Corpus seed.
+
+    Returns:
+        Dict: Report in the shared format (see backend.benchmarks.report).
+    """
+    index_types = list(index_types or INDEX_FACTORY_STRINGS)
+    results: List[Dict] = []
+    with tempfile.TemporaryDirectory(prefix="chatweaver-bench-") as workdir:
+        for size in sizes:
+            vectors, queries = synthetic_corpus(size, n_queries, seed=seed)
+            start = time.perf_counter()
+            ground_truth = brute_force_neighbours(vectors, queries, k)
+            logging.info(f"Ground truth for {size} vectors in {time.perf_counter() - start:.2f}s.")
+            for index_type in index_types:
+                if size < min_training_points(index_type):
+                    logging.warning(f"Skipping {index_type} at {size} vectors: not enough vectors to train.")
+                    continue
+                result = benchmark_backend(index_type, vectors, queries, ground_truth, workdir, k, concurrency, params)
+                logging.info(
+                    f"{index_type} @ {size}: recall@{k}={result['recall_at_k']:.3f} "
+                    f"p99={result['p99_ms']:.2f}ms qps={result['qps']:.0f}"
+                )
+                results.append(result)
+            del vectors, queries
+
+    config = {
+        "sizes": list(sizes),
+        "index_types": index_types,
+        "n_queries": n_queries,
+        "k": k,
+        "concurrency": concurrency,
+        "params": params or {},
+        "seed": seed,
+    }
+    return make_report(SUITE, config, results)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Corpus sizes.")
+    parser.add_argument("--index-types", nargs="+", choices=list(INDEX_FACTORY_STRINGS), help="Backends (default: all).")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per corpus.")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Threads for the QPS measurement.")
+    parser.add_argument("--nprobe", type=int, help="IVF lists probed per query.")
+    parser.add_argument("--ef-search", type=int, help="HNSW search depth.")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed.")
+
+
+def run(args: argparse.Namespace) -> Dict:
+    params = {name: value for name, value in (("nprobe", args.nprobe), ("ef_search", args.ef_search)) if value}
+    return run_benchmark(args.sizes, args.index_types, args.queries, args.k, args.concurrency, params, args.seed)
@@ -0,0 +1,165 @@
+# backend/benchmarks/schema.py
+
+"""
+Schema Index Benchmark
+
+This module builds a large synthetic chatweaver database in a temporary
+directory and times the hot read queries (get_comments, get_threads and the
+comment subtree walk) before and after the migrations that add their indexes.
+Each query's plan (SCAN vs SEARCH) and p50/p99 latency are reported under
+"<query>:<before|after>", and the migration time under "migrations".
+
+Usage:
+    python -m backend.benchmarks schema --threads 20000 --comments 1000000 --output schema.json
+"""
+
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine, literal, select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.sql import ClauseElement
+
+from backend.benchmarks.report import latency_summary, make_report
+from backend.database import comments, metadata, threads
+from backend.database.comment_tree import subtree_query
+from backend.database.migrations import run_migrations
+
+SUITE = "schema"
+
+
+def adjacency_subtree_query(comment_id: int) -> ClauseElement:
+    """
+    Subtree walk over parent_id links alone, the baseline for the
+    materialized-path subtree_query.
+    """
+    tree = select(comments, literal(0).label("depth")).where(comments.c.id == comment_id).cte("tree", recursive=True)
+    child = comments.alias("child")
+    tree = tree.union_all(
+        select(child, (tree.c.depth + 1).label("depth")).where(child.c.parent_id == tree.c.id)
+    )
+    return select(tree).order_by(tree.c.depth, tree.c.id)
+
+
+# Queries are compiled up front and executed with sqlite3, so only SQLite's own
+# cost is timed. comment_subtree needs the paths backfilled by the migrations,
+# so it returns nothing "before".
+BENCHMARK_QUERIES: Dict[str, Callable[[int], ClauseElement]] = {
+    "get_comments": lambda thread_id: comments.select().where(comments.c.thread_id == thread_id).order_by(comments.c.id),
+    "get_threads": lambda category_id: threads.select().where(threads.c.category_id == category_id),
+    "comment_subtree_adjacency": adjacency_subtree_query,
+    "comment_subtree": lambda comment_id: subtree_query(comment_id),
+}
+
+
+def populate(path: str, n_categories: int, n_threads: int, n_comments: int, seed: int = 0):
+    """
+    Create the schema (without migrations) and fill it with synthetic rows.
+    Comments are spread over threads at random and reply to an earlier comment
+    of the same thread, so every thread is a tree.
+    """
+    engine = create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(seed)
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        "INSERT INTO categories (id, name) VALUES (?, ?)",
+        [(i, f"category {i}") for i in range(1, n_categories + 1)],
+    )
+    connection.executemany(
+        "INSERT INTO threads (id, category_id, title) VALUES (?, ?, ?)",
+        [(i, rng.randint(1, n_categories), f"thread {i}") for i in range(1, n_threads + 1)],
+    )
+    last_in_thread: Dict[int, List[int]] = {}
+
+    def rows():
+        for comment_id in range(1, n_comments + 1):
+            thread_id = rng.randint(1, n_threads)
+            seen = last_in_thread.setdefault(thread_id, [])
+            parent_id = rng.choice(seen) if seen else None
+            seen.append(comment_id)
+            yield comment_id, thread_id, parent_id, f"comment {comment_id}", 0, 0, 0
+
+    connection.executemany(
+        "INSERT INTO comments (id, thread_id, parent_id, text, flags, approvals, hidden) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows(),
+    )
+    connection.commit()
+    connection.close()
+
+
+def measure(connection: sqlite3.Connection, build: Callable[[int], ClauseElement], samples: List[int]) -> Dict:
+    """
+    Query plan and latency of one query over a list of parameter values.
+    """
+    statements = []
+    for value in samples:
+        compiled = build(value).compile(dialect=sqlite.dialect(), compile_kwargs={"render_postcompile": True})
+        statements.append((str(compiled), tuple(compiled.params[name] for name in compiled.positiontup)))
+    sql, params = statements[0]
+    plan = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    latencies = []
+    for sql, params in statements:
+        start = time.perf_counter()
+        connection.execute(sql, params).fetchall()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {"plan": plan, **latency_summary(latencies)}
+
+
+def run_benchmark(n_categories: int = 100, n_threads: int = 20000, n_comments: int = 1000000, n_samples: int = 200, seed: int = 0) -> Dict:
+    """
+    Build the synthetic database and time every benchmark query before and after migrating.
+
+    Returns:
+        Dict: Report in the shared format (see backend.benchmarks.report).
+    """
+    rng = random.Random(seed)
+    samples = {
+        "get_comments": [rng.randint(1, n_threads) for _ in range(n_samples)],
+        "get_threads": [rng.randint(1, n_categories) for _ in range(n_samples)],
+        "comment_subtree": [rng.randint(1, n_comments) for _ in range(n_samples)],
+    }
+    samples["comment_subtree_adjacency"] = samples["comment_subtree"]
+    config = {"categories": n_categories, "threads": n_threads, "comments": n_comments, "samples": n_samples, "seed": seed}
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix="chatweaver-db-bench-") as workdir:
+        path = os.path.join(workdir, "bench.db")
+        start = time.perf_counter()
+        populate(path, n_categories, n_threads, n_comments, seed)
+        logging.info(f"Populated {n_comments} comments in {time.perf_counter() - start:.1f}s.")
+
+        for phase in ("before", "after"):
+            if phase == "after":
+                engine = create_engine(f"sqlite:///{path}")
+                start = time.perf_counter()
+                with engine.begin() as connection:
+                    run_migrations(connection)
+                engine.dispose()
+                results.append({"name": "migrations", "seconds": time.perf_counter() - start})
+            connection = sqlite3.connect(path)
+            for name, statement in BENCHMARK_QUERIES.items():
+                results.append({"name": f"{name}:{phase}", **measure(connection, statement, samples[name])})
+            connection.close()
+    return make_report(SUITE, config, results)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--categories", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=20000)
+    parser.add_argument("--comments", type=int, default=1000000)
+    parser.add_argument("--samples", type=int, default=200, help="Executions per query.")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def run(args: argparse.Namespace) -> Dict:
+    return run_benchmark(args.categories, args.threads, args.comments, args.samples, args.seed)
@@ -0,0 +1,133 @@
+# backend/benchmarks/serializer.py
+
+"""
+Comment Tree Serialization Benchmark
+
+This module times the two ways of turning a thread's comment rows into the
+JSON body of /api/get-comments/{thread_id}, on synthetic threads:
+
+- pydantic: one CommentResponse per row, nested, then jsonable_encoder and
+  JSONResponse (the route's previous path).
+- fast: build_comment_tree and dumps from comment_serializer.
+
+It reports p50/p99 latency per path, and in the summary whether both produce
+the same bytes.
+
+Usage:
+    python -m backend.benchmarks serializer --comments 10000 --output serializer.json
+"""
+
+import argparse
+import logging
+import random
+import time
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.benchmarks.report import latency_summary, make_report
+from backend.database.pool import Record
+from backend.models import CommentResponse
+from backend.services.comment_serializer import build_comment_tree, dumps, orjson
+
+SUITE = "serializer"
+COLUMNS = ["id", "thread_id", "parent_id", "text", "flags", "approvals", "model_name", "hidden", "path"]
+
+
+def synthetic_rows(n_comments: int, seed: int = 0) -> List[Record]:
+    """
+    Rows of one thread, in id order, each replying to a random earlier comment.
+    """
+    rng = random.Random(seed)
+    index = {name: position for position, name in enumerate(COLUMNS)}
+    rows = []
+    for comment_id in range(1, n_comments + 1):
+        parent_id = rng.randint(1, comment_id - 1) if comment_id > 1 else None
+        generated = rng.random() < 0.3
+        text = " ".join(rng.choice(["lorem", "ipsum", "dolor", "sit", "amet", "café", "naïve"]) for _ in range(rng.randint(5, 60)))
+        rows.append(Record(
+            [comment_id, 1, parent_id, text, int(generated), rng.randint(0, 5),
+             "gpt-4" if generated else None, False, None],
+            index,
+        ))
+    return rows
+
+
+def pydantic_body(rows: List[Record]) -> bytes:
+    comment_dict = {
+        row["id"]: CommentResponse(
+            id=row["id"],
+            thread_id=row["thread_id"],
+            parent_id=row["parent_id"],
+            text=row["text"],
+            flags=row["flags"],
+            approvals=row["approvals"],
+            model_name=row["model_name"],
+            replies=[],
+        )
+        for row in rows
+    }
+    root_comments = []
+    for comment in comment_dict.values():
+        if comment.parent_id:
+            parent = comment_dict.get(comment.parent_id)
+            if parent:
+                parent.replies.append(comment)
+        else:
+            root_comments.append(comment)
+    return JSONResponse(jsonable_encoder(root_comments)).body
+
+
+def fast_body(rows: List[Record]) -> bytes:
+    return dumps(build_comment_tree(rows))
+
+
+SERIALIZERS: Dict[str, Callable[[List[Record]], bytes]] = {
+    "pydantic": pydantic_body,
+    "fast": fast_body,
+}
+
+
+def measure(serialize: Callable[[List[Record]], bytes], rows: List[Record], repeats: int) -> Dict:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        serialize(rows)
+        timings.append((time.perf_counter() - start) * 1000)
+    return latency_summary(timings)
+
+
+def run_benchmark(n_comments: int, repeats: int, seed: int = 0) -> Dict:
+    """
+    Time both serializers on one synthetic thread.
+
+    Returns:
+        Dict: Report in the shared format (see backend.benchmarks.report), with
+        the speedup and whether the bodies match in its summary.
+    """
+    rows = synthetic_rows(n_comments, seed)
+    bodies = {name: serialize(rows) for name, serialize in SERIALIZERS.items()}
+    results = []
+    for name, serialize in SERIALIZERS.items():
+        results.append({"name": name, **measure(serialize, rows, repeats)})
+        logging.info(f"{name}: p50 {results[-1]['p50_ms']:.1f} ms")
+    latency = {result["name"]: result["p50_ms"] for result in results}
+    summary = {
+        "orjson": orjson is not None,
+        "body_bytes": len(bodies["fast"]),
+        "identical": bodies["pydantic"] == bodies["fast"],
+        "speedup_p50": latency["pydantic"] / latency["fast"],
+    }
+    config = {"comments": n_comments, "repeats": repeats, "seed": seed}
+    return make_report(SUITE, config, results, summary)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--comments", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=20, help="Serializations per path.")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def run(args: argparse.Namespace) -> Dict:
+    return run_benchmark(args.comments, args.repeats, args.seed)
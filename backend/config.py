@@ -11,3 +11,126 @@ from dotenv import load_dotenv
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Keep an in-memory copy of the feedback table for retrieval scoring instead of
+# joining it on every search. Only enable this with a single worker process:
+# votes logged by other workers are not seen until restart.
+FEEDBACK_SNAPSHOT_ENABLED = os.getenv("FEEDBACK_SNAPSHOT_ENABLED", "false").lower() == "true"
+
+# Write-behind feedback: votes are summed in memory and written in batches every
+# FEEDBACK_FLUSH_INTERVAL_MS or FEEDBACK_FLUSH_MAX_EVENTS votes, whichever comes
+# first. Votes not yet flushed are lost if the process crashes.
+FEEDBACK_WRITE_BEHIND_ENABLED = os.getenv("FEEDBACK_WRITE_BEHIND_ENABLED", "false").lower() == "true"
+FEEDBACK_FLUSH_INTERVAL_MS = int(os.getenv("FEEDBACK_FLUSH_INTERVAL_MS", "500"))
+FEEDBACK_FLUSH_MAX_EVENTS = int(os.getenv("FEEDBACK_FLUSH_MAX_EVENTS", "100"))
+
+# FAISS index backend for new indexes: "flat", "hnsw", "ivf_flat", "ivf_pq", or
+# the compressed "sq8" (~4x smaller), "sq_fp16" (~2x) and "pq" (PQ{pq_m}x8).
+# Existing indexes keep their persisted type until rebuilt with
+# `python -m backend.manage --rebuild-index <type>`.
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat")
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "16"))
+VECTOR_INDEX_EF_SEARCH = int(os.getenv("VECTOR_INDEX_EF_SEARCH", "64"))
+
+# New vectors are appended to a write-ahead log and the full index is only
+# rewritten (snapshotted) after this many logged vectors or this many seconds.
+VECTOR_SNAPSHOT_EVERY = int(os.getenv("VECTOR_SNAPSHOT_EVERY", "10000"))
+VECTOR_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("VECTOR_SNAPSHOT_INTERVAL_SECONDS", "600"))
+VECTOR_LOG_FSYNC = os.getenv("VECTOR_LOG_FSYNC", "true").lower() == "true"
+
+# Content-addressed cache of sentence embeddings (LRU in memory, SQLite on disk)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_FILE = os.getenv("EMBEDDING_CACHE_FILE", "embedding_cache.db")
+EMBEDDING_CACHE_CAPACITY = int(os.getenv("EMBEDDING_CACHE_CAPACITY", "10000"))
+# Rows kept in the on-disk tier; the least recently used are deleted beyond this
+# (about 1.5 KB each at 384 dimensions).
+EMBEDDING_CACHE_DISK_CAPACITY = int(os.getenv("EMBEDDING_CACHE_DISK_CAPACITY", "100000"))
+
+# Concurrent encode requests are merged into one model call of up to this many
+# texts, waiting at most this long for the batch to fill.
+ENCODER_MAX_BATCH_SIZE = int(os.getenv("ENCODER_MAX_BATCH_SIZE", "64"))
+ENCODER_MAX_WAIT_MS = float(os.getenv("ENCODER_MAX_WAIT_MS", "5"))
+
+# Compact the FAISS index once deleted or re-embedded (tombstoned) vectors make
+# up this fraction of it.
+VECTOR_COMPACT_RATIO = float(os.getenv("VECTOR_COMPACT_RATIO", "0.2"))
+
+# Memory-map the FAISS index file read-only instead of reading it into memory.
+# Off by default because the server gains nothing from it: the index has a
+# single writer process (a second one fails at startup), and the mapping is
+# copied into private memory on the first write, which log replay, backfill and
+# every comment write trigger. Sharing one mapped index between uvicorn workers
+# would need read-only searcher processes that reload published snapshots, and
+# that is not implemented. Only useful for processes that open the index and
+# never write to it.
+VECTOR_INDEX_MMAP = os.getenv("VECTOR_INDEX_MMAP", "false").lower() == "true"
+
+# A vector search widened because filters or comment chunks leave too few
+# threads never fetches more than this many candidates.
+VECTOR_SEARCH_MAX_CANDIDATES = int(os.getenv("VECTOR_SEARCH_MAX_CANDIDATES", "4096"))
+
+# With min_approvals, threads are allow-listed. When the allow-list covers at
+# most this many vectors they are scored exactly instead of through the index.
+VECTOR_EXACT_SEARCH_MAX_IDS = int(os.getenv("VECTOR_EXACT_SEARCH_MAX_IDS", "2048"))
+
+# Compressed indexes (sq8, sq_fp16, pq, ivf_pq) fetch this many times k
+# candidates and re-rank them against exact vectors stored in SQLite.
+# 0 disables re-ranking.
+VECTOR_RERANK_FACTOR = int(os.getenv("VECTOR_RERANK_FACTOR", "4"))
+
+# Comments are embedded in chunks of this many words, overlapping by
+# COMMENT_CHUNK_OVERLAP words (all-MiniLM-L6-v2 truncates at 256 word pieces).
+COMMENT_CHUNK_WORDS = int(os.getenv("COMMENT_CHUNK_WORDS", "150"))
+COMMENT_CHUNK_OVERLAP = int(os.getenv("COMMENT_CHUNK_OVERLAP", "30"))
+
+# Background comment indexer: writers wait once this many comments are queued,
+# and the worker embeds up to INDEXER_BATCH_SIZE comments per batch, waiting at
+# most INDEXER_MAX_WAIT_MS for a batch to fill.
+INDEXER_QUEUE_SIZE = int(os.getenv("INDEXER_QUEUE_SIZE", "10000"))
+INDEXER_BATCH_SIZE = int(os.getenv("INDEXER_BATCH_SIZE", "64"))
+INDEXER_MAX_WAIT_MS = float(os.getenv("INDEXER_MAX_WAIT_MS", "200"))
+# Comments from a failed batch are retried up to INDEXER_MAX_RETRIES times,
+# first after INDEXER_RETRY_BACKOFF_SECONDS and then twice as long each time.
+INDEXER_MAX_RETRIES = int(os.getenv("INDEXER_MAX_RETRIES", "3"))
+INDEXER_RETRY_BACKOFF_SECONDS = float(os.getenv("INDEXER_RETRY_BACKOFF_SECONDS", "1.0"))
+
+# Hybrid retrieval: run FTS5 (BM25) search next to vector search and merge the
+# two rankings with reciprocal-rank fusion.
+HYBRID_RETRIEVAL_ENABLED = os.getenv("HYBRID_RETRIEVAL_ENABLED", "true").lower() == "true"
+# Each FTS5 table contributes at most k * LEXICAL_CANDIDATE_FACTOR best BM25
+# matches before feedback filtering and grouping by thread, so the lexical
+# stage stays bounded however many rows a common word matches.
+LEXICAL_CANDIDATE_FACTOR = int(os.getenv("LEXICAL_CANDIDATE_FACTOR", "10"))
+
+# CPU runtime for the MiniLM sentence encoder: "torch" (fp32), "torch_int8",
+# "onnx" or "onnx_int8". Check parity and throughput first with
+# `python -m backend.manage --compare-encoders`.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+# Cache of /api/retrieve-context responses (0 disables it). Entries are dropped
+# on index writes and feedback changes; the TTL bounds everything else.
+RETRIEVAL_CACHE_CAPACITY = int(os.getenv("RETRIEVAL_CACHE_CAPACITY", "1024"))
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "60"))
+
+# SQLite database file and connection pool. Reads run on SQLITE_READERS
+# read-only connections and do not wait for writes (with WAL journaling);
+# writes are serialized on one writer connection. The pragmas are applied to
+# every connection.
+DATABASE_PATH = os.getenv("DATABASE_PATH", "./chatweaver.db")
+SQLITE_READERS = int(os.getenv("SQLITE_READERS", "4"))
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative values are KiB, positive values pages
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Prepared statements kept per connection
+SQLITE_STATEMENT_CACHE_SIZE = int(os.getenv("SQLITE_STATEMENT_CACHE_SIZE", "256"))
+
+# Largest number of comments accepted by one bulk import request
+BULK_IMPORT_MAX_COMMENTS = int(os.getenv("BULK_IMPORT_MAX_COMMENTS", "100000"))
+
+# Cache of serialized comment trees for /api/get-comments (0 disables it).
+# Entries are invalidated by the thread's version, bumped on every comment write.
+THREAD_CACHE_CAPACITY = int(os.getenv("THREAD_CACHE_CAPACITY", "256"))
+THREAD_CACHE_MAX_BYTES = int(os.getenv("THREAD_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
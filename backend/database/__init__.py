@@ -1,13 +1,23 @@
 # backend/database/__init__.py
 
-from databases import Database
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+import asyncio
+from sqlalchemy import create_engine
 from sqlalchemy import MetaData, Table, Column, Integer, String, ForeignKey, Text, UniqueConstraint
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, UniqueConstraint, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, UniqueConstraint, Boolean, LargeBinary
 import json
 
-DATABASE_URL = "sqlite+aiosqlite:///./chatweaver.db"
+from backend.config import (
+    DATABASE_PATH,
+    SQLITE_READERS,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_STATEMENT_CACHE_SIZE,
+)
+from backend.database.migrations import run_migrations
+from backend.database.pool import SQLitePool
 
 # Initialize Async Database and Metadata
 metadata = MetaData()
@@ -37,6 +47,8 @@ categories = Table(
     Column("id", Integer, primary_key=True, autoincrement=True),
     Column("name", String, unique=True, nullable=False),
     Column("description", Text, nullable=True),
+    # Bumped by triggers on every thread write (see migrations)
+    Column("version", Integer, nullable=False, default=0, server_default="0"),
 )
 
 
@@ -49,6 +61,8 @@ threads = Table(
     Column("title", String, nullable=False),
     Column("description", Text, nullable=True),
     Column("root_comment_id", Integer),
+    # Bumped by triggers on every comment write (see migrations)
+    Column("version", Integer, nullable=False, default=0, server_default="0"),
 )
 
 
@@ -63,6 +77,8 @@ comments = Table(
     Column("approvals", Integer, default=0),
     Column("model_name", String, nullable=True),
     Column("hidden", Boolean, default=False),
+    # Materialized path of ids from the root, maintained by triggers (see migrations)
+    Column("path", String, nullable=True),
 )
 
 embedding_mapping = Table(
@@ -72,16 +88,56 @@ embedding_mapping = Table(
     Column("thread_id", Integer, ForeignKey("threads.id"), unique=True, nullable=False),
 )
 
+# Vectors of comment chunks. They share the FAISS id space with
+# embedding_mapping, and a matching chunk is credited to its thread in search.
+comment_embedding_mapping = Table(
+    "comment_embedding_mapping",
+    metadata,
+    Column("faiss_index", Integer, primary_key=True, autoincrement=False),
+    Column("comment_id", Integer, ForeignKey("comments.id"), nullable=False, index=True),
+    Column("thread_id", Integer, ForeignKey("threads.id"), nullable=False),
+    Column("chunk", Integer, nullable=False, default=0),
+)
+
+# Exact float32 vectors keyed by FAISS vector id, used to re-rank candidates
+# from compressed indexes and to rebuild an index without quantization loss
+embedding_vectors = Table(
+    "embedding_vectors",
+    metadata,
+    Column("faiss_index", Integer, primary_key=True, autoincrement=False),
+    Column("vector", LargeBinary, nullable=False),
+)
+
 
-# Asynchronous SQLAlchemy engine and sessionmaker
-engine = create_async_engine(DATABASE_URL, echo=True)
-async_session = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False
+# The single async access layer: one writer and SQLITE_READERS reader connections
+database = SQLitePool(
+    DATABASE_PATH,
+    readers=SQLITE_READERS,
+    pragmas={
+        "journal_mode": SQLITE_JOURNAL_MODE,
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "mmap_size": SQLITE_MMAP_SIZE,
+        "cache_size": SQLITE_CACHE_SIZE,
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+    },
+    statement_cache_size=SQLITE_STATEMENT_CACHE_SIZE,
 )
 
-database = Database(DATABASE_URL)
+
+def create_schema():
+    """
+    Create missing tables and apply pending migrations. Runs once at startup on
+    a short-lived synchronous engine, before the pool is opened.
+    """
+    engine = create_engine(f"sqlite:///{DATABASE_PATH}")
+    try:
+        with engine.begin() as conn:
+            # Create all tables, including the modified threads table
+            metadata.create_all(conn)
+            # Indexes, triggers and FTS tables that create_all cannot add to an existing database
+            run_migrations(conn)
+    finally:
+        engine.dispose()
 
 
 async def init_db():
@@ -89,20 +145,17 @@ async def init_db():
     Initializes the database connection and creates tables if they do not exist.
     """
     print("Initializing database...")
-    async with engine.begin() as conn:
-        # Create all tables, including the modified threads table
-        await conn.run_sync(metadata.create_all)
-    # Connect the asynchronous database
+    await asyncio.to_thread(create_schema)
+    # Open the connection pool
     await database.connect()
     print("Database initialized.")
 
 async def close_db_connection():
     """
-    Closes the database connection and disposes of the engine.
+    Closes the database connections.
     """
     print("Closing database connection...")
     await database.disconnect()
-    await engine.dispose()
     print("Database connection closed.")
 
 async def save_conversation(conversation):
@@ -0,0 +1,170 @@
+# backend/database/comment_tree.py
+
+"""
+Comment Tree Queries
+
+This module fetches the ancestors or the descendants of a comment with a single
+query each, instead of one query per level of nesting. Ancestors are walked with
+`WITH RECURSIVE` over primary-key lookups; descendants are a range scan over the
+materialized `comments.path` (see migrations).
+"""
+
+from typing import List, Optional, Sequence
+
+from sqlalchemy import and_, func, literal, select
+from sqlalchemy.sql import ColumnElement, Select
+
+from backend.database import database, categories, comments, threads
+from backend.database.migrations import PATH_SEGMENT_WIDTH
+
+# Recursion stops at this depth even if parent_id links form a cycle
+MAX_COMMENT_DEPTH = 10000
+
+
+def ancestors_query(comment_id: int, thread_id: int) -> Select:
+    """
+    Query for a comment and all of its ancestors within a thread, root first.
+
+    Each row has the comments columns plus `depth`, the distance from
+    `comment_id` (0 for the comment itself). The walk stops at a parent that is
+    missing or belongs to another thread.
+    """
+    chain = (
+        select(comments, literal(0).label("depth"))
+        .where(comments.c.id == comment_id, comments.c.thread_id == thread_id)
+        .cte("comment_chain", recursive=True)
+    )
+    parent = comments.alias("parent")
+    chain = chain.union_all(
+        select(parent, (chain.c.depth + 1).label("depth")).where(
+            parent.c.id == chain.c.parent_id,
+            parent.c.thread_id == thread_id,
+            chain.c.depth < MAX_COMMENT_DEPTH,
+        )
+    )
+    return select(chain).order_by(chain.c.depth.desc())
+
+
+def path_depth(path: ColumnElement) -> ColumnElement:
+    """
+    Depth of a comment from its materialized path (0 for a root comment).
+    """
+    # SQLite's "/" on integers truncates
+    return func.length(path).op("/")(PATH_SEGMENT_WIDTH) - 1
+
+
+def _in_subtree(root, node) -> ColumnElement:
+    """
+    `node` is `root` or one of its descendants. Path digits sort below ':', so
+    every descendant's path lies in [root.path, root.path || ':').
+    """
+    return and_(
+        node.c.path >= root.c.path,
+        node.c.path < root.c.path.concat(":"),
+        node.c.thread_id == root.c.thread_id,
+    )
+
+
+def subtree_query(comment_id: int, thread_id: Optional[int] = None) -> Select:
+    """
+    Query for a comment and all of its descendants, breadth first.
+
+    Each row has the comments columns plus `depth` below `comment_id`. Rows at
+    the same depth are ordered by id, i.e. creation order. Replies are only
+    followed within the root's thread.
+    """
+    return subtrees_query([comment_id], thread_id)
+
+
+def subtrees_query(comment_ids: Sequence[int], thread_id: Optional[int] = None) -> Select:
+    """
+    Query for several comments and all of their descendants in one pass,
+    breadth first. Used to expand one page of comments into full reply trees.
+    """
+    root = comments.alias("root")
+    depth = (path_depth(comments.c.path) - path_depth(root.c.path)).label("depth")
+    query = (
+        select(comments, depth)
+        .select_from(root.join(comments, _in_subtree(root, comments)))
+        .where(root.c.id.in_(list(comment_ids)))
+    )
+    if thread_id is not None:
+        query = query.where(root.c.thread_id == thread_id)
+    return query.order_by(depth, comments.c.id)
+
+
+def subtree_size_query(comment_id: int) -> Select:
+    """
+    Query for the number of comments in a subtree, including its root.
+    """
+    root = comments.alias("root")
+    return (
+        select(func.count())
+        .select_from(root.join(comments, _in_subtree(root, comments)))
+        .where(root.c.id == comment_id)
+    )
+
+
+async def fetch_comment_chain(comment_id: int, thread_id: int) -> List:
+    """
+    Fetch the chain of comments leading to `comment_id`, root first.
+
+    Args:
+        comment_id (int): Last comment of the chain.
+        thread_id (int): Thread the chain must belong to.
+
+    Returns:
+        List: Comment rows (with `depth`); empty if the comment is not in the thread.
+    """
+    return await database.fetch_all(ancestors_query(comment_id, thread_id))
+
+
+async def fetch_comment_subtree(comment_id: int, thread_id: Optional[int] = None) -> List:
+    """
+    Fetch a comment and every reply below it.
+
+    Args:
+        comment_id (int): Root of the subtree.
+        thread_id (Optional[int]): If given, the root must belong to this thread.
+
+    Returns:
+        List: Comment rows (with `depth`), breadth first; empty if the comment does not exist.
+    """
+    return await database.fetch_all(subtree_query(comment_id, thread_id))
+
+
+async def fetch_subtree_size(comment_id: int) -> int:
+    """
+    Count a comment and all replies below it (0 if the comment does not exist).
+    """
+    return await database.fetch_val(subtree_size_query(comment_id))
+
+
+async def fetch_comment_subtrees(comment_ids: Sequence[int], thread_id: Optional[int] = None) -> List:
+    """
+    Fetch several comments and every reply below them.
+
+    Args:
+        comment_ids (Sequence[int]): Roots of the subtrees.
+        thread_id (Optional[int]): If given, roots must belong to this thread.
+
+    Returns:
+        List: Comment rows (with `depth`), breadth first.
+    """
+    if not comment_ids:
+        return []
+    return await database.fetch_all(subtrees_query(comment_ids, thread_id))
+
+
+async def fetch_thread_version(thread_id: int) -> Optional[int]:
+    """
+    Version of a thread's comments, bumped on every comment write (None if the thread does not exist).
+    """
+    return await database.fetch_val(select(threads.c.version).where(threads.c.id == thread_id))
+
+
+async def fetch_category_version(category_id: int) -> Optional[int]:
+    """
+    Version of a category's thread list, bumped on every thread write (None if the category does not exist).
+    """
+    return await database.fetch_val(select(categories.c.version).where(categories.c.id == category_id))
@@ -0,0 +1,103 @@
+# backend/database/fts.py
+
+"""
+Full-Text Search Schema
+
+This module defines the SQLite FTS5 indexes over thread and comment text used
+for lexical retrieval. Both are external-content tables: they store only the
+inverted index and read text from `threads` / `comments`, and triggers keep
+them in sync on insert, update and delete.
+"""
+
+from typing import List
+
+# unicode61 splits on punctuation; keeping '_' as a token character keeps
+# snake_case identifiers whole
+FTS_TOKENIZER = "unicode61 tokenchars '_'"
+
+FTS_TABLES = {
+    "threads_fts": f"""
+        CREATE VIRTUAL TABLE threads_fts USING fts5(
+            title, description,
+            content='threads', content_rowid='id',
+            tokenize="{FTS_TOKENIZER}"
+        )
+    """,
+    "comments_fts": f"""
+        CREATE VIRTUAL TABLE comments_fts USING fts5(
+            text,
+            content='comments', content_rowid='id',
+            tokenize="{FTS_TOKENIZER}"
+        )
+    """,
+}
+
+FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS threads_fts_insert AFTER INSERT ON threads BEGIN
+        INSERT INTO threads_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS threads_fts_delete AFTER DELETE ON threads BEGIN
+        INSERT INTO threads_fts(threads_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS threads_fts_update AFTER UPDATE OF title, description ON threads BEGIN
+        INSERT INTO threads_fts(threads_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO threads_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_fts_insert AFTER INSERT ON comments BEGIN
+        INSERT INTO comments_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_fts_delete AFTER DELETE ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_fts_update AFTER UPDATE OF text ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO comments_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+]
+
+
+def fts_statements(existing_tables: List[str]) -> List[str]:
+    """
+    DDL that brings a database up to the FTS schema.
+
+    Tables that do not exist yet are created and then rebuilt from their
+    content table, so rows written before FTS was added are searchable.
+
+    Args:
+        existing_tables (List[str]): Names of the tables already in the database.
+
+    Returns:
+        List[str]: Statements to execute in order.
+    """
+    statements = []
+    for name, ddl in FTS_TABLES.items():
+        if name not in existing_tables:
+            statements.append(ddl)
+            statements.append(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+    return statements + FTS_TRIGGERS
+
+
+def create_fts_tables(connection):
+    """
+    Create the FTS tables and triggers on a synchronous SQLAlchemy connection.
+    Meant for `AsyncConnection.run_sync`.
+    """
+    existing_tables = [
+        row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")
+    ]
+    for statement in fts_statements(existing_tables):
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,213 @@
+# backend/database/migrations.py
+
+"""
+Schema Migrations
+
+`metadata.create_all` only creates missing tables; it cannot add indexes,
+columns or triggers to an existing chatweaver.db. Those changes are versioned
+migrations here. The schema version is stored in SQLite's `PRAGMA user_version`.
+init_db applies every migration newer than that version, in order. Each step
+and its `user_version` bump run inside one SAVEPOINT on the connection: the
+sqlite3 driver does not open a transaction for DDL on its own, so without it a
+crash halfway through a step would leave the step partly applied under the
+old version. A failed step is rolled back and nothing after it runs.
+
+Migrations must tolerate running on a database where their objects already
+exist (e.g. tables created by create_all, or FTS tables created before
+migrations were tracked), so they use IF NOT EXISTS or check first.
+"""
+
+import logging
+from typing import Callable, List, Tuple
+
+from backend.database.fts import create_fts_tables
+
+# Indexes for the hot read paths:
+#   get_comments:   WHERE thread_id = ? ORDER BY id    -> seek, no sort
+#   comment_tree:   WHERE parent_id = ? (subtree walk) -> seek per level
+#   get_threads:    WHERE category_id = ?              -> seek
+COMMENT_AND_THREAD_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_comments_thread_id_id ON comments (thread_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_comments_parent_id ON comments (parent_id)",
+    "CREATE INDEX IF NOT EXISTS ix_threads_category_id ON threads (category_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_comment_embedding_mapping_thread_id ON comment_embedding_mapping (thread_id)",
+]
+
+
+def execute_all(statements: List[str]) -> Callable:
+    """
+    Migration step that executes the given statements in order.
+    """
+    def _apply(connection):
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+    return _apply
+
+
+# Materialized comment paths: the zero-padded ids from the root down to the
+# comment, e.g. "0000000001/0000000007/". All descendants of X share X's path
+# as a prefix, so a subtree is one range scan on ix_comments_thread_id_path.
+PATH_SEGMENT_WIDTH = 11
+
+COMMENT_PATH_TRIGGERS = [
+    # Comments whose parent is missing are stored as roots
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_path_insert AFTER INSERT ON comments BEGIN
+        UPDATE comments
+        SET path = COALESCE((SELECT path FROM comments WHERE id = new.parent_id), '') || printf('%010d/', new.id)
+        WHERE id = new.id;
+    END
+    """,
+    # Re-parenting moves the whole subtree under the new parent's path
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_path_reparent AFTER UPDATE OF parent_id ON comments
+    WHEN new.parent_id IS NOT old.parent_id BEGIN
+        UPDATE comments
+        SET path = COALESCE((SELECT path FROM comments WHERE id = new.parent_id), '')
+                   || printf('%010d/', new.id) || substr(path, length(old.path) + 1)
+        WHERE thread_id = old.thread_id AND path >= old.path AND path < old.path || ':';
+    END
+    """,
+]
+
+BACKFILL_COMMENT_PATHS = """
+    WITH RECURSIVE tree(id, path) AS (
+        SELECT id, printf('%010d/', id) FROM comments
+        WHERE parent_id IS NULL OR parent_id NOT IN (SELECT id FROM comments)
+        UNION ALL
+        SELECT comments.id, tree.path || printf('%010d/', comments.id)
+        FROM comments JOIN tree ON comments.parent_id = tree.id
+    )
+    UPDATE comments SET path = tree.path FROM tree WHERE tree.id = comments.id
+"""
+
+
+def add_comment_paths(connection):
+    """
+    Add and backfill comments.path, and install the triggers that maintain it.
+    """
+    columns = [row[1] for row in connection.exec_driver_sql("PRAGMA table_info(comments)")]
+    if "path" not in columns:
+        connection.exec_driver_sql("ALTER TABLE comments ADD COLUMN path TEXT")
+    connection.exec_driver_sql(BACKFILL_COMMENT_PATHS)
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_comments_thread_id_path ON comments (thread_id, path)")
+    for statement in COMMENT_PATH_TRIGGERS:
+        connection.exec_driver_sql(statement)
+    # Refresh planner statistics so get_comments keeps using (thread_id, id)
+    connection.exec_driver_sql("ANALYZE")
+
+
+# threads.version counts changes to a thread's comments. Caches of a thread's
+# comment tree are keyed by it, so every write path (routes, bulk import,
+# manual SQL) invalidates them. Updates of `path` alone do not count: they
+# only follow a change that already bumped the version.
+THREAD_VERSION_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_version_insert AFTER INSERT ON comments BEGIN
+        UPDATE threads SET version = version + 1 WHERE id = new.thread_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_version_update
+    AFTER UPDATE OF thread_id, parent_id, text, flags, approvals, model_name, hidden ON comments BEGIN
+        UPDATE threads SET version = version + 1 WHERE id IN (old.thread_id, new.thread_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_version_delete AFTER DELETE ON comments BEGIN
+        UPDATE threads SET version = version + 1 WHERE id = old.thread_id;
+    END
+    """,
+]
+
+
+def add_thread_versions(connection):
+    """
+    Add threads.version and the triggers that bump it on comment writes.
+    """
+    columns = [row[1] for row in connection.exec_driver_sql("PRAGMA table_info(threads)")]
+    if "version" not in columns:
+        connection.exec_driver_sql("ALTER TABLE threads ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    for statement in THREAD_VERSION_TRIGGERS:
+        connection.exec_driver_sql(statement)
+
+
+# categories.version counts changes to a category's thread list: threads
+# created in, moved into or out of, edited in or deleted from the category.
+# Comment writes bump threads.version, which is not part of the list.
+CATEGORY_VERSION_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS threads_version_insert AFTER INSERT ON threads BEGIN
+        UPDATE categories SET version = version + 1 WHERE id = new.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS threads_version_update
+    AFTER UPDATE OF category_id, title, description, root_comment_id ON threads BEGIN
+        UPDATE categories SET version = version + 1 WHERE id IN (old.category_id, new.category_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS threads_version_delete AFTER DELETE ON threads BEGIN
+        UPDATE categories SET version = version + 1 WHERE id = old.category_id;
+    END
+    """,
+]
+
+
+def add_category_versions(connection):
+    """
+    Add categories.version and the triggers that bump it on thread writes.
+    """
+    columns = [row[1] for row in connection.exec_driver_sql("PRAGMA table_info(categories)")]
+    if "version" not in columns:
+        connection.exec_driver_sql("ALTER TABLE categories ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    for statement in CATEGORY_VERSION_TRIGGERS:
+        connection.exec_driver_sql(statement)
+
+
+# (version, description, step). Append only; never edit a released migration.
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "Full-text search tables and sync triggers", create_fts_tables),
+    (2, "Indexes for comment and thread lookups", execute_all(COMMENT_AND_THREAD_INDEXES + ["ANALYZE"])),
+    (3, "Materialized comment paths", add_comment_paths),
+    (4, "Thread versions for comment tree caches", add_thread_versions),
+    (5, "Category versions for conditional thread lists", add_category_versions),
+]
+
+
+def schema_version(connection) -> int:
+    """
+    Version of the last migration applied to the database.
+    """
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def run_migrations(connection) -> int:
+    """
+    Apply pending migrations on a synchronous SQLAlchemy connection, each one
+    atomically with its version bump.
+
+    Returns:
+        int: The schema version after migrating.
+    """
+    current = schema_version(connection)
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        logging.info(f"Applying migration {version}: {description}")
+        # Outside a transaction, SAVEPOINT starts one and RELEASE commits it;
+        # inside the caller's transaction it nests
+        savepoint = f"migration_{int(version)}"
+        connection.exec_driver_sql(f"SAVEPOINT {savepoint}")
+        try:
+            step(connection)
+            # PRAGMA does not accept bound parameters
+            connection.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+        except BaseException:
+            connection.exec_driver_sql(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            connection.exec_driver_sql(f"RELEASE SAVEPOINT {savepoint}")
+            raise
+        connection.exec_driver_sql(f"RELEASE SAVEPOINT {savepoint}")
+        current = version
+    return current
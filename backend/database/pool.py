@@ -0,0 +1,377 @@
+# backend/database/pool.py
+
+"""
+SQLite Connection Pool
+
+This module is the single async access layer to chatweaver.db. It exposes the
+same calls the code used from `databases.Database` (execute, execute_many,
+fetch_all, fetch_one, fetch_val, transaction), on top of aiosqlite:
+
+- One writer connection. Writes and transactions take turns on it, so they
+  never fail with "database is locked" inside the process.
+- Several read-only reader connections. With WAL journaling, readers see the
+  last committed state and do not wait for a write or an open transaction.
+  Reads made by the task that owns the open transaction go to the writer, so
+  they see its uncommitted changes.
+- Pragmas (journal_mode, synchronous, mmap_size, cache_size, busy_timeout) are
+  applied to every connection when it is opened.
+- SQLAlchemy statements are compiled with named parameters, so the same
+  statement always produces the same SQL text and sqlite3's per-connection
+  statement cache reuses the prepared statement.
+
+Statements are routed by their text: SELECT and WITH go to a reader, anything
+else to the writer. Use execute or fetch_* inside a transaction for
+`INSERT ... RETURNING`.
+"""
+
+import asyncio
+import logging
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import aiosqlite
+from sqlalchemy.dialects.sqlite.pysqlite import SQLiteDialect_pysqlite
+from sqlalchemy.sql import ClauseElement, Insert
+
+Query = Union[ClauseElement, str]
+
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+}
+
+_dialect = SQLiteDialect_pysqlite(paramstyle="named")
+
+
+class Record(Mapping):
+    """
+    Result row addressable by column name, position or attribute, like the
+    records returned by `databases`.
+    """
+
+    __slots__ = ("_values", "_index")
+
+    def __init__(self, values: Sequence, index: Dict[str, int]):
+        self._values = values
+        self._index = index
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._values[key]
+        # Also accept Column objects
+        return self._values[self._index[getattr(key, "name", key)]]
+
+    def __getattr__(self, name: str):
+        try:
+            return self._values[self._index[name]]
+        except KeyError as e:
+            raise AttributeError(name) from e
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"Record({dict(self)!r})"
+
+
+class Compiled:
+    """
+    SQL text, parameters and result processors of one statement.
+    """
+
+    __slots__ = ("sql", "params", "processors")
+
+    def __init__(self, sql: str, params: List[Dict], processors: Optional[List]):
+        self.sql = sql
+        self.params = params
+        self.processors = processors
+
+
+def compile_query(query: Query, values: Optional[Union[Dict, Sequence[Dict]]] = None, many: bool = False) -> Compiled:
+    """
+    Compile a SQLAlchemy statement, or wrap raw SQL, for sqlite3.
+
+    Args:
+        query (Query): SQLAlchemy statement, or SQL text with :name parameters.
+        values: Parameters; a list of them when `many` is True.
+        many (bool): Compile once for executemany.
+
+    Returns:
+        Compiled: The SQL text and one parameter dict per execution.
+    """
+    rows = list(values or []) if many else [values or {}]
+    if isinstance(query, str):
+        return Compiled(query, rows, None)
+
+    # Only bind the columns the caller supplies, e.g. for table.insert()
+    column_keys = list(dict.fromkeys(key for row in rows for key in row)) or None
+    compiled = query.compile(
+        dialect=_dialect, column_keys=column_keys, compile_kwargs={"render_postcompile": True}
+    )
+    # Scalar column defaults (e.g. flags=0) are filled in here, as an engine
+    # would, for columns a statement or row leaves out
+    table_defaults = {
+        column.key: column.default.arg
+        for column in (query.table.columns if isinstance(query, Insert) else [])
+        if column.default is not None and column.default.is_scalar
+    }
+    omitted = {
+        column.key: table_defaults.get(column.key) for column in getattr(compiled, "insert_prefetch", [])
+    }
+    bind_processors = _bind_processors(compiled)
+    params = []
+    for row in rows:
+        fill = {key: table_defaults.get(key) for key in column_keys or [] if key not in row}
+        bound = compiled.construct_params({**omitted, **fill, **row} or None)
+        params.append({key: _process_bind(bind_processors, compiled, key, value) for key, value in bound.items()})
+    # Result types of SELECT columns or RETURNING columns (none for other DML)
+    processors = [
+        column.type.dialect_impl(_dialect).result_processor(_dialect, None)
+        for column in getattr(query, "exported_columns", [])
+    ] or None
+    return Compiled(compiled.string, params, processors)
+
+
+def _bind_processors(compiled) -> Dict[str, Callable]:
+    """
+    Dialect bind processors (e.g. DateTime to string) of a compiled statement's parameters.
+    """
+    processors = {}
+    for key, bind in compiled.binds.items():
+        process = bind.type.dialect_impl(_dialect).bind_processor(_dialect)
+        if process is not None:
+            processors[key] = process
+    return processors
+
+
+def _process_bind(processors: Dict[str, Callable], compiled, key: str, value: Any) -> Any:
+    if key not in compiled.binds:
+        # An element of an IN list, expanded by render_postcompile as <bind>_<n>
+        key = key.rsplit("_", 1)[0]
+    process = processors.get(key)
+    return value if process is None or value is None else process(value)
+
+
+def is_read(sql: str) -> bool:
+    """
+    Whether a statement only reads and can run on a reader connection.
+    """
+    words = sql.lstrip(" \t\n(").split(None, 1)
+    return bool(words) and words[0].upper() in ("SELECT", "WITH")
+
+
+def is_insert(sql: str) -> bool:
+    """
+    Whether a statement inserts rows, so its result is the new row id.
+    """
+    words = sql.lstrip(" \t\n(").split(None, 1)
+    return bool(words) and words[0].upper() in ("INSERT", "REPLACE")
+
+
+class _Transaction:
+    """
+    `async with pool.transaction():` on the writer connection. Nested
+    transactions of the same task become savepoints.
+    """
+
+    def __init__(self, pool: "SQLitePool"):
+        self._pool = pool
+        self._savepoint: Optional[str] = None
+
+    async def __aenter__(self):
+        pool = self._pool
+        if pool._in_transaction():
+            pool._savepoints += 1
+            self._savepoint = f"sp_{pool._savepoints}"
+            await pool._writer.execute(f"SAVEPOINT {self._savepoint}")
+            return self
+        await pool._write_lock.acquire()
+        try:
+            await pool._writer.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            pool._write_lock.release()
+            raise
+        pool._transaction_task = asyncio.current_task()
+        pool.transactions += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pool = self._pool
+        if self._savepoint is not None:
+            if exc_type is not None:
+                await pool._writer.execute(f"ROLLBACK TO SAVEPOINT {self._savepoint}")
+            await pool._writer.execute(f"RELEASE SAVEPOINT {self._savepoint}")
+            return False
+        try:
+            await pool._writer.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+        finally:
+            pool._transaction_task = None
+            pool._write_lock.release()
+        return False
+
+
+class SQLitePool:
+    def __init__(
+        self,
+        path: str,
+        readers: int = 4,
+        pragmas: Optional[Dict[str, Any]] = None,
+        statement_cache_size: int = 256,
+    ):
+        """
+        Args:
+            path (str): Database file.
+            readers (int): Number of read-only connections.
+            pragmas (Optional[Dict[str, Any]]): Overrides of DEFAULT_PRAGMAS.
+            statement_cache_size (int): Prepared statements cached per connection.
+        """
+        self.path = path
+        self.n_readers = max(1, readers)
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.statement_cache_size = statement_cache_size
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._transaction_task: Optional[asyncio.Task] = None
+        self._savepoints = 0
+        self.reads = 0
+        self.writes = 0
+        self.transactions = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None
+
+    async def _open(self, read_only: bool) -> aiosqlite.Connection:
+        # isolation_level=None: autocommit; transactions are started explicitly
+        connection = await aiosqlite.connect(
+            self.path, isolation_level=None, cached_statements=self.statement_cache_size
+        )
+        for name, value in self.pragmas.items():
+            await connection.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            await connection.execute("PRAGMA query_only = ON")
+        return connection
+
+    async def connect(self):
+        """
+        Open the writer and reader connections. No-op if already connected.
+        """
+        if self.is_connected:
+            return
+        # The writer goes first so journal_mode (a database-level setting) is in place for the readers
+        self._writer = await self._open(read_only=False)
+        self._readers = [await self._open(read_only=True) for _ in range(self.n_readers)]
+        self._idle_readers = asyncio.Queue()
+        for reader in self._readers:
+            self._idle_readers.put_nowait(reader)
+        self._write_lock = asyncio.Lock()
+        logging.info(f"Opened SQLite pool on {self.path} with {self.n_readers} readers and pragmas {self.pragmas}.")
+
+    async def disconnect(self):
+        """
+        Close all connections.
+        """
+        if not self.is_connected:
+            return
+        async with self._write_lock:
+            for connection in [self._writer, *self._readers]:
+                await connection.close()
+        self._writer = None
+        self._readers = []
+        self._idle_readers = None
+
+    def _in_transaction(self) -> bool:
+        return self._transaction_task is not None and self._transaction_task is asyncio.current_task()
+
+    def transaction(self) -> _Transaction:
+        """
+        Run the statements of an `async with` block atomically on the writer.
+        """
+        return _Transaction(self)
+
+    async def _run(self, compiled: Compiled, fetch: Optional[str]):
+        """
+        Execute on the right connection. `fetch` is "all", "one" or None (execute).
+        """
+        if self._in_transaction():
+            return await self._execute(self._writer, compiled, fetch)
+        if fetch is not None and is_read(compiled.sql):
+            reader = await self._idle_readers.get()
+            try:
+                self.reads += 1
+                return await self._execute(reader, compiled, fetch)
+            finally:
+                self._idle_readers.put_nowait(reader)
+        async with self._write_lock:
+            self.writes += 1
+            return await self._execute(self._writer, compiled, fetch)
+
+    @staticmethod
+    async def _execute(connection: aiosqlite.Connection, compiled: Compiled, fetch: Optional[str]):
+        async with connection.execute(compiled.sql, compiled.params[0]) as cursor:
+            if fetch is None:
+                # lastrowid is left over from the connection's last INSERT for other statements
+                return cursor.lastrowid if is_insert(compiled.sql) else cursor.rowcount
+            rows = await cursor.fetchall() if fetch == "all" else [await cursor.fetchone()]
+            if rows == [None]:
+                return None
+            index = {column[0]: position for position, column in enumerate(cursor.description)}
+            processors = compiled.processors
+            if processors is None or len(processors) != len(index):
+                return [Record(row, index) for row in rows]
+            return [
+                Record([value if process is None else process(value) for process, value in zip(processors, row)], index)
+                for row in rows
+            ]
+
+    async def execute(self, query: Query, values: Optional[Dict] = None) -> Any:
+        """
+        Execute one statement.
+
+        Returns:
+            Any: The new row id for an INSERT, otherwise the number of rows changed.
+        """
+        return await self._run(compile_query(query, values), None)
+
+    async def execute_many(self, query: Query, values: Sequence[Dict]):
+        """
+        Execute one statement once per parameter dict, compiled and prepared once,
+        in a single transaction.
+        """
+        if not values:
+            return
+        compiled = compile_query(query, values, many=True)
+        async with self.transaction():
+            await self._writer.executemany(compiled.sql, compiled.params)
+
+    async def fetch_all(self, query: Query, values: Optional[Dict] = None) -> List[Record]:
+        return await self._run(compile_query(query, values), "all")
+
+    async def fetch_one(self, query: Query, values: Optional[Dict] = None) -> Optional[Record]:
+        rows = await self._run(compile_query(query, values), "one")
+        return rows[0] if rows else None
+
+    async def fetch_val(self, query: Query, values: Optional[Dict] = None, column: Any = 0) -> Any:
+        row = await self.fetch_one(query, values)
+        return None if row is None else row[column]
+
+    def stats(self) -> Dict:
+        """
+        Connection counts and statement totals.
+        """
+        return {
+            "readers": self.n_readers,
+            "idle_readers": self._idle_readers.qsize() if self._idle_readers else 0,
+            "reads": self.reads,
+            "writes": self.writes,
+            "transactions": self.transactions,
+            "pragmas": self.pragmas,
+        }
@@ -0,0 +1,112 @@
+# backend/database/writes.py
+
+"""
+Comment and Thread Writes
+
+Write helpers that return the written row from the write itself
+(`INSERT/UPDATE/DELETE ... RETURNING`), instead of writing and then selecting
+the row back. Operations that need several statements run in one transaction,
+so readers never see a half-created thread.
+"""
+
+from typing import Optional, Tuple
+
+from sqlalchemy import exists, literal, select
+
+from backend.database import database, comments, threads
+
+# Text of the placeholder root comment every thread is created with. It says
+# nothing about the thread, so it is never embedded.
+ROOT_COMMENT_TEXT = "Root Comment"
+
+
+async def insert_comment(
+    thread_id: int,
+    parent_id: Optional[int],
+    text: str,
+    flags: int = 0,
+    approvals: int = 0,
+    model_name: Optional[str] = None,
+    hidden: bool = False,
+    require_thread: bool = False,
+):
+    """
+    Insert a comment and return the new row.
+
+    Args:
+        thread_id (int): Thread the comment belongs to.
+        parent_id (Optional[int]): Comment replied to, or None for a top-level comment.
+        text (str): Comment text.
+        flags (int): Initial flags (1 marks AI-generated comments).
+        approvals (int): Initial approvals.
+        model_name (Optional[str]): Model that generated the comment, if any.
+        hidden (bool): Whether the comment starts hidden.
+        require_thread (bool): Only insert if the thread exists, checked in the same statement.
+
+    Returns:
+        Record: The inserted comment, or None if require_thread is set and the thread does not exist.
+        Its `path` is still NULL: the trigger that sets it runs after RETURNING.
+    """
+    values = {
+        "thread_id": thread_id,
+        "parent_id": parent_id,
+        "text": text,
+        "flags": flags,
+        "approvals": approvals,
+        "model_name": model_name,
+        "hidden": hidden,
+    }
+    if require_thread:
+        # INSERT ... SELECT ... WHERE EXISTS: one round trip for check and write
+        source = select(*[literal(value, comments.c[name].type) for name, value in values.items()]).where(
+            exists().where(threads.c.id == thread_id)
+        )
+        query = comments.insert().from_select(list(values), source)
+    else:
+        query = comments.insert().values(**values)
+    return await database.fetch_one(query.returning(*comments.c))
+
+
+async def update_comment(comment_id: int, **values):
+    """
+    Update a comment's columns and return the updated row.
+
+    Returns:
+        Record: The updated comment, or None if it does not exist.
+    """
+    query = comments.update().where(comments.c.id == comment_id).values(**values)
+    return await database.fetch_one(query.returning(*comments.c))
+
+
+async def delete_comment(comment_id: int) -> bool:
+    """
+    Delete a comment.
+
+    Returns:
+        bool: False if the comment did not exist.
+    """
+    query = comments.delete().where(comments.c.id == comment_id).returning(comments.c.id)
+    return await database.fetch_one(query) is not None
+
+
+async def create_thread_with_root(category_id: int, title: str, description: Optional[str]) -> Tuple:
+    """
+    Create a thread and its root comment in one transaction.
+
+    Returns:
+        Tuple[Record, Record]: (thread row with root_comment_id set, root comment row).
+    """
+    async with database.transaction():
+        thread = await database.fetch_one(
+            threads.insert()
+            .values(title=title, description=description, category_id=category_id, root_comment_id=None)
+            .returning(threads.c.id)
+        )
+        root_comment = await insert_comment(thread["id"], None, ROOT_COMMENT_TEXT)
+        thread = await database.fetch_one(
+            threads.update()
+            .where(threads.c.id == thread["id"])
+            .values(root_comment_id=root_comment["id"])
+            .returning(*threads.c)
+        )
+    return thread, root_comment
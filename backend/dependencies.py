@@ -1,9 +1,58 @@
 # backend/dependencies.py
 
 from embeddings.vector_db import VectorDB
+from embeddings.embedding_cache import EmbeddingCache
+from embeddings.indexing.incremental_indexer import IncrementalIndexer
+from backend.config import (
+    FEEDBACK_SNAPSHOT_ENABLED,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_FILE,
+    EMBEDDING_CACHE_CAPACITY,
+    EMBEDDING_CACHE_DISK_CAPACITY,
+    INDEXER_QUEUE_SIZE,
+    INDEXER_BATCH_SIZE,
+    INDEXER_MAX_WAIT_MS,
+    INDEXER_MAX_RETRIES,
+    INDEXER_RETRY_BACKOFF_SECONDS,
+)
+from backend.services.feedback_service import feedback_snapshot
+from backend.services.retrieval_cache import RetrievalCache, retrieval_cache
+from backend.services.thread_cache import ThreadTreeCache, thread_cache
+
+# Shared by VectorDB and the summarization service
+embedding_cache = (
+    EmbeddingCache(EMBEDDING_CACHE_FILE, EMBEDDING_CACHE_CAPACITY, EMBEDDING_CACHE_DISK_CAPACITY)
+    if EMBEDDING_CACHE_ENABLED
+    else None
+)
 
 # Create a global VectorDB instance
-vector_db = VectorDB()
+vector_db = VectorDB(
+    feedback_snapshot=feedback_snapshot if FEEDBACK_SNAPSHOT_ENABLED else None,
+    embedding_cache=embedding_cache,
+)
+
+# Embeds comments off the request path
+comment_indexer = IncrementalIndexer(
+    vector_db,
+    max_queue_size=INDEXER_QUEUE_SIZE,
+    batch_size=INDEXER_BATCH_SIZE,
+    max_wait_ms=INDEXER_MAX_WAIT_MS,
+    max_retries=INDEXER_MAX_RETRIES,
+    retry_backoff_seconds=INDEXER_RETRY_BACKOFF_SECONDS,
+)
 
 def get_vector_db() -> VectorDB:
     return vector_db
+
+def get_embedding_cache() -> EmbeddingCache:
+    return embedding_cache
+
+def get_comment_indexer() -> IncrementalIndexer:
+    return comment_indexer
+
+def get_retrieval_cache() -> RetrievalCache:
+    return retrieval_cache
+
+def get_thread_cache() -> ThreadTreeCache:
+    return thread_cache
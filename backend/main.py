@@ -3,6 +3,7 @@
 import asyncio
 import logging
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.routes.context import router as context_router
@@ -10,9 +11,14 @@ from backend.routes.feedback import router as feedback_router
 from backend.routes.categories import router as categories_router  # Import the categories router
 from backend.database import init_db, close_db_connection
 from backend.services.executor import executor  # Import the executor
-from backend.dependencies import vector_db  # Import the vector_db instance
+from backend.dependencies import vector_db, comment_indexer  # Import the shared instances
 from backend.routes.threads import router as threads_router
 from backend.routes.comments import router as comments_router
+from backend.routes.metrics import router as metrics_router
+from backend.services.feedback_service import feedback_snapshot, feedback_accumulator
+from backend.services.pagination import NEXT_CURSOR_HEADER
+from backend.services.conditional import ETAG_HEADER
+from backend.config import FEEDBACK_SNAPSHOT_ENABLED
 
 # Configure Logging
 logging.basicConfig(
@@ -32,6 +38,7 @@ app.include_router(feedback_router, prefix="/api", tags=["Feedback"])
 app.include_router(categories_router, prefix="/api", tags=["Categories"])  # Include the categories router
 app.include_router(threads_router, prefix="/api", tags=["Threads"])
 app.include_router(comments_router, prefix="/api", tags=["Comments"])
+app.include_router(metrics_router, prefix="/api", tags=["Metrics"])
 
 # Add CORS middleware (if necessary)
 app.add_middleware(
@@ -40,6 +47,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the pagination cursor and version tags
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
 )
 
 @app.on_event("startup")
@@ -54,11 +63,25 @@ async def startup_event():
     # Initialize the database
     await init_db()
     logging.info("Database initialized.")
+
+    # Load the feedback snapshot used for retrieval scoring
+    if FEEDBACK_SNAPSHOT_ENABLED:
+        await feedback_snapshot.load()
+        logging.info(f"Loaded feedback snapshot for {len(feedback_snapshot.counts)} contexts.")
+
+    # Batch feedback writes in the background
+    if feedback_accumulator is not None:
+        await feedback_accumulator.start()
+        logging.info("Feedback write-behind started.")
     
-    # Initialize VectorDB
+    # Initialize VectorDB; the embedding model keeps loading in the background
     await vector_db.initialize()
     logging.info("VectorDB initialized.")
 
+    # Start embedding comments in the background
+    await comment_indexer.start()
+    logging.info("Comment indexer started.")
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """
@@ -67,6 +90,21 @@ async def shutdown_event():
     """
     logging.info("Shutting down resources...")
     
+    # Index comments that are already queued
+    try:
+        await comment_indexer.stop()
+        logging.info("Comment indexer stopped.")
+    except Exception as e:
+        logging.error("Error stopping comment indexer: %s", e)
+
+    # Write pending feedback votes before the database closes
+    if feedback_accumulator is not None:
+        try:
+            await feedback_accumulator.stop()
+            logging.info("Feedback write-behind flushed.")
+        except Exception as e:
+            logging.error("Error flushing feedback: %s", e)
+
     # Close the database connection
     try:
         await close_db_connection()
@@ -74,6 +112,13 @@ async def shutdown_event():
     except Exception as e:
         logging.error("Error closing database connection: %s", e)
     
+    # Flush logged vectors into a final FAISS snapshot
+    try:
+        await vector_db.close()
+        logging.info("VectorDB closed.")
+    except Exception as e:
+        logging.error("Error closing VectorDB: %s", e)
+
     # Shutdown the ThreadPoolExecutor
     try:
         executor.shutdown(wait=True)
@@ -101,3 +146,14 @@ def root():
         dict: Health check message.
     """
     return {"message": "Chatweaver Backend is running"}
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness endpoint: reports whether semantic search is warm, i.e. the FAISS
+    index is open and the embedding model has finished loading.
+    Returns:
+        JSONResponse: Readiness details, with status 503 until ready.
+    """
+    status = vector_db.readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
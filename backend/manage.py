@@ -6,15 +6,28 @@ This script provides command-line functionality to parse HTML conversations and
 
 import argparse
 import asyncio
-from services.html_parser import parse_chatgpt_html
-from services.context_service import save_conversation
+import json
+import numpy as np
+from backend.services.html_parser import parse_chatgpt_html
+from backend.services.context_service import save_conversation
 from pathlib import Path
-from backend.database import init_db
+from sqlalchemy import select
+from backend.database import init_db, database, comments
+from backend.dependencies import vector_db
+from embeddings.index_factory import INDEX_FACTORY_STRINGS, compare_backends, reconstruct_all
+from embeddings.encoders import compare_encoders
+from embeddings.vector_db import EMBEDDING_MODEL_NAME
 
 async def main():
     parser = argparse.ArgumentParser(description="Chatweaver Management Script")
     parser.add_argument("--parse-html", type=str, help="Path to ChatGPT HTML file to parse and store.")
     parser.add_argument("--init-db", action="store_true", help="Initialize the database.")
+    parser.add_argument("--rebuild-index", type=str, choices=list(INDEX_FACTORY_STRINGS), help="Rebuild the FAISS index as the given backend type.")
+    parser.add_argument("--nprobe", type=int, help="IVF lists probed per query (persisted with the index).")
+    parser.add_argument("--ef-search", type=int, help="HNSW search depth (persisted with the index).")
+    parser.add_argument("--evaluate-index", action="store_true", help="Report recall@k, latency and bytes per vector of the current index.")
+    parser.add_argument("--compare-backends", action="store_true", help="Report recall@k, latency, size and build time of every backend (with and without re-ranking) on the current vectors.")
+    parser.add_argument("--compare-encoders", action="store_true", help="Report encode throughput per core and cosine parity with fp32 for every encoder backend.")
     
     args = parser.parse_args()
     
@@ -37,5 +50,33 @@ async def main():
         await save_conversation(parsed_conversation)
         print(f"Conversation {parsed_conversation['conversation_id']} saved successfully.")
 
+    if args.rebuild_index or args.nprobe or args.ef_search or args.evaluate_index or args.compare_backends:
+        await init_db()
+        await vector_db.initialize()
+
+        if args.rebuild_index:
+            print(f"Rebuilding FAISS index as {args.rebuild_index}...")
+            await vector_db.rebuild_index(args.rebuild_index)
+
+        if args.nprobe or args.ef_search:
+            vector_db.set_search_params(nprobe=args.nprobe, ef_search=args.ef_search)
+
+        if args.evaluate_index:
+            print(json.dumps(await vector_db.evaluate(), indent=2))
+
+        if args.compare_backends:
+            # Prefer the exact stored vectors over ones reconstructed from a compressed index
+            exact = await vector_db.fetch_exact_vectors()
+            vectors = np.stack(list(exact.values())) if exact else reconstruct_all(vector_db.index)
+            print(json.dumps(compare_backends(vectors, vectors[:100]), indent=2))
+
+        await vector_db.close()
+
+    if args.compare_encoders:
+        await init_db()
+        rows = await database.fetch_all(select(comments.c.text).where(comments.c.text != "").limit(256))
+        texts = [row["text"] for row in rows] or None
+        print(json.dumps(compare_encoders(EMBEDDING_MODEL_NAME, texts), indent=2))
+
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,7 +1,7 @@
 # backend/models.py
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class ThreadCreateRequest(BaseModel):
@@ -52,6 +52,39 @@ class CommentCreateRequest(BaseModel):
 
 
 
+class BulkCommentNode(BaseModel):
+    temp_id: Optional[str] = None  # Client-side id, mapped to the real id in the response
+    text: str
+    flags: int = 0
+    approvals: int = 0
+    model_name: Optional[str] = None
+    replies: List['BulkCommentNode'] = Field(default_factory=list)
+
+
+class BulkImportRequest(BaseModel):
+    parent_id: Optional[int] = None  # Existing comment the top-level nodes reply to
+    comments: List[BulkCommentNode]
+
+
+class BulkCommentLine(BaseModel):
+    """
+    One line of an NDJSON bulk import. A line can only reply to an earlier line.
+    """
+    temp_id: Optional[str] = None
+    parent_temp_id: Optional[str] = None  # temp_id of an earlier line
+    parent_id: Optional[int] = None  # Or an existing comment
+    text: str
+    flags: int = 0
+    approvals: int = 0
+    model_name: Optional[str] = None
+
+
+class BulkImportResponse(BaseModel):
+    thread_id: int
+    created: int
+    id_map: Dict[str, int]  # temp_id -> comment id
+
+
 class CommentActionRequest(BaseModel):
     action: str  # 'hide' or 'delete'
 
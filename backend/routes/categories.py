@@ -1,12 +1,17 @@
 # backend/routes/categories.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header, Query, Response
 from pydantic import BaseModel
 from typing import List, Optional
 from backend.database import database, categories, threads, comments
+from backend.database.comment_tree import fetch_category_version
+from backend.database.writes import create_thread_with_root
 import logging
 import uuid  # Import UUID for generating unique thread IDs
 from backend.models import *
+from backend.services.retrieval_cache import retrieval_cache
+from backend.services.pagination import MAX_PAGE_SIZE, keyset_page, set_next_cursor, split_page
+from backend.services.conditional import etag_matches, make_etag, not_modified, set_etag
 
 router = APIRouter()
 
@@ -32,14 +37,26 @@ async def create_category(request: CategoryCreateRequest):
 
 
 @router.get("/categories", response_model=List[CategoryResponse])
-async def get_categories():
+async def get_categories(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     """
-    Retrieve all categories.
+    Retrieve all categories. Pass `limit` to page through them; the next
+    page's cursor is returned in the X-Next-Cursor header.
     """
     try:
         query = categories.select()
-        rows = await database.fetch_all(query)
+        if limit:
+            rows = await database.fetch_all(keyset_page(query, categories.c.id, limit, cursor))
+            rows, next_cursor = split_page(rows, limit)
+            set_next_cursor(response, next_cursor)
+        else:
+            rows = await database.fetch_all(query)
         return [CategoryResponse(id=row["id"], name=row["name"], description=row["description"]) for row in rows]
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logging.error(f"Error fetching categories: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve categories.")
@@ -47,30 +64,15 @@ async def get_categories():
 @router.post("/threads", response_model=ThreadResponse)
 async def create_thread(request: ThreadCreateRequest):
     try:
-        # Insert into the threads table
-        insert_thread_query = threads.insert().values(
-            title=request.title,  # Ensure 'title' is used
-            description=request.description,
-            category_id=request.category_id,
-            root_comment_id=None
-        )
-        thread_id = await database.execute(insert_thread_query)
-
-        # Create the root-level comment for the thread
-        root_comment_query = comments.insert().values(
-            thread_id=thread_id,
-            parent_id=None,
-            text="Root Comment",
-            flags=0,
-            approvals=0
+        # Insert the thread and its root comment in one transaction
+        thread, root_comment = await create_thread_with_root(
+            request.category_id, request.title, request.description
         )
-        root_comment_id = await database.execute(root_comment_query)
+        thread_id = thread["id"]
+        root_comment_id = root_comment["id"]
 
-        # Update the thread with the root comment ID
-        update_thread_query = threads.update().where(threads.c.id == thread_id).values(
-            root_comment_id=root_comment_id
-        )
-        await database.execute(update_thread_query)
+        # The new thread is searchable by keyword right away
+        retrieval_cache.invalidate()
 
         return ThreadResponse(
             id=thread_id,
@@ -86,10 +88,36 @@ async def create_thread(request: ThreadCreateRequest):
 
 
 @router.get("/categories/{category_id}/threads", response_model=List[ThreadResponse])
-async def get_threads(category_id: int):
+async def get_threads(
+    category_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    List a category's threads. Pass `limit` to page through them in id order;
+    the next page's cursor is returned in the X-Next-Cursor header.
+
+    The ETag changes whenever a thread of the category is created, edited,
+    moved or deleted; sending it back in If-None-Match returns 304 if nothing
+    changed.
+    """
     try:
+        version = await fetch_category_version(category_id)
+        if version is not None:
+            etag = make_etag("category", category_id, version)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            set_etag(response, etag)
+
         query = threads.select().where(threads.c.category_id == category_id)
-        rows = await database.fetch_all(query)
+        if limit:
+            rows = await database.fetch_all(keyset_page(query, threads.c.id, limit, cursor))
+            rows, next_cursor = split_page(rows, limit)
+            set_next_cursor(response, next_cursor)
+        else:
+            rows = await database.fetch_all(query)
 
         threads_list = [
             ThreadResponse(
@@ -103,6 +131,8 @@ async def get_threads(category_id: int):
         ]
 
         return threads_list
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logging.error(f"Error fetching threads: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve threads.")
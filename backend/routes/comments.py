@@ -1,10 +1,14 @@
 # backend/routes/comments.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional
 
 from backend.database import database, comments
+from backend.database.writes import delete_comment, update_comment
+from backend.dependencies import get_comment_indexer
+from backend.services.retrieval_cache import retrieval_cache
+from embeddings.indexing.incremental_indexer import IncrementalIndexer
 import logging
 
 router = APIRouter()
@@ -13,7 +17,11 @@ class CommentActionRequest(BaseModel):
     action: str  # 'hide' or 'delete'
 
 @router.post("/comments/{comment_id}/action")
-async def comment_action(comment_id: int, request: CommentActionRequest):
+async def comment_action(
+    comment_id: int,
+    request: CommentActionRequest,
+    comment_indexer: IncrementalIndexer = Depends(get_comment_indexer),
+):
     """
     Perform an action on a comment: hide or delete.
     """
@@ -21,22 +29,21 @@ async def comment_action(comment_id: int, request: CommentActionRequest):
         raise HTTPException(status_code=400, detail="Invalid action. Use 'hide' or 'delete'.")
     
     try:
-        # Check if comment exists
-        comment_query = comments.select().where(comments.c.id == comment_id)
-        comment = await database.fetch_one(comment_query)
-        if not comment:
-            raise HTTPException(status_code=404, detail="Comment not found.")
-        
         if request.action == "hide":
             # Update the 'hidden' flag
-            update_query = comments.update().where(comments.c.id == comment_id).values(hidden=1)
-            await database.execute(update_query)
+            if not await update_comment(comment_id, hidden=True):
+                raise HTTPException(status_code=404, detail="Comment not found.")
+            retrieval_cache.invalidate()
             return {"message": "Comment hidden successfully."}
         
         elif request.action == "delete":
             # Permanently delete the comment
-            delete_query = comments.delete().where(comments.c.id == comment_id)
-            await database.execute(delete_query)
+            if not await delete_comment(comment_id):
+                raise HTTPException(status_code=404, detail="Comment not found.")
+            # Drop its vectors in order with any pending re-embed
+            await comment_indexer.enqueue_delete(comment_id)
+            # Its text leaves keyword search right away
+            retrieval_cache.invalidate()
             return {"message": "Comment deleted successfully."}
     except HTTPException as he:
         raise he
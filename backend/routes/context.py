@@ -1,13 +1,19 @@
 # backend/routes/context.py
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
 from pydantic import BaseModel, Field
 from typing import Optional, List, TYPE_CHECKING
 
 from backend.services.context_service import retrieve_threads, save_conversation
 from backend.services.model_router import get_response
-from backend.dependencies import get_vector_db
+from backend.dependencies import get_vector_db, get_comment_indexer, get_retrieval_cache
+from backend.services.retrieval_cache import RetrievalCache
+from backend.services.thread_cache import thread_cache
+from backend.services.comment_serializer import RawJSONResponse, build_comment_tree, dumps
+from backend.services.conditional import etag_matches, make_etag, not_modified, set_etag
+from backend.services.pagination import MAX_PAGE_SIZE, keyset_page, set_next_cursor, split_page
 from embeddings.vector_db import VectorDB
+from embeddings.indexing.incremental_indexer import IncrementalIndexer
 
 from backend.services.feedback_service import log_feedback, get_feedback_summary
 from backend.models import *
@@ -15,6 +21,8 @@ from backend.models import *
 import logging
 
 from backend.database import database, comments  # Corrected import to include 'comments'
+from backend.database.comment_tree import fetch_comment_subtrees, fetch_thread_version
+from backend.database.writes import insert_comment
 
 # Initialize the router
 router = APIRouter()
@@ -29,12 +37,19 @@ if TYPE_CHECKING:
 @router.post("/retrieve-context")
 async def retrieve_context(
     request: RetrieveContextRequest,
-    vector_db: VectorDB = Depends(get_vector_db)
+    vector_db: VectorDB = Depends(get_vector_db),
+    retrieval_cache: RetrievalCache = Depends(get_retrieval_cache),
 ):
     """
     Retrieve relevant threads based on the query.
     """
     try:
+        cache_key = retrieval_cache.key(request.query, request.k, request.min_approvals, request.hide_flagged)
+        stamp = retrieval_cache.stamp(vector_db.generation)
+        cached = retrieval_cache.get(cache_key, stamp)
+        if cached is not None:
+            return {"results": cached}
+
         retrieved_threads = await retrieve_threads(
             vector_db,
             query=request.query,
@@ -42,6 +57,7 @@ async def retrieve_context(
             hide_flagged=request.hide_flagged,
             k=request.k
         )
+        retrieval_cache.put(cache_key, stamp, retrieved_threads)
         return {"results": retrieved_threads}
     except Exception as e:
         logging.error(f"Error in retrieve_context: {e}")
@@ -65,7 +81,11 @@ async def generate_response(request: GenerateResponseRequest):
         raise HTTPException(status_code=500, detail="Error generating response.")
 
 @router.post("/create-comment", response_model=CommentResponse)
-async def create_comment(request: CreateCommentRequest):
+async def create_comment(
+    request: CreateCommentRequest,
+    comment_indexer: IncrementalIndexer = Depends(get_comment_indexer),
+    retrieval_cache: RetrievalCache = Depends(get_retrieval_cache),
+):
     """
     Create a new comment, optionally as a reply to an existing comment.
     """
@@ -73,24 +93,13 @@ async def create_comment(request: CreateCommentRequest):
         logging.info(f"Creating comment in thread_id: {request.thread_id}, parent_id: {request.parent_id}")
 
         # Save the comment to the comments table
-        query = comments.insert().values(
-            thread_id=request.thread_id,
-            parent_id=request.parent_id,
-            text=request.text,
-            flags=0,
-            approvals=0
-        )
-        comment_id = await database.execute(query)
+        created_comment = await insert_comment(request.thread_id, request.parent_id, request.text)
+        comment_id = created_comment["id"]
         logging.info(f"Comment created with id: {comment_id}")
 
-        # Fetch the created comment
-        created_comment = await database.fetch_one(
-            comments.select().where(comments.c.id == comment_id)
-        )
-
-        if not created_comment:
-            logging.error("Failed to fetch the created comment.")
-            raise HTTPException(status_code=500, detail="Failed to create comment.")
+        # Embed the comment in the background; it is searchable by keyword right away
+        await comment_indexer.enqueue(comment_id, request.thread_id, request.text)
+        retrieval_cache.invalidate()
 
         # Initialize replies
         comment_response = CommentResponse(
@@ -110,44 +119,77 @@ async def create_comment(request: CreateCommentRequest):
         raise HTTPException(status_code=500, detail="Internal server error.")
 
 @router.get("/get-comments/{thread_id}", response_model=List[CommentResponse])
-async def get_comments(thread_id: int):
+async def get_comments(
+    thread_id: int,
+    parent_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Retrieve all comments for a thread in a nested structure.
+
+    With `parent_id` and/or `limit`, only the direct replies to `parent_id`
+    (top-level comments if omitted) are listed, one page at a time, each with
+    its full reply tree. The next page's cursor is returned in the
+    X-Next-Cursor header.
+
+    The ETag changes whenever a comment of the thread is written; sending it
+    back in If-None-Match returns 304 if nothing changed.
     """
     try:
         logging.info(f"Retrieving comments for thread_id: {thread_id}")
 
-        # Fetch all comments for the thread from the comments table
-        query = comments.select().where(comments.c.thread_id == thread_id).order_by(comments.c.id)
-        all_comments = await database.fetch_all(query)
-        logging.info(f"Fetched {len(all_comments)} comments from database.")
-
-        # Convert to a dictionary for easy access
-        comment_dict = {
-            comment["id"]: CommentResponse(
-                id=comment["id"],
-                thread_id=comment["thread_id"],
-                parent_id=comment["parent_id"],
-                text=comment["text"],
-                flags=comment["flags"],
-                approvals=comment["approvals"],
-                model_name=comment["model_name"],
-                replies=[]
-            ) for comment in all_comments
-        }
-
-        # Build the tree
-        root_comments = []
-        for comment in comment_dict.values():
-            if comment.parent_id:
-                parent = comment_dict.get(comment.parent_id)
-                if parent:
-                    parent.replies.append(comment)
+        version = await fetch_thread_version(thread_id)
+        etag = make_etag("thread", thread_id, version) if version is not None else None
+        if etag is not None and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        # The full tree is served from the cache while the thread's version is unchanged
+        full_tree = parent_id is None and limit is None
+        if full_tree and version is not None:
+            cached = thread_cache.get(thread_id, version)
+            if cached is not None:
+                cached_response = RawJSONResponse(cached)
+                set_etag(cached_response, etag)
+                return cached_response
+
+        if full_tree:
+            # Fetch all comments for the thread from the comments table
+            query = comments.select().where(comments.c.thread_id == thread_id).order_by(comments.c.id)
+            all_comments = await database.fetch_all(query)
+            root_ids = None
+        else:
+            # One page of the parent's direct replies, expanded into their subtrees
+            query = comments.select().where(
+                comments.c.thread_id == thread_id,
+                comments.c.parent_id == parent_id if parent_id is not None else comments.c.parent_id.is_(None),
+            )
+            if limit:
+                rows = await database.fetch_all(keyset_page(query, comments.c.id, limit, cursor))
+                rows, next_cursor = split_page(rows, limit)
             else:
-                root_comments.append(comment)
+                rows = await database.fetch_all(query.order_by(comments.c.id))
+            root_ids = [row["id"] for row in rows]
+            all_comments = await fetch_comment_subtrees(root_ids, thread_id)
+        logging.info(f"Fetched {len(all_comments)} comments from database.")
 
+        # Nest the rows as plain dicts and serialize them in one pass, skipping
+        # per-row CommentResponse validation
+        root_comments = build_comment_tree(all_comments, root_ids)
         logging.info(f"Built comment tree with {len(root_comments)} root comments.")
-        return root_comments
+        body = dumps(root_comments)
+        if full_tree and version is not None:
+            # Cached under the version read before loading, so a concurrent write makes it stale
+            thread_cache.put(thread_id, version, body)
+        tree_response = RawJSONResponse(body)
+        if etag is not None:
+            set_etag(tree_response, etag)
+        if not full_tree and limit:
+            set_next_cursor(tree_response, next_cursor)
+        return tree_response
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logging.error(f"Error retrieving comments: {e}")
         raise HTTPException(status_code=500, detail="Internal server error.")
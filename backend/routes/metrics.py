@@ -0,0 +1,35 @@
+# backend/routes/metrics.py
+
+from fastapi import APIRouter, Depends
+
+from backend.dependencies import get_comment_indexer, get_embedding_cache, get_retrieval_cache, get_thread_cache, get_vector_db
+from backend.services.feedback_service import feedback_accumulator
+from backend.services.retrieval_cache import RetrievalCache
+from backend.services.thread_cache import ThreadTreeCache
+from embeddings.embedding_cache import EmbeddingCache
+from embeddings.indexing.incremental_indexer import IncrementalIndexer
+from embeddings.vector_db import VectorDB
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics(
+    vector_db: VectorDB = Depends(get_vector_db),
+    embedding_cache: EmbeddingCache = Depends(get_embedding_cache),
+    comment_indexer: IncrementalIndexer = Depends(get_comment_indexer),
+    retrieval_cache: RetrievalCache = Depends(get_retrieval_cache),
+    thread_cache: ThreadTreeCache = Depends(get_thread_cache),
+):
+    """
+    Report runtime metrics for the retrieval pipeline.
+    """
+    return {
+        "vector_index": vector_db.stats(),
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "batch_encoder": vector_db.batch_encoder.stats() if vector_db.batch_encoder else None,
+        "comment_indexer": comment_indexer.stats(),
+        "retrieval_cache": retrieval_cache.stats(),
+        "thread_cache": thread_cache.stats(),
+        "feedback_write_behind": feedback_accumulator.stats() if feedback_accumulator else None,
+    }
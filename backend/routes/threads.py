@@ -1,12 +1,20 @@
 # backend/routes/threads.py
 
-from fastapi import APIRouter, HTTPException, Depends, Query
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from pydantic import BaseModel, Field, ValidationError
 from typing import List, Optional
 from backend.database import database, threads, comments, embedding_mapping
+from backend.database.comment_tree import fetch_comment_chain, fetch_thread_version
+from backend.database.writes import insert_comment, update_comment
 from backend.services.model_router import get_response
 from backend.services.summarization_service import summarize_text_chain
 from backend.routes.context import CreateCommentRequest
+from backend.dependencies import get_comment_indexer
+from backend.services.pagination import MAX_PAGE_SIZE, keyset_page, set_next_cursor, split_page
+from backend.services.bulk_import import NDJSON_MEDIA_TYPE, import_comments, parse_ndjson, plan_lines, plan_tree
+from backend.services.retrieval_cache import retrieval_cache
+from backend.services.conditional import etag_matches, make_etag, not_modified, set_etag
+from embeddings.indexing.incremental_indexer import IncrementalIndexer
 import logging
 import asyncio
 from backend.models import *
@@ -36,10 +44,35 @@ async def get_thread(thread_id: int):
 
 
 @router.get("/threads/{thread_id}/comments", response_model=List[CommentResponse])
-async def get_comments(thread_id: str):
+async def get_comments(
+    thread_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    List a thread's comments in creation order. Pass `limit` to page through
+    them; the next page's cursor is returned in the X-Next-Cursor header.
+
+    The ETag changes whenever a comment of the thread is written; sending it
+    back in If-None-Match returns 304 if nothing changed.
+    """
     try:
-        query = comments.select().where(comments.c.thread_id == thread_id).order_by(comments.c.id)
-        rows = await database.fetch_all(query)
+        version = await fetch_thread_version(thread_id)
+        if version is not None:
+            etag = make_etag("thread", thread_id, version)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            set_etag(response, etag)
+
+        query = comments.select().where(comments.c.thread_id == thread_id)
+        if limit:
+            rows = await database.fetch_all(keyset_page(query, comments.c.id, limit, cursor))
+            rows, next_cursor = split_page(rows, limit)
+            set_next_cursor(response, next_cursor)
+        else:
+            rows = await database.fetch_all(query.order_by(comments.c.id))
         return [
             CommentResponse(
                 id=row["id"],
@@ -52,6 +85,8 @@ async def get_comments(thread_id: str):
             )
             for row in rows
         ]
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logging.error(f"Error fetching comments for thread {thread_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve comments.")
@@ -60,27 +95,22 @@ async def get_comments(thread_id: str):
 
 
 @router.post("/threads/{thread_id}/comments", response_model=CommentResponse)
-async def create_comment(thread_id: int, request: CommentCreateRequest):
+async def create_comment(
+    thread_id: int,
+    request: CommentCreateRequest,
+    comment_indexer: IncrementalIndexer = Depends(get_comment_indexer),
+):
     try:
-        # Verify that the thread exists
-        thread_query = threads.select().where(threads.c.id == thread_id)
-        thread = await database.fetch_one(thread_query)
-        if not thread:
+        # Insert the comment if the thread exists, in one statement
+        created_comment = await insert_comment(thread_id, request.parent_id, request.text, require_thread=True)
+        if not created_comment:
             logging.error(f"Thread with id {thread_id} not found.")
             raise HTTPException(status_code=404, detail="Thread not found.")
+        comment_id = created_comment["id"]
 
-        # Insert the comment
-        insert_query = comments.insert().values(
-            thread_id=thread_id,
-            parent_id=request.parent_id,
-            text=request.text,
-            flags=0,
-            approvals=0
-        )
-        comment_id = await database.execute(insert_query)
-
-        # Fetch the created comment
-        created_comment = await database.fetch_one(comments.select().where(comments.c.id == comment_id))
+        # Embed the comment in the background; it is searchable by keyword right away
+        await comment_indexer.enqueue(comment_id, thread_id, request.text)
+        retrieval_cache.invalidate()
 
         return CommentResponse(
             id=created_comment["id"],
@@ -91,24 +121,64 @@ async def create_comment(thread_id: int, request: CommentCreateRequest):
             approvals=created_comment["approvals"],
             model_name=created_comment["model_name"]
         )
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logging.error(f"Error creating comment in thread {thread_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to create comment.")
 
 
+@router.post("/threads/{thread_id}/comments/bulk", response_model=BulkImportResponse)
+async def bulk_import_comments(
+    thread_id: int,
+    request: Request,
+    comment_indexer: IncrementalIndexer = Depends(get_comment_indexer),
+):
+    """
+    Import many comments into a thread in one transaction.
+
+    The body is either a BulkImportRequest (a nested tree of comments), or,
+    with Content-Type application/x-ndjson, one BulkCommentLine per line.
+    Returns the real id of every comment that was given a temp_id.
+    """
+    try:
+        if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+            plan = plan_lines(await parse_ndjson(request.stream()))
+        else:
+            try:
+                body = BulkImportRequest(**await request.json())
+            except RecursionError:
+                raise HTTPException(status_code=422, detail="Comment tree is nested too deeply; send it as NDJSON.")
+            except (ValueError, TypeError, ValidationError) as e:
+                raise HTTPException(status_code=422, detail=str(e))
+            plan = plan_tree(body.comments, body.parent_id)
+
+        result = await import_comments(thread_id, plan)
+
+        # Embed the comments in the background, without waiting for queue space
+        comment_indexer.enqueue_ids(result["ids"])
+        # Imported comments are searchable by keyword right away
+        retrieval_cache.invalidate()
+
+        logging.info(f"Imported {len(plan)} comments into thread {thread_id}.")
+        return BulkImportResponse(thread_id=thread_id, created=len(plan), id_map=result["id_map"])
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logging.error(f"Error importing comments into thread {thread_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to import comments.")
+
+
 @router.put("/comments/{comment_id}/overwrite", response_model=CommentResponse)
-async def overwrite_comment(comment_id: int, request: CreateCommentRequest):
+async def overwrite_comment(
+    comment_id: int,
+    request: CreateCommentRequest,
+    comment_indexer: IncrementalIndexer = Depends(get_comment_indexer),
+):
     """
     Overwrite an existing comment's text, flags, and other metadata.
     """
     try:
-        # Verify that the comment exists
-        comment_query = comments.select().where(comments.c.id == comment_id)
-        existing_comment = await database.fetch_one(comment_query)
-        if not existing_comment:
-            logging.error(f"Comment with id {comment_id} not found.")
-            raise HTTPException(status_code=404, detail="Comment not found.")
-
         # Update the comment with provided fields
         update_values = {"text": request.text}
         if request.flags is not None:
@@ -116,11 +186,14 @@ async def overwrite_comment(comment_id: int, request: CreateCommentRequest):
         if request.model_name is not None:
             update_values["model_name"] = request.model_name
 
-        update_query = comments.update().where(comments.c.id == comment_id).values(**update_values)
-        await database.execute(update_query)
+        updated_comment = await update_comment(comment_id, **update_values)
+        if not updated_comment:
+            logging.error(f"Comment with id {comment_id} not found.")
+            raise HTTPException(status_code=404, detail="Comment not found.")
 
-        # Fetch the updated comment
-        updated_comment = await database.fetch_one(comments.select().where(comments.c.id == comment_id))
+        # Re-embed the new text in the background; it is searchable by keyword right away
+        await comment_indexer.enqueue(comment_id, updated_comment["thread_id"], request.text)
+        retrieval_cache.invalidate()
 
         return CommentResponse(
             id=updated_comment["id"],
@@ -148,7 +221,8 @@ async def generate_response(
     thread_id: int,
     request: GenerateResponseRequest,
     request_comment_id: Optional[int] = Query(None, alias="request_comment_id"),
-    parent_comment_id: int = Query(..., alias="parent_comment_id")
+    parent_comment_id: int = Query(..., alias="parent_comment_id"),
+    comment_indexer: IncrementalIndexer = Depends(get_comment_indexer),
 ): 
     """
     Generate an AI response for a specific thread or comment, utilizing summarization to manage context length.
@@ -186,17 +260,17 @@ async def generate_response(
 
         if request_comment_id:
             # Overwrite the placeholder comment
-            update_query = comments.update().where(comments.c.id == request_comment_id).values(
+            updated_comment = await update_comment(
+                request_comment_id,
                 text=response_text,
                 flags=1,  # Indicating AI-generated
                 model_name=request.model_name
             )
-            await database.execute(update_query)
-
-            # Fetch the updated comment
-            updated_comment = await database.fetch_one(
-                comments.select().where(comments.c.id == request_comment_id)
-            )
+            if not updated_comment:
+                logging.error(f"Comment with id {request_comment_id} not found.")
+                raise HTTPException(status_code=404, detail="Comment not found.")
+            await comment_indexer.enqueue(request_comment_id, thread_id, response_text)
+            retrieval_cache.invalidate()
 
             return CommentResponse(
                 id=updated_comment["id"],
@@ -210,19 +284,15 @@ async def generate_response(
                             )
         else:
             # Create a new comment
-            insert_query = comments.insert().values(
-                thread_id=thread_id,
-                parent_id=parent_comment_id,
-                text=response_text,
+            ai_comment = await insert_comment(
+                thread_id,
+                parent_comment_id,
+                response_text,
                 flags=1,  # Indicates AI-generated comment
-                approvals=0,
                 model_name=request.model_name,
-                hidden=False
             )
-            ai_comment_id = await database.execute(insert_query)
-
-            # Fetch the new comment
-            ai_comment = await database.fetch_one(comments.select().where(comments.c.id == ai_comment_id))
+            await comment_indexer.enqueue(ai_comment["id"], thread_id, response_text)
+            retrieval_cache.invalidate()
 
             return CommentResponse(
                 id=ai_comment["id"],
@@ -240,27 +310,3 @@ async def generate_response(
     except Exception as e:
         logging.error(f"Error generating AI response for thread {thread_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to generate AI response.")
-
-
-async def fetch_comment_chain(comment_id: int, thread_id: int):
-    """
-    Recursively fetches the entire chain of comments leading to the given comment_id.
-    """
-    comment_chain = []
-    current_comment_id = comment_id
-
-    while current_comment_id:
-        query = comments.select().where(
-            comments.c.id == current_comment_id,
-            comments.c.thread_id == thread_id
-        )
-        comment = await database.fetch_one(query)
-        if not comment:
-            break
-
-        # Insert at the beginning to maintain chronological order
-        comment_chain.insert(0, comment)
-        current_comment_id = comment["parent_id"]
-
-    return comment_chain
-
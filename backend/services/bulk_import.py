@@ -0,0 +1,203 @@
+# backend/services/bulk_import.py
+
+"""
+Bulk Comment Import
+
+This module loads a whole conversation into a thread in one request instead of
+one POST per comment. The input is either a nested tree of comments or an
+NDJSON stream of comments that reference earlier lines by a client-side
+`temp_id`. Both are first flattened into a plan in parent-before-child order,
+then written in one transaction:
+
+1. Comment ids are allocated up front from MAX(id). The transaction holds
+   SQLite's write lock, so no other insert can take them.
+2. Client-side parent references are resolved to the allocated ids.
+3. All rows are inserted with a single executemany. Parents are inserted
+   before their replies, so the path trigger finds each parent's path.
+"""
+
+import json
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Optional
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import func, select
+
+from backend.config import BULK_IMPORT_MAX_COMMENTS
+from backend.database import database, comments, threads
+from backend.models import BulkCommentLine, BulkCommentNode
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class PlannedComment(NamedTuple):
+    temp_id: Optional[str]
+    # Position of the parent in the plan, or None for an existing parent / top level
+    parent_index: Optional[int]
+    parent_id: Optional[int]
+    text: str
+    flags: int
+    approvals: int
+    model_name: Optional[str]
+
+
+def _check_size(n_comments: int):
+    if n_comments > BULK_IMPORT_MAX_COMMENTS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {BULK_IMPORT_MAX_COMMENTS} comments can be imported at once."
+        )
+
+
+def _register(seen: Dict[str, int], temp_id: Optional[str], index: int):
+    if temp_id is None:
+        return
+    if temp_id in seen:
+        raise HTTPException(status_code=400, detail=f"Duplicate temp_id {temp_id!r}.")
+    seen[temp_id] = index
+
+
+def plan_tree(nodes: List[BulkCommentNode], parent_id: Optional[int] = None) -> List[PlannedComment]:
+    """
+    Flatten a nested comment tree, parents first.
+
+    Args:
+        nodes (List[BulkCommentNode]): Top-level comments with their replies.
+        parent_id (Optional[int]): Existing comment the top-level comments reply to.
+
+    Returns:
+        List[PlannedComment]: Comments in depth-first order.
+    """
+    plan: List[PlannedComment] = []
+    seen: Dict[str, int] = {}
+    # Iterative, so deep reply chains do not hit the recursion limit
+    stack = [(node, None) for node in reversed(nodes)]
+    while stack:
+        node, parent_index = stack.pop()
+        index = len(plan)
+        _register(seen, node.temp_id, index)
+        plan.append(PlannedComment(
+            node.temp_id,
+            parent_index,
+            parent_id if parent_index is None else None,
+            node.text,
+            node.flags,
+            node.approvals,
+            node.model_name,
+        ))
+        _check_size(len(plan))
+        stack.extend((reply, index) for reply in reversed(node.replies))
+    return plan
+
+
+def plan_lines(lines: Iterable[BulkCommentLine]) -> List[PlannedComment]:
+    """
+    Resolve the parent_temp_id of each NDJSON line to the position of an earlier line.
+
+    Returns:
+        List[PlannedComment]: Comments in input order.
+    """
+    plan: List[PlannedComment] = []
+    seen: Dict[str, int] = {}
+    for line in lines:
+        parent_index = None
+        if line.parent_temp_id is not None:
+            if line.parent_temp_id not in seen:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Line {len(plan) + 1}: parent_temp_id {line.parent_temp_id!r} does not refer to an earlier line.",
+                )
+            parent_index = seen[line.parent_temp_id]
+        _register(seen, line.temp_id, len(plan))
+        plan.append(PlannedComment(
+            line.temp_id,
+            parent_index,
+            line.parent_id if parent_index is None else None,
+            line.text,
+            line.flags,
+            line.approvals,
+            line.model_name,
+        ))
+        _check_size(len(plan))
+    return plan
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> List[BulkCommentLine]:
+    """
+    Parse an NDJSON request body as it streams in. Blank lines are skipped.
+
+    Raises:
+        HTTPException: 422 naming the first malformed line.
+    """
+    lines: List[BulkCommentLine] = []
+    buffer = b""
+    number = 0
+
+    def parse(raw: bytes):
+        nonlocal number
+        number += 1
+        if not raw.strip():
+            return
+        try:
+            lines.append(BulkCommentLine(**json.loads(raw)))
+        except (ValueError, TypeError, ValidationError) as e:
+            raise HTTPException(status_code=422, detail=f"Line {number}: {e}")
+        _check_size(len(lines))
+
+    async for chunk in chunks:
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for raw in complete:
+            parse(raw)
+    parse(buffer)
+    return lines
+
+
+async def import_comments(thread_id: int, plan: List[PlannedComment]) -> Dict:
+    """
+    Insert planned comments into a thread in one transaction.
+
+    Args:
+        thread_id (int): Thread to import into.
+        plan (List[PlannedComment]): Output of plan_tree or plan_lines.
+
+    Returns:
+        Dict: {"ids": comment id per planned comment, "id_map": temp_id -> comment id}.
+
+    Raises:
+        HTTPException: 404 if the thread does not exist, 400 if an existing
+            parent_id is not a comment of the thread.
+    """
+    existing_parents = {comment.parent_id for comment in plan if comment.parent_id is not None}
+    async with database.transaction():
+        if await database.fetch_one(select(threads.c.id).where(threads.c.id == thread_id)) is None:
+            raise HTTPException(status_code=404, detail="Thread not found.")
+        if existing_parents:
+            rows = await database.fetch_all(
+                select(comments.c.id).where(comments.c.id.in_(existing_parents), comments.c.thread_id == thread_id)
+            )
+            unknown = existing_parents - {row["id"] for row in rows}
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Parent comments not in thread {thread_id}: {sorted(unknown)}.")
+
+        first_id = (await database.fetch_val(select(func.coalesce(func.max(comments.c.id), 0)))) + 1
+        ids = list(range(first_id, first_id + len(plan)))
+        await database.execute_many(
+            comments.insert(),
+            [
+                {
+                    "id": comment_id,
+                    "thread_id": thread_id,
+                    "parent_id": ids[comment.parent_index] if comment.parent_index is not None else comment.parent_id,
+                    "text": comment.text,
+                    "flags": comment.flags,
+                    "approvals": comment.approvals,
+                    "model_name": comment.model_name,
+                    "hidden": False,
+                }
+                for comment_id, comment in zip(ids, plan)
+            ],
+        )
+    return {
+        "ids": ids,
+        "id_map": {comment.temp_id: comment_id for comment_id, comment in zip(ids, plan) if comment.temp_id is not None},
+    }
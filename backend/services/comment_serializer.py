@@ -0,0 +1,91 @@
+# backend/services/comment_serializer.py
+
+"""
+Comment Tree Serializer
+
+This module turns comment rows straight into the JSON of a nested comment
+tree, without building and validating a CommentResponse per row. The output
+has the CommentResponse schema (same fields, same order) and is byte-for-byte
+what FastAPI would render for the equivalent models.
+
+orjson is used when it is installed; otherwise the standard json module, with
+the same compact, non-ASCII-escaping output as FastAPI's JSONResponse.
+"""
+
+import json
+from typing import Dict, List, Optional, Sequence
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    """
+    Serialize to compact UTF-8 JSON.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content)
+        except orjson.JSONEncodeError:
+            # orjson stops at 255 levels of nesting; long reply chains go through json
+            pass
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class RawJSONResponse(Response):
+    """
+    Response for an already serialized JSON body. Dicts and lists are
+    serialized with dumps().
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def build_comment_tree(rows: Sequence, root_ids: Optional[List[int]] = None) -> List[Dict]:
+    """
+    Nest comment rows into CommentResponse-shaped dicts.
+
+    Args:
+        rows (Sequence): Comment rows; replies keep the order of `rows`.
+        root_ids (Optional[List[int]]): Comments to return as the roots, in this
+            order (e.g. one page). If None, every comment without a parent in
+            `rows` is a root.
+
+    Returns:
+        List[Dict]: The root comments, with their replies nested under "replies".
+    """
+    nodes: Dict[int, Dict] = {
+        row["id"]: {
+            "id": row["id"],
+            "thread_id": row["thread_id"],
+            "parent_id": row["parent_id"],
+            "text": row["text"],
+            "flags": row["flags"] or 0,
+            "approvals": row["approvals"] or 0,
+            "model_name": row["model_name"],
+            "replies": [],
+        }
+        for row in rows
+    }
+    # A page's roots are its listed comments, even if their parent is in `rows`
+    page_ids = set(root_ids) if root_ids is not None else ()
+    roots: List[Dict] = []
+    for node in nodes.values():
+        parent_id = node["parent_id"]
+        if parent_id and node["id"] not in page_ids:
+            parent = nodes.get(parent_id)
+            if parent is not None:
+                parent["replies"].append(node)
+        elif root_ids is None:
+            roots.append(node)
+    if root_ids is not None:
+        roots = [nodes[comment_id] for comment_id in root_ids if comment_id in nodes]
+    return roots
@@ -0,0 +1,64 @@
+# backend/services/conditional.py
+
+"""
+Conditional GET
+
+Thread comment lists and category thread lists carry an ETag built from a
+version counter that database triggers bump on every write:
+
+- threads.version: any insert, update or delete of the thread's comments.
+- categories.version: any thread created in, moved into or out of, edited in
+  or deleted from the category.
+
+A client that sends the ETag back in If-None-Match gets 304 Not Modified from
+a single primary-key lookup, without the rows being read. The version is read
+before the rows, so a write racing with the request can only make the ETag
+older than the body, and the next request refetches.
+
+Responses also carry `Cache-Control: no-cache`, so browsers revalidate instead
+of serving a stale list from their cache.
+"""
+
+from typing import Optional
+
+from fastapi import Response
+
+ETAG_HEADER = "ETag"
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(kind: str, resource_id: int, version: int) -> str:
+    """
+    Weak ETag of a resource at a version, e.g. W/"thread-12-v7".
+    """
+    return f'W/"{kind}-{resource_id}-v{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag (weak comparison).
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.removeprefix("W/") == opaque for candidate in candidates)
+
+
+def set_etag(response: Response, etag: str):
+    """
+    Attach the ETag and revalidation policy to a response.
+    """
+    response.headers[ETAG_HEADER] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Empty 304 response for a client whose copy is current.
+    """
+    response = Response(status_code=304)
+    set_etag(response, etag)
+    return response
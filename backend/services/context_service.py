@@ -1,8 +1,11 @@
 # backend/services/context_service.py
 
+import asyncio
 from typing import List, Dict
+from backend.config import HYBRID_RETRIEVAL_ENABLED
 from backend.database import database, threads
-from embeddings.retrieval.context_retrieval import retrieve_relevant_threads
+from embeddings.retrieval.context_retrieval import retrieve_relevant_threads, reciprocal_rank_scores
+from embeddings.retrieval.lexical_retrieval import search_lexical
 from embeddings.vector_db import VectorDB
 import json
 
@@ -10,20 +13,45 @@ async def retrieve_threads(vector_db: VectorDB, query: str, min_approvals: int,
     """
     Retrieves relevant threads based on query and filters.
 
+    Vector search and FTS5 lexical search run concurrently, and their rankings
+    are merged with reciprocal-rank fusion.
+
     Args:
         vector_db (VectorDB): The VectorDB instance for searching.
         query (str): User's input query.
         min_approvals (int): Minimum approval count for a context to be included.
         hide_flagged (bool): Exclude flagged threads if True.
-        k (int): Number of top results to retrieve from embeddings.
+        k (int): Number of results to return; filters are applied inside the search,
+            so up to k qualifying threads are returned.
 
     Returns:
-        List[Dict]: Filtered and sorted threads.
+        List[Dict]: Filtered threads in fused order, ties broken by approvals - flags.
     """
-    # Step 1: Retrieve relevant threads using embeddings with feedback adjustments
-    relevant_threads = await retrieve_relevant_threads(vector_db, query, k)
+    # Step 1: Retrieve relevant threads that pass the feedback filters, by
+    # embeddings and (concurrently) by keywords
+    if HYBRID_RETRIEVAL_ENABLED:
+        vector_threads, lexical_hits = await asyncio.gather(
+            retrieve_relevant_threads(vector_db, query, k, min_approvals=min_approvals, hide_flagged=hide_flagged),
+            search_lexical(query, k, min_approvals=min_approvals, hide_flagged=hide_flagged),
+        )
+    else:
+        vector_threads = await retrieve_relevant_threads(
+            vector_db, query, k, min_approvals=min_approvals, hide_flagged=hide_flagged
+        )
+        lexical_hits = []
+
+    # Merge both rankings, hydrating lexical-only hits in one query
+    by_id = {context["thread_id"]: context for context in vector_threads}
+    fused_scores = reciprocal_rank_scores([list(by_id), [thread_id for thread_id, _ in lexical_hits]])
+    fused_ids = sorted(fused_scores, key=lambda thread_id: fused_scores[thread_id], reverse=True)[:k]
+    missing = [thread_id for thread_id in fused_ids if thread_id not in by_id]
+    if missing:
+        metadata = await vector_db.fetch_thread_metadata(missing)
+        for thread_id, thread in metadata.items():
+            by_id[thread_id] = {"thread_id": thread_id, **thread}
+    relevant_threads = [by_id[thread_id] for thread_id in fused_ids if thread_id in by_id]
 
-    # Step 2: Apply additional filters based on min_approvals and hide_flagged
+    # Step 2: Re-check the filters (feedback can change while searching)
     filtered_threads = []
     for context in relevant_threads:
         flags = context["flags"]
@@ -42,8 +70,8 @@ async def retrieve_threads(vector_db: VectorDB, query: str, min_approvals: int,
             "approvals": approvals,
         })
 
-    # Step 3: Sort the filtered threads by net score (approvals - flags)
-    filtered_threads.sort(key=lambda x: x["approvals"] - x["flags"], reverse=True)
+    # Step 3: Keep the fused order; net score (approvals - flags) only breaks ties
+    filtered_threads.sort(key=lambda x: (fused_scores[x["thread_id"]], x["approvals"] - x["flags"]), reverse=True)
 
     return filtered_threads
 
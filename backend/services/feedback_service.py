@@ -2,10 +2,261 @@
 Feedback Service
 
 This module contains the business logic for logging and retrieving feedback on threads.
+
+Votes are counters, so they are written with one atomic upsert
+(`INSERT ... ON CONFLICT DO UPDATE SET flags = flags + excluded.flags`) rather
+than read-modify-write; concurrent votes on the same context cannot overwrite
+each other.
+
+With FEEDBACK_WRITE_BEHIND_ENABLED, votes are summed per context in a
+FeedbackAccumulator and written in batches instead:
+
+- Durability: a vote is acknowledged once it is in memory. Votes not yet
+  flushed (at most FEEDBACK_FLUSH_INTERVAL_MS or FEEDBACK_FLUSH_MAX_EVENTS
+  worth) are lost if the process crashes; a clean shutdown flushes them.
+- Ordering: increments commute, so batching only changes when a vote reaches
+  the table, never the totals. Each flush is one transaction, so readers see
+  all of a batch or none of it. A failed flush keeps its votes for the next one.
+- Visibility: the feedback snapshot used by retrieval is updated on every vote,
+  so retrieval does not wait for the flush. Readers of the feedback table
+  (get_feedback_summary flushes first) see votes after the flush.
 """
 
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..config import FEEDBACK_WRITE_BEHIND_ENABLED, FEEDBACK_FLUSH_INTERVAL_MS, FEEDBACK_FLUSH_MAX_EVENTS
 from ..database import database
 from ..database.__init__ import feedback
+from .retrieval_cache import retrieval_cache
+
+# (flags, approvals) added by each action
+FEEDBACK_ACTIONS: Dict[str, Tuple[int, int]] = {"flag": (1, 0), "approve": (0, 1)}
+
+
+class FeedbackSnapshot:
+    """
+    In-memory copy of the feedback table, keyed by context_id.
+
+    Retrieval reads flags/approvals from here instead of joining the feedback
+    table on every search. It is loaded once at startup and kept current by
+    log_feedback, so it only reflects votes logged by this process.
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, Tuple[int, int]] = {}
+        self.loaded = False
+
+    async def load(self):
+        """
+        Load all feedback rows from the database.
+        """
+        rows = await database.fetch_all(feedback.select())
+        self.counts = {
+            row["context_id"]: (row["flags"] or 0, row["approvals"] or 0)
+            for row in rows
+        }
+        self.loaded = True
+
+    def get(self, context_id: str) -> Tuple[int, int]:
+        """
+        Return (flags, approvals) for a context, or (0, 0) if it has no feedback.
+        """
+        return self.counts.get(str(context_id), (0, 0))
+
+    def apply(self, context_id: str, action: str):
+        """
+        Record a single flag or approval. No-op until the snapshot is loaded.
+        """
+        self.apply_delta(context_id, *FEEDBACK_ACTIONS.get(action, (0, 0)))
+
+    def apply_delta(self, context_id: str, flags: int, approvals: int):
+        """
+        Add to the counts of a context. No-op until the snapshot is loaded.
+        """
+        if not self.loaded:
+            return
+        current_flags, current_approvals = self.get(context_id)
+        self.counts[str(context_id)] = (current_flags + flags, current_approvals + approvals)
+
+
+feedback_snapshot = FeedbackSnapshot()
+
+
+def feedback_upsert_statement():
+    """
+    INSERT of a context's (flags, approvals) that adds to the existing counters
+    on conflict, so each row update is a single atomic statement.
+    """
+    statement = sqlite_insert(feedback)
+    return statement.on_conflict_do_update(
+        index_elements=[feedback.c.context_id],
+        set_={
+            "flags": func.coalesce(feedback.c.flags, 0) + statement.excluded.flags,
+            "approvals": func.coalesce(feedback.c.approvals, 0) + statement.excluded.approvals,
+        },
+    )
+
+
+async def upsert_feedback_deltas(deltas: Dict[str, Tuple[int, int]]):
+    """
+    Add (flags, approvals) to each context's counters in one transaction,
+    creating rows for contexts that have no feedback yet.
+
+    Args:
+        deltas (Dict[str, Tuple[int, int]]): (flags, approvals) to add, by context_id.
+    """
+    if not deltas:
+        return
+    values = [
+        {"context_id": str(context_id), "flags": flags, "approvals": approvals}
+        for context_id, (flags, approvals) in deltas.items()
+    ]
+    async with database.transaction():
+        await database.execute_many(feedback_upsert_statement(), values)
+
+
+class FeedbackAccumulator:
+    """
+    Write-behind buffer for feedback votes. See the module docstring for its
+    durability and ordering guarantees.
+    """
+
+    def __init__(
+        self,
+        snapshot: FeedbackSnapshot,
+        flush_interval_ms: float = 500.0,
+        max_events: int = 100,
+        write: Callable[[Dict[str, Tuple[int, int]]], Awaitable[None]] = upsert_feedback_deltas,
+    ):
+        """
+        Args:
+            snapshot (FeedbackSnapshot): Snapshot updated on every vote.
+            flush_interval_ms (float): Longest time a vote waits before it is written.
+            max_events (int): Pending votes that trigger an early flush.
+            write (Callable): Writes one batch of deltas; upsert_feedback_deltas by default.
+        """
+        self.snapshot = snapshot
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_events = max_events
+        self.write = write
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        self._pending_events = 0
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.events = 0
+        self.flushed_events = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+    async def start(self):
+        """
+        Start the periodic flush worker.
+        """
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._worker = asyncio.create_task(self._run())
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    def add(self, context_id: str, action: str):
+        """
+        Record a vote in memory and in the snapshot. Requests a flush once
+        max_events votes are pending.
+        """
+        flags, approvals = FEEDBACK_ACTIONS[action]
+        self._merge({str(context_id): (flags, approvals)}, 1)
+        self.snapshot.apply_delta(context_id, flags, approvals)
+        self.events += 1
+        if self._pending_events >= self.max_events and self._flush_requested is not None:
+            self._flush_requested.set()
+
+    def _merge(self, deltas: Dict[str, Tuple[int, int]], events: int):
+        for context_id, (flags, approvals) in deltas.items():
+            pending_flags, pending_approvals = self._pending.get(context_id, (0, 0))
+            self._pending[context_id] = (pending_flags + flags, pending_approvals + approvals)
+        self._pending_events += events
+
+    async def _run(self):
+        """
+        Flush every flush_interval, or earlier when add() asks for it.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Flushing feedback failed, will retry: {e}")
+
+    async def flush(self):
+        """
+        Write all pending votes in one transaction. On failure they are put
+        back, merged with votes that arrived meanwhile, and the error is raised.
+        """
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            self._flush_requested.clear()
+            if not self._pending:
+                return
+            deltas, events = self._pending, self._pending_events
+            self._pending, self._pending_events = {}, 0
+            try:
+                await self.write(deltas)
+            except Exception:
+                self.failed_flushes += 1
+                self._merge(deltas, events)
+                raise
+            self.flushes += 1
+            self.flushed_events += events
+        # Searches without the snapshot read the table, which just changed
+        retrieval_cache.invalidate()
+
+    async def stop(self):
+        """
+        Stop the worker and flush what is pending.
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        await self.flush()
+
+    def stats(self) -> Dict:
+        """
+        Pending and flushed vote counts.
+        """
+        return {
+            "pending_events": self._pending_events,
+            "pending_contexts": len(self._pending),
+            "events": self.events,
+            "flushed_events": self.flushed_events,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+# Only used when write-behind is enabled; started and stopped by main.py
+feedback_accumulator = (
+    FeedbackAccumulator(feedback_snapshot, FEEDBACK_FLUSH_INTERVAL_MS, FEEDBACK_FLUSH_MAX_EVENTS)
+    if FEEDBACK_WRITE_BEHIND_ENABLED
+    else None
+)
+
 
 async def log_feedback(context_id: str, action: str) -> bool:
     """
@@ -19,32 +270,14 @@ async def log_feedback(context_id: str, action: str) -> bool:
         bool: True if successful, False otherwise.
     """
     try:
-        # Check if feedback record exists
-        record = await database.fetch_one(
-            query=feedback.select().where(feedback.c.context_id == context_id)
-        )
-        
-        if record:
-            if action == "flag":
-                new_flags = record["flags"] + 1
-                await database.execute(
-                    feedback.update().where(feedback.c.context_id == context_id).values(flags=new_flags)
-                )
-            elif action == "approve":
-                new_approvals = record["approvals"] + 1
-                await database.execute(
-                    feedback.update().where(feedback.c.context_id == context_id).values(approvals=new_approvals)
-                )
+        if feedback_accumulator is not None and feedback_accumulator.running:
+            feedback_accumulator.add(context_id, action)
         else:
-            # Insert new feedback record
-            if action == "flag":
-                await database.execute(
-                    feedback.insert().values(context_id=context_id, flags=1, approvals=0)
-                )
-            elif action == "approve":
-                await database.execute(
-                    feedback.insert().values(context_id=context_id, flags=0, approvals=1)
-                )
+            flags, approvals = FEEDBACK_ACTIONS[action]
+            await upsert_feedback_deltas({context_id: (flags, approvals)})
+            feedback_snapshot.apply(context_id, action)
+        # Cached retrievals carry the old counts and may no longer pass the filters
+        retrieval_cache.invalidate()
         return True
     except Exception as e:
         print(f"Error logging feedback: {e}")
@@ -58,6 +291,9 @@ async def get_feedback_summary() -> dict:
         dict: Total flags and approvals.
     """
     try:
+        # Include votes still held by the write-behind accumulator
+        if feedback_accumulator is not None:
+            await feedback_accumulator.flush()
         total_flags = await database.fetch_val("SELECT SUM(flags) FROM feedback")
         total_approvals = await database.fetch_val("SELECT SUM(approvals) FROM feedback")
         return {
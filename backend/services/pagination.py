@@ -0,0 +1,95 @@
+# backend/services/pagination.py
+
+"""
+Keyset Pagination
+
+List endpoints page by key instead of by offset: a page is "the next `limit`
+rows after the last id the client saw", which the (parent, id) indexes answer
+with one seek no matter how deep into the result set the page is.
+
+Pagination is opt-in. When a request passes `limit`, the response body is the
+page and the cursor for the next page is returned in the X-Next-Cursor header
+(absent on the last page), so existing clients keep getting full lists.
+"""
+
+import base64
+import json
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Column
+from sqlalchemy.sql import Select
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Largest page a client can ask for
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Opaque cursor pointing just past the row with the given id.
+    """
+    payload = json.dumps({"after": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Id a cursor points past, or None for the first page.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["after"]
+        if not isinstance(after, int):
+            raise ValueError(after)
+        return after
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def keyset_page(query: Select, key: Column, limit: int, cursor: Optional[str]) -> Select:
+    """
+    Restrict a query to one page ordered by `key`.
+
+    One row more than `limit` is fetched so split_page can tell whether a next
+    page exists without a COUNT.
+
+    Args:
+        query (Select): Query with the endpoint's filters applied.
+        key (Column): Unique, indexed sort key (the table's id).
+        limit (int): Page size.
+        cursor (Optional[str]): Cursor from the previous page's X-Next-Cursor header.
+
+    Returns:
+        Select: The paged query.
+    """
+    after = decode_cursor(cursor)
+    if after is not None:
+        query = query.where(key > after)
+    return query.order_by(key).limit(limit + 1)
+
+
+def split_page(rows: Sequence, limit: int, key: str = "id") -> Tuple[List, Optional[str]]:
+    """
+    Split the rows of a keyset_page query into the page and the next cursor.
+
+    Returns:
+        Tuple[List, Optional[str]]: (rows of this page, cursor of the next page or None).
+    """
+    page = list(rows[:limit])
+    next_cursor = encode_cursor(page[-1][key]) if len(rows) > limit else None
+    return page, next_cursor
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    """
+    Return the next cursor to the client, if there is a next page.
+    """
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,120 @@
+# backend/services/retrieval_cache.py
+
+"""
+Retrieval Result Cache
+
+This module caches /api/retrieve-context responses keyed by
+(normalized query, k, min_approvals, hide_flagged), with LRU eviction and a TTL.
+
+Entries are stamped with the generation they were computed at: the VectorDB
+index generation, which moves on every index write, and this cache's own
+generation, which moves on feedback changes. An entry from an older generation
+is never served, so a cached response cannot outlive the data it came from.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import RETRIEVAL_CACHE_CAPACITY, RETRIEVAL_CACHE_TTL_SECONDS
+
+CacheKey = Tuple[str, int, int, bool]
+# (VectorDB generation, cache generation)
+Stamp = Tuple[int, int]
+
+
+class RetrievalCache:
+    def __init__(self, capacity: int = 1024, ttl_seconds: float = 60.0):
+        """
+        Args:
+            capacity (int): Maximum number of cached responses (0 disables the cache).
+            ttl_seconds (float): Longest time a response is served from the cache.
+        """
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[Stamp, float, List[Dict]]]" = OrderedDict()
+        # Bumped by invalidate() on changes the vector index does not see (feedback)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @staticmethod
+    def key(query: str, k: int, min_approvals: int, hide_flagged: bool) -> CacheKey:
+        """
+        Cache key for a retrieval request. The query is case- and
+        whitespace-normalized; both the (uncased) encoder and FTS5 ignore those.
+        """
+        return (" ".join(query.lower().split()), k, min_approvals, bool(hide_flagged))
+
+    def stamp(self, index_generation: int) -> Stamp:
+        """
+        Current generation of the data behind retrieval results. Take it
+        *before* searching, so a write that lands mid-search makes the result stale.
+
+        Args:
+            index_generation (int): Current VectorDB generation.
+        """
+        return (index_generation, self.generation)
+
+    def get(self, key: CacheKey, stamp: Stamp) -> Optional[List[Dict]]:
+        """
+        Return the cached results for a key, or None if absent, expired or stale.
+
+        Args:
+            key (CacheKey): Key from RetrievalCache.key.
+            stamp (Stamp): Current stamp from RetrievalCache.stamp.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        entry_stamp, expires_at, results = entry
+        if entry_stamp != stamp or expires_at < time.monotonic():
+            del self._entries[key]
+            self.stale += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return results
+
+    def put(self, key: CacheKey, stamp: Stamp, results: List[Dict]):
+        """
+        Cache results computed from the data at the given stamp.
+
+        Args:
+            key (CacheKey): Key from RetrievalCache.key.
+            stamp (Stamp): Stamp taken before the results were computed.
+            results (List[Dict]): Retrieved threads.
+        """
+        if self.capacity <= 0 or stamp[1] != self.generation:
+            return
+        self._entries[key] = (stamp, time.monotonic() + self.ttl_seconds, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """
+        Make every cached response stale.
+        """
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        """
+        Hit rate and size of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+retrieval_cache = RetrievalCache(RETRIEVAL_CACHE_CAPACITY, RETRIEVAL_CACHE_TTL_SECONDS)
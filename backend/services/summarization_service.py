@@ -2,10 +2,25 @@ from transformers import pipeline
 from sentence_transformers import SentenceTransformer, util
 import logging
 import re
+from backend.dependencies import embedding_cache
+from backend.config import EMBEDDING_BACKEND
+from embeddings.encoders import encoder_cache_key, load_sentence_encoder
 
 # Initialize the summarization pipeline
 summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-sentence_transformer = SentenceTransformer("all-MiniLM-L6-v2")  # Or another Sentence Transformer model
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"  # Or another Sentence Transformer model
+sentence_transformer = load_sentence_encoder(SENTENCE_MODEL_NAME, EMBEDDING_BACKEND)
+
+
+def encode_sentences(texts: list):
+    """
+    Embed texts with the sentence transformer, reusing cached embeddings when available.
+    """
+    if embedding_cache is None:
+        return sentence_transformer.encode(texts)
+    return embedding_cache.encode(
+        encoder_cache_key(SENTENCE_MODEL_NAME, EMBEDDING_BACKEND), sentence_transformer.encode, texts
+    )
 
 def summarize_text_chain(
     comment_chain: list,
@@ -42,8 +57,8 @@ def summarize_text_chain(
             summarized_blocks.append(summary[0]['summary_text'])
 
         # Step 4: Rank blocks by importance
-        block_embeddings = sentence_transformer.encode(summarized_blocks, convert_to_tensor=True)
-        final_embedding = sentence_transformer.encode(comment_texts[-1], convert_to_tensor=True)
+        block_embeddings = encode_sentences(summarized_blocks)
+        final_embedding = encode_sentences([comment_texts[-1]])
         block_scores = util.pytorch_cos_sim(block_embeddings, final_embedding).squeeze(1)
 
         # Keep the top-ranked blocks
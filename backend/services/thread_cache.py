@@ -0,0 +1,100 @@
+# backend/services/thread_cache.py
+
+"""
+Thread Tree Cache
+
+This module caches the serialized JSON of a thread's full comment tree, as
+returned by /api/get-comments/{thread_id}, so hot threads are served from
+memory instead of reloading and re-nesting every comment.
+
+Entries are keyed by thread and stamped with threads.version, which triggers
+bump on every comment insert, update and delete. A request reads the version
+first (one primary-key lookup) and only gets an entry built at that version;
+a write anywhere makes the old entry unreachable. Entries are evicted least
+recently used first, by count and by total bytes.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from backend.config import THREAD_CACHE_CAPACITY, THREAD_CACHE_MAX_BYTES
+
+
+class ThreadTreeCache:
+    def __init__(self, capacity: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            capacity (int): Maximum number of cached threads (0 disables the cache).
+            max_bytes (int): Maximum total size of the cached bodies.
+        """
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, Tuple[int, bytes]]" = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, thread_id: int, version: int) -> Optional[bytes]:
+        """
+        Cached body of a thread's tree at `version`, or None.
+        """
+        entry = self._entries.get(thread_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != version:
+            self.stale += 1
+            self.misses += 1
+            self._drop(thread_id)
+            return None
+        self._entries.move_to_end(thread_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, thread_id: int, version: int, body: bytes):
+        """
+        Cache a thread's tree built at `version`. Bodies larger than a quarter
+        of max_bytes are not cached, so one huge thread cannot flush the rest.
+        """
+        if self.capacity <= 0 or len(body) > self.max_bytes // 4:
+            return
+        self._drop(thread_id)
+        self._entries[thread_id] = (version, body)
+        self.size_bytes += len(body)
+        while len(self._entries) > self.capacity or self.size_bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, thread_id: int):
+        entry = self._entries.pop(thread_id, None)
+        if entry is not None:
+            self.size_bytes -= len(entry[1])
+
+    def invalidate(self, thread_id: Optional[int] = None):
+        """
+        Drop one thread's entry, or all entries.
+        """
+        if thread_id is None:
+            self._entries.clear()
+            self.size_bytes = 0
+        else:
+            self._drop(thread_id)
+
+    def stats(self) -> Dict:
+        """
+        Hit rate and memory use.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+thread_cache = ThreadTreeCache(THREAD_CACHE_CAPACITY, THREAD_CACHE_MAX_BYTES)
@@ -0,0 +1,132 @@
+# embeddings/batch_encoder.py
+
+"""
+Micro-Batching Encoder
+
+This module coalesces concurrent encode requests into a single call to the
+embedding model. A request waits at most `max_wait_ms` for others to join its
+batch, so many small concurrent queries become one forward pass instead of
+many batch-size-1 passes.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class BatchEncoder:
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        executor: Optional[Executor] = None,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        Args:
+            encode_fn (Callable): Blocking batch encoder, e.g. SentenceTransformer.encode.
+            executor (Optional[Executor]): Executor to run `encode_fn` in (loop default if None).
+            max_batch_size (int): Stop collecting once a batch holds this many texts.
+            max_wait_ms (float): Longest time the first request of a batch waits for others.
+        """
+        self.encode_fn = encode_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, sharing a model call with any concurrent requests.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimensions).
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((list(texts), future))
+        return await future
+
+    async def _run(self):
+        """
+        Collect queued requests into batches and encode them one batch at a time.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[List[str], asyncio.Future]]):
+        """
+        Encode one batch and fan the embeddings back out to each request.
+        """
+        texts = [text for request_texts, _ in batch for text in request_texts]
+        loop = asyncio.get_running_loop()
+        try:
+            embeddings = await loop.run_in_executor(self.executor, self.encode_fn, texts)
+            embeddings = np.asarray(embeddings, dtype="float32")
+        except Exception as e:
+            logging.error(f"Batch encode of {len(texts)} texts failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.requests += len(batch)
+        self.texts += len(texts)
+
+        offset = 0
+        for request_texts, future in batch:
+            if not future.done():
+                future.set_result(embeddings[offset:offset + len(request_texts)])
+            offset += len(request_texts)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "queued": self._queue.qsize() if self._queue else 0,
+        }
+
+    async def close(self):
+        """
+        Stop the batching worker.
+        """
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
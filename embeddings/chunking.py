@@ -0,0 +1,35 @@
+# embeddings/chunking.py
+
+"""
+Text Chunking
+
+This module splits long texts into overlapping word windows so that each piece
+fits within the embedding model's input length.
+"""
+
+from typing import List
+
+
+def chunk_text(text: str, max_words: int = 150, overlap: int = 30) -> List[str]:
+    """
+    Split text into chunks of at most `max_words` words.
+
+    Args:
+        text (str): Text to split.
+        max_words (int): Maximum number of words per chunk.
+        overlap (int): Number of words shared by consecutive chunks.
+
+    Returns:
+        List[str]: Chunks in order; empty if the text has no words.
+    """
+    words = text.split()
+    if len(words) <= max_words:
+        return [" ".join(words)] if words else []
+
+    step = max(max_words - overlap, 1)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + max_words]))
+        if start + max_words >= len(words):
+            break
+    return chunks
@@ -0,0 +1,226 @@
+# embeddings/embedding_cache.py
+
+"""
+Embedding Cache
+
+This module implements a content-addressed cache for sentence embeddings, keyed
+by (model name, SHA-256 of the text). Lookups go to an in-process LRU first and
+then to an on-disk SQLite table, so repeated texts skip the transformer.
+
+The disk tier is bounded: each row records when it was last stored or read
+from disk, and once the table holds more than disk_capacity rows the least
+recently used ones are deleted.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Stay well under SQLite's bound-parameter limit
+SQLITE_BATCH_SIZE = 500
+# Pruning the disk tier leaves it this full, so it is not pruned on every store
+DISK_PRUNE_TARGET = 0.9
+
+
+class EmbeddingCache:
+    def __init__(self, path: Optional[str] = None, capacity: int = 10000, disk_capacity: int = 100000):
+        """
+        Args:
+            path (Optional[str]): SQLite file for the disk tier, or None for memory only.
+            capacity (int): Maximum number of embeddings kept in the LRU tier.
+            disk_capacity (int): Maximum number of embeddings kept in the disk tier.
+        """
+        self.capacity = capacity
+        self.disk_capacity = disk_capacity
+        self._memory: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        self._disk_entries = 0
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (model, text_hash)"
+                ") WITHOUT ROWID"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(embedding_cache)")]
+            if "last_used" not in columns:
+                # Files written before the disk tier was bounded
+                self._conn.execute("ALTER TABLE embedding_cache ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS embedding_cache_last_used ON embedding_cache (last_used)"
+            )
+            self._conn.commit()
+            self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+            self._prune_disk()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray):
+        """
+        Insert into the LRU tier, evicting the least recently used entries. Caller holds the lock.
+        """
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def lookup(self, model_name: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached embeddings.
+
+        Args:
+            model_name (str): Name of the model that produced the embeddings.
+            texts (Sequence[str]): Texts to look up.
+
+        Returns:
+            List[Optional[np.ndarray]]: One entry per text; None where it is not cached.
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, text_hash in enumerate(hashes):
+                vector = self._memory.get((model_name, text_hash))
+                if vector is not None:
+                    self._memory.move_to_end((model_name, text_hash))
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(text_hash, []).append(i)
+
+            if missing and self._conn:
+                pending = list(missing)
+                for start in range(0, len(pending), SQLITE_BATCH_SIZE):
+                    batch = pending[start:start + SQLITE_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT text_hash, vector FROM embedding_cache "
+                        f"WHERE model = ? AND text_hash IN ({placeholders})",
+                        [model_name, *batch],
+                    ).fetchall()
+                    if rows:
+                        found = [text_hash for text_hash, _ in rows]
+                        found_placeholders = ",".join("?" * len(found))
+                        self._conn.execute(
+                            f"UPDATE embedding_cache SET last_used = ? "
+                            f"WHERE model = ? AND text_hash IN ({found_placeholders})",
+                            [time.time(), model_name, *found],
+                        )
+                        self._conn.commit()
+                    for text_hash, blob in rows:
+                        vector = np.frombuffer(blob, dtype="float32")
+                        self._remember((model_name, text_hash), vector)
+                        for i in missing.pop(text_hash):
+                            results[i] = vector
+                            self.disk_hits += 1
+
+            self.misses += sum(len(indices) for indices in missing.values())
+        return results
+
+    def store(self, model_name: str, texts: Sequence[str], vectors: np.ndarray):
+        """
+        Add embeddings to both tiers.
+        """
+        entries = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                text_hash = self.text_hash(text)
+                vector = np.ascontiguousarray(vector, dtype="float32")
+                self._remember((model_name, text_hash), vector)
+                entries.append((model_name, text_hash, vector.tobytes()))
+            if self._conn:
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                    [(*entry, now) for entry in entries],
+                )
+                self._conn.commit()
+                # An upper bound; replaced rows are only counted again when pruning
+                self._disk_entries += len(entries)
+                self._prune_disk()
+
+    def _prune_disk(self):
+        """
+        Delete the least recently used rows of the disk tier once it holds more
+        than disk_capacity of them. Caller holds the lock (or is __init__).
+        """
+        if self._disk_entries <= self.disk_capacity:
+            return
+        self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        if self._disk_entries <= self.disk_capacity:
+            return
+        excess = self._disk_entries - int(self.disk_capacity * DISK_PRUNE_TARGET)
+        self._conn.execute(
+            "DELETE FROM embedding_cache WHERE (model, text_hash) IN ("
+            " SELECT model, text_hash FROM embedding_cache ORDER BY last_used LIMIT ?"
+            ")",
+            (excess,),
+        )
+        self._conn.commit()
+        self._disk_entries -= excess
+        self.disk_evictions += excess
+
+    def encode(self, model_name: str, encode_fn: Callable[[List[str]], np.ndarray], texts: Sequence[str]) -> np.ndarray:
+        """
+        Return embeddings for `texts`, calling `encode_fn` only for cache misses.
+
+        Args:
+            model_name (str): Name of the model behind `encode_fn`.
+            encode_fn (Callable): Batch encoder, e.g. SentenceTransformer.encode.
+            texts (Sequence[str]): Texts to embed.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimensions).
+        """
+        vectors = self.lookup(model_name, texts)
+        # Encode each distinct missing text once
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            encoded = np.asarray(encode_fn(missing), dtype="float32")
+            self.store(model_name, missing, encoded)
+            by_text = dict(zip(missing, encoded))
+            vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return np.stack(vectors) if vectors else np.empty((0, 0), dtype="float32")
+
+    def stats(self) -> Dict:
+        """
+        Hit/miss counters and sizes of each tier.
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_bytes = 0
+            if self._conn:
+                page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+                page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+                disk_bytes = page_count * page_size
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "capacity": self.capacity,
+                "disk_entries": self._disk_entries,
+                "disk_capacity": self.disk_capacity,
+                "disk_bytes": disk_bytes,
+                "disk_evictions": self.disk_evictions,
+            }
@@ -0,0 +1,204 @@
+# embeddings/encoders.py
+
+"""
+Sentence Encoder Backends
+
+This module loads the sentence embedding model on one of several CPU runtimes
+and provides the tools to justify switching between them: a parity check
+against the fp32 PyTorch model and an encode throughput benchmark.
+
+Backends:
+    torch       PyTorch fp32 (default)
+    torch_int8  PyTorch with Linear layers dynamically quantized to int8
+    onnx        ONNX Runtime on the exported fp32 graph
+    onnx_int8   ONNX Runtime on the int8-quantized graph shipped with the model
+
+The ONNX backends need `pip install "sentence-transformers[onnx]"`.
+"""
+
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+ENCODER_BACKENDS = ("torch", "torch_int8", "onnx", "onnx_int8")
+
+# Quantized graph published alongside the model on the Hugging Face Hub
+ONNX_INT8_FILE = "onnx/model_qint8_avx2.onnx"
+
+# Texts used when no corpus sample is given to the parity check or benchmark
+SAMPLE_TEXTS = [
+    "How do I configure the FAISS index to use HNSW instead of a flat index?",
+    "The server returned ECONNREFUSED when connecting to 127.0.0.1:5432.",
+    "Summarize the discussion about rate limiting in the API gateway.",
+    "def retrieve_threads(vector_db, query, min_approvals, hide_flagged, k=5):",
+    "Thanks, that fixed it!",
+    "Why does the embedding cache miss when the same text is submitted twice?",
+    "Comparing PostgreSQL and SQLite for a small single-node deployment.",
+    "The model keeps generating answers that ignore the earlier comments in the thread.",
+]
+
+
+def load_sentence_encoder(model_name: str, backend: str = "torch"):
+    """
+    Load a SentenceTransformer on the requested CPU runtime.
+
+    Args:
+        model_name (str): Sentence-transformers model name.
+        backend (str): One of ENCODER_BACKENDS.
+
+    Returns:
+        SentenceTransformer: Model whose `encode` runs on the chosen backend.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unsupported encoder backend: {backend}")
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    if backend == "torch_int8":
+        import torch
+
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    try:
+        if backend == "onnx":
+            return SentenceTransformer(model_name, backend="onnx")
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": ONNX_INT8_FILE})
+    except ImportError as e:
+        raise ImportError(
+            f"Encoder backend '{backend}' needs ONNX Runtime: pip install \"sentence-transformers[onnx]\""
+        ) from e
+
+
+def encoder_cache_key(model_name: str, backend: str) -> str:
+    """
+    Name under which a backend's embeddings are cached. Quantized backends
+    produce slightly different vectors, so they do not share cache entries
+    with the fp32 model.
+    """
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def parity_check(
+    reference_fn: Callable[[List[str]], np.ndarray],
+    candidate_fn: Callable[[List[str]], np.ndarray],
+    texts: Optional[Sequence[str]] = None,
+    k: int = 3,
+) -> Dict:
+    """
+    Compare a candidate encoder with the reference (fp32) encoder.
+
+    Args:
+        reference_fn (Callable): Reference batch encoder.
+        candidate_fn (Callable): Encoder under test.
+        texts (Optional[Sequence[str]]): Texts to embed; SAMPLE_TEXTS if None.
+        k (int): Neighbourhood size for the retrieval agreement check.
+
+    Returns:
+        Dict: mean/min cosine similarity between the two embeddings of each
+        text, and the fraction of each text's k nearest neighbours (among the
+        other texts) that both encoders agree on.
+    """
+    texts = list(texts or SAMPLE_TEXTS)
+    reference = _normalize(np.asarray(reference_fn(texts), dtype="float32"))
+    candidate = _normalize(np.asarray(candidate_fn(texts), dtype="float32"))
+    cosine = (reference * candidate).sum(axis=1)
+
+    k = min(k, len(texts) - 1)
+    agreement = 1.0
+    if k > 0:
+        overlaps = [
+            len(set(_neighbours(reference, i, k)) & set(_neighbours(candidate, i, k))) / k
+            for i in range(len(texts))
+        ]
+        agreement = float(np.mean(overlaps))
+
+    return {
+        "texts": len(texts),
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        "neighbour_agreement": agreement,
+    }
+
+
+def benchmark_encoder(
+    encode_fn: Callable[[List[str]], np.ndarray],
+    texts: Optional[Sequence[str]] = None,
+    repeats: int = 5,
+    cores: Optional[int] = None,
+) -> Dict:
+    """
+    Measure encode throughput.
+
+    Args:
+        encode_fn (Callable): Batch encoder to measure.
+        texts (Optional[Sequence[str]]): One batch of texts; SAMPLE_TEXTS if None.
+        repeats (int): Timed batches after one warm-up batch.
+        cores (Optional[int]): Cores the encoder may use (os.cpu_count() if None).
+
+    Returns:
+        Dict: texts_per_second, texts_per_second_per_core and mean batch latency.
+    """
+    texts = list(texts or SAMPLE_TEXTS)
+    cores = cores or os.cpu_count() or 1
+    encode_fn(texts)  # Warm-up
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        encode_fn(texts)
+    elapsed = time.perf_counter() - start
+
+    texts_per_second = repeats * len(texts) / elapsed
+    return {
+        "batch_size": len(texts),
+        "cores": cores,
+        "texts_per_second": texts_per_second,
+        "texts_per_second_per_core": texts_per_second / cores,
+        "mean_batch_ms": elapsed / repeats * 1000,
+    }
+
+
+def compare_encoders(model_name: str, texts: Optional[Sequence[str]] = None, backends: Sequence[str] = ENCODER_BACKENDS) -> Dict[str, Dict]:
+    """
+    Benchmark every backend and check its parity against the fp32 torch model.
+
+    Args:
+        model_name (str): Sentence-transformers model name.
+        texts (Optional[Sequence[str]]): Corpus sample; SAMPLE_TEXTS if None.
+        backends (Sequence[str]): Backends to compare.
+
+    Returns:
+        Dict[str, Dict]: benchmark_encoder and parity_check results keyed by
+        backend, or {"error": ...} for backends that could not be loaded.
+    """
+    reference = load_sentence_encoder(model_name, "torch")
+    report = {}
+    for backend in backends:
+        try:
+            model = reference if backend == "torch" else load_sentence_encoder(model_name, backend)
+        except Exception as e:
+            logging.warning(f"Skipping encoder backend {backend}: {e}")
+            report[backend] = {"error": str(e)}
+            continue
+        report[backend] = {
+            **benchmark_encoder(model.encode, texts),
+            **parity_check(reference.encode, model.encode, texts),
+        }
+    return report
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _neighbours(normalized: np.ndarray, i: int, k: int) -> List[int]:
+    similarity = normalized @ normalized[i]
+    similarity[i] = -np.inf
+    return list(np.argsort(-similarity)[:k])
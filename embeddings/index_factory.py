@@ -0,0 +1,372 @@
+# embeddings/index_factory.py
+
+"""
+Index Factory
+
+This module builds the FAISS index backends used by VectorDB, persists their
+search parameters next to the index file, and measures recall/latency of a
+backend against brute-force search.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+
+# FAISS index_factory descriptions for each supported backend
+INDEX_FACTORY_STRINGS = {
+    "flat": "Flat",
+    "hnsw": "HNSW{hnsw_m},Flat",
+    "ivf_flat": "IVF{nlist},Flat",
+    "ivf_pq": "IVF{nlist},PQ{pq_m}x8",
+    "sq8": "SQ8",
+    "sq_fp16": "SQfp16",
+    "pq": "PQ{pq_m}x8",
+}
+
+# Backends that must be trained before vectors can be added
+TRAINED_INDEX_TYPES = {"ivf_flat", "ivf_pq", "sq8", "pq"}
+
+# Backends that store compressed vectors, so their distances are approximate
+# and benefit from re-ranking against exact vectors
+COMPRESSED_INDEX_TYPES = {"ivf_pq", "sq8", "sq_fp16", "pq"}
+
+# Backends whose search cannot take an ID selector (IndexPQ only accepts
+# SearchParametersPQ, without one), so excluded ids are dropped from the hits
+UNSELECTABLE_INDEX_TYPES = {"pq"}
+
+# Default build and search parameters for a new index
+DEFAULT_INDEX_PARAMS = {
+    "index_type": "flat",
+    "hnsw_m": 32,
+    "ef_search": 64,
+    "nlist": None,  # Chosen from the corpus size at training time
+    "nprobe": 16,
+    "pq_m": 48,
+}
+
+# FAISS recommends at least ~39 training points per IVF centroid
+MIN_POINTS_PER_CENTROID = 39
+
+# Bits per PQ code ("PQ{pq_m}x8" above); each sub-quantizer trains 2^bits centroids
+PQ_NBITS = 8
+MIN_PQ_TRAINING_POINTS = 2 ** PQ_NBITS
+
+
+def choose_nlist(n_vectors: int) -> int:
+    """
+    Pick a number of IVF lists for a corpus of the given size.
+
+    Args:
+        n_vectors (int): Number of vectors the index will be trained on.
+
+    Returns:
+        int: Number of inverted lists (roughly 4 * sqrt(n), capped by training data).
+    """
+    nlist = int(4 * np.sqrt(max(n_vectors, 1)))
+    return max(1, min(nlist, n_vectors // MIN_POINTS_PER_CENTROID))
+
+
+def requires_training(index_type: str) -> bool:
+    """
+    Whether an index of this type must be trained before vectors can be added.
+    """
+    return index_type in TRAINED_INDEX_TYPES
+
+
+def min_training_points(index_type: str) -> int:
+    """
+    Fewest vectors an index of this type can be trained on (0 if it needs no training).
+    """
+    if not requires_training(index_type):
+        return 0
+    if index_type.endswith("pq"):
+        # IVF-PQ also needs MIN_POINTS_PER_CENTROID per list, which choose_nlist guarantees
+        return MIN_PQ_TRAINING_POINTS
+    return MIN_POINTS_PER_CENTROID
+
+
+def is_compressed(index_type: str) -> bool:
+    """
+    Whether an index of this type stores lossy (quantized) vectors.
+    """
+    return index_type in COMPRESSED_INDEX_TYPES
+
+
+def supports_selectors(index_type: str) -> bool:
+    """
+    Whether searches on an index of this type can filter by ID selector.
+    """
+    return index_type not in UNSELECTABLE_INDEX_TYPES
+
+
+def create_index(dimensions: int, params: Dict, n_vectors: int = 0) -> faiss.Index:
+    """
+    Create an empty (untrained) index for the configured backend.
+
+    For IVF backends without an explicit nlist, the chosen value is written
+    back into `params` so it can be persisted with the index.
+
+    Args:
+        dimensions (int): Vector dimensionality.
+        params (Dict): Index parameters; see DEFAULT_INDEX_PARAMS.
+        n_vectors (int): Size of the training corpus, used to choose nlist.
+
+    Returns:
+        faiss.Index: The new index.
+    """
+    index_type = params["index_type"]
+    if index_type not in INDEX_FACTORY_STRINGS:
+        raise ValueError(f"Unsupported index type: {index_type}")
+
+    if index_type.startswith("ivf") and not params.get("nlist"):
+        params["nlist"] = choose_nlist(n_vectors)
+
+    description = INDEX_FACTORY_STRINGS[index_type].format(**params)
+    index = faiss.index_factory(dimensions, description, faiss.METRIC_L2)
+    apply_search_params(index, params)
+    logging.info(f"Created FAISS index '{description}'.")
+    return index
+
+
+def train_index(index: faiss.Index, vectors: np.ndarray):
+    """
+    Train an index on the given vectors if it needs training.
+    """
+    if index.is_trained:
+        return
+    start = time.perf_counter()
+    index.train(vectors)
+    logging.info(f"Trained FAISS index on {len(vectors)} vectors in {time.perf_counter() - start:.2f}s.")
+
+
+def apply_search_params(index: faiss.Index, params: Dict):
+    """
+    Apply query-time parameters (nprobe for IVF, efSearch for HNSW) to an index.
+    """
+    index_type = params["index_type"]
+    parameter_space = faiss.ParameterSpace()
+    if index_type.startswith("ivf") and params.get("nprobe"):
+        parameter_space.set_index_parameter(index, "nprobe", params["nprobe"])
+    elif index_type == "hnsw" and params.get("ef_search"):
+        parameter_space.set_index_parameter(index, "efSearch", params["ef_search"])
+
+
+def reconstruct_all(index: faiss.Index) -> np.ndarray:
+    """
+    Read every stored vector back out of an index, in insertion order.
+
+    For an IndexIDMap2 the rows line up with index_ids(index). Vectors from
+    PQ-encoded indexes are approximate.
+    """
+    if isinstance(index, faiss.IndexIDMap2):
+        index = faiss.downcast_index(index.index)
+    if index.ntotal == 0:
+        return np.empty((0, index.d), dtype="float32")
+    try:
+        faiss.extract_index_ivf(index).make_direct_map()
+    except RuntimeError:
+        pass  # Not an IVF index
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def index_ids(index: faiss.IndexIDMap2) -> np.ndarray:
+    """
+    Vector ids stored in an ID-mapped index, in insertion order.
+    """
+    return faiss.vector_to_array(index.id_map)
+
+
+def empty_copy(index: faiss.Index) -> faiss.IndexIDMap2:
+    """
+    Return an empty ID-mapped index with the same backend and training as `index`.
+
+    Used to compact an index by re-adding only its live vectors, which works for
+    every backend (HNSW and ID-mapped IVF indexes cannot remove vectors in place).
+    """
+    if isinstance(index, faiss.IndexIDMap2):
+        index = faiss.downcast_index(index.index)
+    base = faiss.clone_index(index)
+    base.reset()
+    return faiss.IndexIDMap2(base)
+
+
+def search_parameters(params: Dict, selector: Optional[faiss.IDSelector] = None) -> faiss.SearchParameters:
+    """
+    Build per-query search parameters for the backend, carrying an ID selector
+    alongside the backend's nprobe/efSearch settings.
+
+    Raises:
+        ValueError: If a selector is given for a backend that cannot use one.
+    """
+    index_type = params["index_type"]
+    if not supports_selectors(index_type):
+        if selector is not None:
+            raise ValueError(f"Index type '{index_type}' does not support ID selectors.")
+        return faiss.SearchParametersPQ()
+    if index_type.startswith("ivf"):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=params.get("nprobe") or 1)
+    if index_type == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=params.get("ef_search") or 16)
+    return faiss.SearchParameters(sel=selector)
+
+
+def index_size_bytes(index: faiss.Index) -> int:
+    """
+    Serialized size of an index, a close proxy for its memory footprint.
+    """
+    return faiss.serialize_index(index).size
+
+
+def rerank_exact(
+    query: np.ndarray, candidate_ids: np.ndarray, candidate_vectors: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Re-score candidates by exact squared L2 distance and keep the best k.
+
+    Args:
+        query (np.ndarray): Query vector of shape (dimensions,).
+        candidate_ids (np.ndarray): Ids of the candidates.
+        candidate_vectors (np.ndarray): Exact vectors of the candidates, one row per id.
+        k (int): Number of results to keep.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (distances, ids), nearest first.
+    """
+    distances = ((candidate_vectors - query) ** 2).sum(axis=1)
+    order = np.argsort(distances)[:k]
+    return distances[order], candidate_ids[order]
+
+
+def load_index_params(path: str) -> Optional[Dict]:
+    """
+    Load persisted index parameters, or None if there are none.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return {**DEFAULT_INDEX_PARAMS, **json.load(file)}
+
+
+def save_index_params(path: str, params: Dict):
+    """
+    Persist index parameters next to the index file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(params, file, indent=2)
+    os.replace(tmp_path, path)
+
+
+def brute_force_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """
+    Exact k nearest neighbours (row positions in `vectors`) of each query.
+    """
+    ground_truth = faiss.IndexFlatL2(vectors.shape[1])
+    ground_truth.add(vectors)
+    _, expected = ground_truth.search(queries, k)
+    return expected
+
+
+def evaluate_index(
+    index: faiss.Index,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    ids: Optional[np.ndarray] = None,
+    rerank_factor: int = 0,
+    ground_truth: Optional[np.ndarray] = None,
+) -> Dict:
+    """
+    Measure recall@k, per-query latency and size of an index against brute force.
+
+    Args:
+        index (faiss.Index): Index under test, already holding `vectors` in order.
+        vectors (np.ndarray): The vectors stored in the index.
+        queries (np.ndarray): Query vectors.
+        k (int): Number of neighbours to compare.
+        ids (Optional[np.ndarray]): Vector ids of `vectors` for ID-mapped indexes.
+        rerank_factor (int): If set, fetch k * rerank_factor candidates and
+            re-rank them against the exact `vectors`.
+        ground_truth (Optional[np.ndarray]): Exact neighbours (row positions) of
+            `queries`, if already computed; see brute_force_neighbours.
+
+    Returns:
+        Dict: recall_at_k, p50_ms, p99_ms and mean_ms latencies, bytes_per_vector.
+    """
+    expected = ground_truth[:, :k] if ground_truth is not None else brute_force_neighbours(vectors, queries, k)
+    if ids is not None:
+        expected = ids[expected]
+    if rerank_factor:
+        position_of = {int(vector_id): i for i, vector_id in enumerate(ids if ids is not None else range(len(vectors)))}
+
+    latencies = []
+    found = np.empty_like(expected)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        if rerank_factor:
+            _, candidates = index.search(query.reshape(1, -1), k * rerank_factor)
+            candidates = candidates[0][candidates[0] != -1]
+            rows = vectors[[position_of[int(c)] for c in candidates]]
+            _, found[i] = rerank_exact(query, candidates, rows, k)
+        else:
+            _, found[i:i + 1] = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    hits = sum(len(set(found[i]) & set(expected[i])) for i in range(len(queries)))
+    return {
+        "recall_at_k": hits / (len(queries) * k),
+        "k": k,
+        "queries": len(queries),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "mean_ms": float(np.mean(latencies)),
+        "bytes_per_vector": index_size_bytes(index) / max(index.ntotal, 1),
+    }
+
+
+def compare_backends(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    params: Optional[Dict] = None,
+    rerank_factor: int = 4,
+) -> Dict[str, Dict]:
+    """
+    Build every supported backend over the same vectors and evaluate each one.
+    Backends that cannot be trained on this few vectors are skipped (e.g. PQ
+    below 2^PQ_NBITS vectors). Compressed backends are also evaluated with exact re-ranking, reported
+    under "<index_type>+rerank".
+
+    Args:
+        vectors (np.ndarray): Corpus vectors.
+        queries (np.ndarray): Query vectors.
+        k (int): Number of neighbours to compare.
+        params (Optional[Dict]): Parameter overrides applied to every backend.
+        rerank_factor (int): Candidate multiplier for the re-ranked runs (0 to skip them).
+
+    Returns:
+        Dict[str, Dict]: evaluate_index results plus build_seconds, keyed by index type.
+    """
+    report = {}
+    for index_type in INDEX_FACTORY_STRINGS:
+        backend_params = {**DEFAULT_INDEX_PARAMS, **(params or {}), "index_type": index_type}
+        if len(vectors) < min_training_points(index_type):
+            logging.warning(f"Skipping {index_type}: {len(vectors)} vectors are too few to train it.")
+            continue
+        start = time.perf_counter()
+        index = create_index(vectors.shape[1], backend_params, n_vectors=len(vectors))
+        train_index(index, vectors)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+        report[index_type] = {"build_seconds": build_seconds, **evaluate_index(index, vectors, queries, k)}
+        if rerank_factor and is_compressed(index_type):
+            report[f"{index_type}+rerank"] = {
+                "build_seconds": build_seconds,
+                **evaluate_index(index, vectors, queries, k, rerank_factor=rerank_factor),
+            }
+    return report
@@ -0,0 +1,320 @@
+# embeddings/indexing/incremental_indexer.py
+
+"""
+Incremental Comment Indexer
+
+This module embeds comments in the background. Routes enqueue a comment when
+it is written and return immediately; a single worker drains the queue in
+batches and hands each batch to VectorDB in one bulk call. The queue is
+bounded, so a sustained burst makes writers wait instead of growing memory
+without limit. Bulk writers hand over comment ids with enqueue_ids() instead;
+a background task feeds them into the queue, so the request never waits.
+
+A batch that fails is retried up to max_retries times with exponential backoff.
+Retries re-read the comments' current text, so an edit made in the meantime is
+not overwritten by the text that failed. Comments that were never indexed
+(e.g. queued when the process stopped, or out of retries) are picked up by
+backfill() at startup. Placeholder root comments are never
+indexed; backfill() also removes vectors left from before that rule.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, select
+
+from backend.database import database, comments, comment_embedding_mapping, threads
+from backend.database.writes import ROOT_COMMENT_TEXT
+
+# Queue entries: (comment_id, thread_id, text or None to delete, enqueue time)
+IndexTask = Tuple[int, Optional[int], Optional[str], float]
+
+
+class IncrementalIndexer:
+    def __init__(
+        self,
+        vector_db,
+        max_queue_size: int = 10000,
+        batch_size: int = 64,
+        max_wait_ms: float = 200.0,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 1.0,
+    ):
+        """
+        Args:
+            vector_db (VectorDB): Index that receives the comment embeddings.
+            max_queue_size (int): Pending comments at which enqueue() starts to wait.
+            batch_size (int): Maximum number of comments embedded per batch.
+            max_wait_ms (float): Longest time the first comment of a batch waits for others.
+            max_retries (int): Times a comment from a failed batch is retried.
+            retry_backoff_seconds (float): Delay before the first retry; doubled per attempt.
+        """
+        self.vector_db = vector_db
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        # Enqueue times of the queued tasks, in queue order
+        self._enqueued_at: Deque[float] = deque()
+        # Comments from failed batches: (first enqueue time, failed attempts)
+        self._retrying: Dict[int, Tuple[float, int]] = {}
+        self._retries: Set[asyncio.Task] = set()
+        self._worker: Optional[asyncio.Task] = None
+        self._backfill: Optional[asyncio.Task] = None
+        # Background tasks feeding enqueue_ids() batches into the queue
+        self._feeders: Set[asyncio.Task] = set()
+        self.indexed = 0
+        self.deleted = 0
+        self.failed = 0
+        # Comments that ran out of retries; left for the next backfill()
+        self.abandoned = 0
+        self.batches = 0
+        # Seconds between enqueue and searchability for the last batch
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    async def start(self, backfill: bool = True):
+        """
+        Start the worker and optionally queue comments that have no vectors yet.
+        """
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._enqueued_at.clear()
+        self._worker = asyncio.create_task(self._run())
+        if backfill:
+            self._backfill = asyncio.create_task(self.backfill())
+
+    async def backfill(self):
+        """
+        Queue every comment without a chunk mapping, except placeholder root
+        comments, and queue the removal of placeholder vectors.
+        """
+        placeholder = and_(
+            comments.c.text == ROOT_COMMENT_TEXT,
+            comments.c.id.in_(select(threads.c.root_comment_id).where(threads.c.root_comment_id.is_not(None))),
+        )
+        unmapped = comments.outerjoin(
+            comment_embedding_mapping, comment_embedding_mapping.c.comment_id == comments.c.id
+        )
+        rows = await database.fetch_all(
+            select(comments.c.id, comments.c.thread_id, comments.c.text).select_from(unmapped).where(
+                comment_embedding_mapping.c.comment_id.is_(None), comments.c.text != "", ~placeholder
+            )
+        )
+        for row in rows:
+            await self.enqueue(row["id"], row["thread_id"], row["text"])
+        if rows:
+            logging.info(f"Queued {len(rows)} unindexed comments for embedding.")
+
+        indexed_placeholders = await database.fetch_all(
+            select(comments.c.id).where(
+                placeholder,
+                comments.c.id.in_(select(comment_embedding_mapping.c.comment_id)),
+            )
+        )
+        for row in indexed_placeholders:
+            await self.enqueue_delete(row["id"])
+        if indexed_placeholders:
+            logging.info(f"Queued removal of {len(indexed_placeholders)} placeholder root comment vectors.")
+
+    async def enqueue(self, comment_id: int, thread_id: int, text: str):
+        """
+        Queue a new or edited comment for (re-)embedding. Waits while the queue is full.
+        """
+        await self._put((comment_id, thread_id, text, time.time()))
+
+    async def _put(self, task: IndexTask):
+        await self._queue.put(task)
+        self._enqueued_at.append(task[3])
+
+    async def _get(self) -> IndexTask:
+        task = await self._queue.get()
+        self._enqueued_at.popleft()
+        return task
+
+    def enqueue_ids(self, comment_ids: List[int]):
+        """
+        Queue stored comments by id without waiting. A background task reads
+        their text batch by batch just before queueing it, so comments edited
+        or deleted in the meantime are queued as they are now.
+        """
+        feeder = asyncio.create_task(self._feed(list(comment_ids)))
+        self._feeders.add(feeder)
+        feeder.add_done_callback(self._feeders.discard)
+
+    async def _feed(self, comment_ids: List[int]) -> Set[int]:
+        """
+        Queue stored comments by id, batch by batch.
+
+        Returns:
+            Set[int]: Ids of the comments that were found and queued.
+        """
+        queued = set()
+        for start in range(0, len(comment_ids), self.batch_size):
+            rows = await database.fetch_all(
+                select(comments.c.id, comments.c.thread_id, comments.c.text).where(
+                    comments.c.id.in_(comment_ids[start:start + self.batch_size]), comments.c.text != ""
+                )
+            )
+            for row in rows:
+                await self.enqueue(row["id"], row["thread_id"], row["text"])
+                queued.add(row["id"])
+        return queued
+
+    async def enqueue_delete(self, comment_id: int):
+        """
+        Queue removal of a deleted comment's vectors. Going through the queue keeps
+        it ordered after any pending embed of the same comment.
+        """
+        await self._put((comment_id, None, None, time.time()))
+
+    async def _run(self):
+        """
+        Collect queued comments into batches and index them one batch at a time.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logging.error(f"Indexing a batch of {len(batch)} comments failed: {e}")
+                self._schedule_retry(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[IndexTask]):
+        """
+        Apply one batch: the latest task per comment wins, deletes go first.
+        """
+        latest: Dict[int, IndexTask] = {}
+        for task in batch:
+            latest[task[0]] = task
+        upserts = [task for task in latest.values() if task[2] is not None]
+        deletes = [comment_id for comment_id, _, text, _ in latest.values() if text is None]
+
+        if deletes:
+            await self.vector_db.delete_comments(deletes)
+        if upserts:
+            await self.vector_db.add_comments_bulk(
+                [task[0] for task in upserts],
+                [task[1] for task in upserts],
+                [task[2] for task in upserts],
+            )
+
+        for comment_id in latest:
+            self._retrying.pop(comment_id, None)
+        lag = time.time() - min(task[3] for task in batch)
+        self.last_lag_seconds = lag
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        self.indexed += len(upserts)
+        self.deleted += len(deletes)
+        self.batches += 1
+
+    def _schedule_retry(self, batch: List[IndexTask]):
+        """
+        Queue the comments of a failed batch again after a backoff, or give up
+        on those that are out of retries.
+        """
+        latest: Dict[int, IndexTask] = {}
+        for task in batch:
+            latest[task[0]] = task
+        upserts, deletes, abandoned, attempts = [], [], 0, 0
+        for comment_id, task in latest.items():
+            since, failures = self._retrying.get(comment_id, (task[3], 0))
+            failures += 1
+            if failures > self.max_retries:
+                self._retrying.pop(comment_id, None)
+                abandoned += 1
+                continue
+            self._retrying[comment_id] = (min(since, task[3]), failures)
+            attempts = max(attempts, failures)
+            (upserts if task[2] is not None else deletes).append(comment_id)
+        if abandoned:
+            self.abandoned += abandoned
+            logging.error(f"Giving up on {abandoned} comments after {self.max_retries} retries.")
+        if not upserts and not deletes:
+            return
+
+        retry = asyncio.create_task(self._retry(upserts, deletes, self.retry_backoff * 2 ** (attempts - 1)))
+        self._retries.add(retry)
+        retry.add_done_callback(self._retries.discard)
+
+    async def _retry(self, upserts: List[int], deletes: List[int], delay: float):
+        await asyncio.sleep(delay)
+        for comment_id in deletes:
+            await self._put((comment_id, None, None, time.time()))
+        # Comments deleted or emptied in the meantime need no vectors
+        queued = await self._feed(upserts)
+        for comment_id in set(upserts) - queued:
+            self._retrying.pop(comment_id, None)
+
+    async def drain(self):
+        """
+        Wait until everything queued so far has been indexed.
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        """
+        Index what is already queued, then stop the worker.
+        """
+        if self._worker is None:
+            return
+        # Comments not queued yet are picked up by the next backfill()
+        if self._backfill and not self._backfill.done():
+            self._backfill.cancel()
+        for feeder in list(self._feeders):
+            feeder.cancel()
+        await self.drain()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        for retry in list(self._retries):
+            retry.cancel()
+
+    def stats(self) -> Dict:
+        """
+        Queue depth, throughput and index freshness lag.
+        """
+        pending = self._queue.qsize() if self._queue else 0
+        # New tasks are queued in time order; retried ones are tracked from their first attempt
+        oldest = min(
+            ([self._enqueued_at[0]] if self._enqueued_at else [])
+            + [since for since, _ in self._retrying.values()],
+            default=None,
+        )
+        return {
+            "pending": pending,
+            "max_queue_size": self.max_queue_size,
+            "feeding": len(self._feeders),
+            "indexed": self.indexed,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "retrying": len(self._retrying),
+            "abandoned": self.abandoned,
+            "batches": self.batches,
+            "last_lag_seconds": self.last_lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            # How stale search is right now: age of the oldest comment not yet indexed
+            "current_lag_seconds": time.time() - oldest if oldest is not None else 0.0,
+        }
@@ -6,10 +6,15 @@ Context Retrieval Logic
 This module implements logic for retrieving relevant threads based on user queries.
 """
 
-from typing import List, Dict
+from typing import List, Dict, Sequence
 from embeddings.vector_db import VectorDB
 
-async def retrieve_relevant_threads(vector_db: VectorDB, query: str, k: int = 5) -> List[Dict]:
+# Damping constant from the original RRF paper; larger values flatten rank differences
+RRF_K = 60
+
+async def retrieve_relevant_threads(
+    vector_db: VectorDB, query: str, k: int = 5, min_approvals: int = 0, hide_flagged: bool = False
+) -> List[Dict]:
     """
     Retrieve the most relevant threads for a given query.
 
@@ -17,8 +22,47 @@ async def retrieve_relevant_threads(vector_db: VectorDB, query: str, k: int = 5)
         vector_db (VectorDB): The VectorDB instance to use for searching.
         query (str): User's input query.
         k (int): Number of top results to retrieve.
+        min_approvals (int): Only return threads with at least this many approvals.
+        hide_flagged (bool): Exclude flagged threads if True.
 
     Returns:
         List[Dict]: List of retrieved threads with metadata.
     """
-    return await vector_db.search_embeddings(query, k)
+    return await vector_db.search_embeddings(query, k, min_approvals=min_approvals, hide_flagged=hide_flagged)
+
+
+def reciprocal_rank_scores(rankings: Sequence[Sequence[int]], rrf_k: int = RRF_K) -> Dict[int, float]:
+    """
+    Score ids from ranked lists with reciprocal-rank fusion.
+
+    Each id scores sum(1 / (rrf_k + rank)) over the lists it appears in, so
+    items ranked well by several retrievers rise to the top without having to
+    calibrate their raw scores against each other.
+
+    Args:
+        rankings (Sequence[Sequence[int]]): Ranked id lists, best first.
+        rrf_k (int): Damping constant.
+
+    Returns:
+        Dict[int, float]: Fused score by id; higher is better.
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (rrf_k + rank)
+    return scores
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], rrf_k: int = RRF_K) -> List[int]:
+    """
+    Merge ranked lists of ids with reciprocal-rank fusion.
+
+    Args:
+        rankings (Sequence[Sequence[int]]): Ranked id lists, best first.
+        rrf_k (int): Damping constant.
+
+    Returns:
+        List[int]: Ids ordered by fused score, best first.
+    """
+    scores = reciprocal_rank_scores(rankings, rrf_k)
+    return sorted(scores, key=lambda item: scores[item], reverse=True)
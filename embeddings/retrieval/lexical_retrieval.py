@@ -0,0 +1,118 @@
+# embeddings/retrieval/lexical_retrieval.py
+
+"""
+Lexical Retrieval Logic
+
+This module implements BM25 retrieval over the FTS5 indexes of thread and
+comment text. It complements vector search for exact identifiers, error
+strings and code tokens, which sentence embeddings match poorly.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+from backend.config import LEXICAL_CANDIDATE_FACTOR
+from backend.database import database
+
+# Each branch keeps only its :candidates best matches (FTS5 ranks them without
+# sorting every match), and only those are joined and filtered
+LEXICAL_SEARCH_QUERY = """
+    SELECT hits.thread_id AS thread_id, MIN(hits.score) AS score
+    FROM (
+        SELECT thread_hits.thread_id AS thread_id, thread_hits.score AS score
+        FROM (
+            SELECT threads_fts.rowid AS thread_id, rank AS score
+            FROM threads_fts
+            WHERE threads_fts MATCH :match
+            ORDER BY rank
+            LIMIT :candidates
+        ) AS thread_hits
+        UNION ALL
+        SELECT comments.thread_id AS thread_id, comment_hits.score AS score
+        FROM (
+            SELECT comments_fts.rowid AS comment_id, rank AS score
+            FROM comments_fts
+            WHERE comments_fts MATCH :match
+            ORDER BY rank
+            LIMIT :candidates
+        ) AS comment_hits
+        JOIN comments ON comments.id = comment_hits.comment_id
+    ) AS hits
+    LEFT JOIN feedback ON feedback.context_id = CAST(hits.thread_id AS TEXT)
+    WHERE COALESCE(feedback.approvals, 0) >= :min_approvals
+      AND (:hide_flagged = 0 OR COALESCE(feedback.flags, 0) = 0)
+    GROUP BY hits.thread_id
+    ORDER BY score
+    LIMIT :k
+"""
+
+
+def build_match_expression(query: str, operator: str = "OR") -> str:
+    """
+    Turn free text into an FTS5 MATCH expression that cannot be a syntax error.
+
+    Each whitespace-separated term is quoted as a phrase, so operators (AND, NOT)
+    and punctuation inside identifiers and error strings (e.g. `127.0.0.1`) are
+    matched as tokens rather than parsed as query syntax. Terms are joined with
+    `operator` and ranked by BM25.
+
+    Args:
+        query (str): User's input query.
+        operator (str): "OR" to match any term, "AND" to require all of them.
+
+    Returns:
+        str: MATCH expression, or "" if the query has no searchable terms.
+    """
+    terms = []
+    for term in query.split():
+        term = term.replace('"', "")
+        if not re.search(r"\w", term):
+            continue
+        terms.append(f'"{term}"')
+    return f" {operator} ".join(dict.fromkeys(terms))
+
+
+async def _search_match(match: str, k: int, min_approvals: int, hide_flagged: bool) -> Dict[int, float]:
+    rows = await database.fetch_all(
+        LEXICAL_SEARCH_QUERY,
+        {
+            "match": match,
+            "k": k,
+            "candidates": k * LEXICAL_CANDIDATE_FACTOR,
+            "min_approvals": min_approvals,
+            "hide_flagged": int(hide_flagged),
+        },
+    )
+    return {row["thread_id"]: row["score"] for row in rows}
+
+
+async def search_lexical(query: str, k: int = 5, min_approvals: int = 0, hide_flagged: bool = False) -> List[Tuple[int, float]]:
+    """
+    Rank threads by BM25 over their own text and their comments.
+
+    A thread scores as its best match across its title/description and all of
+    its comments. Threads matching every term come first; only when there are
+    fewer than k of them are the terms OR-ed to fill the rest. Each FTS5 table
+    contributes at most k * LEXICAL_CANDIDATE_FACTOR matches, so a strict
+    feedback filter can return fewer than k threads.
+
+    Args:
+        query (str): User's input query.
+        k (int): Number of threads to return.
+        min_approvals (int): Only return threads with at least this many approvals.
+        hide_flagged (bool): Exclude flagged threads if True.
+
+    Returns:
+        List[Tuple[int, float]]: (thread_id, bm25 score), best first (lower is better).
+    """
+    match_all = build_match_expression(query, "AND")
+    if not match_all:
+        return []
+    hits = await _search_match(match_all, k, min_approvals, hide_flagged)
+    match_any = build_match_expression(query, "OR")
+    if len(hits) < k and match_any != match_all:
+        for thread_id, score in (await _search_match(match_any, k, min_approvals, hide_flagged)).items():
+            if len(hits) >= k:
+                break
+            hits.setdefault(thread_id, score)
+    return list(hits.items())
@@ -4,46 +4,274 @@ import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 import os
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import List, Dict, FrozenSet, Optional, Set, Tuple
 import logging
 
-from backend.database import database, embedding_mapping, threads, feedback
+from backend.database import (
+    database,
+    embedding_mapping,
+    comment_embedding_mapping,
+    embedding_vectors,
+    threads,
+    feedback,
+)
 from backend.services.executor import executor  # Centralized executor
-from sqlalchemy import select
+from backend.services.feedback_service import FeedbackSnapshot
+from backend.config import (
+    VECTOR_INDEX_TYPE,
+    VECTOR_INDEX_NPROBE,
+    VECTOR_INDEX_EF_SEARCH,
+    VECTOR_SNAPSHOT_EVERY,
+    VECTOR_SNAPSHOT_INTERVAL_SECONDS,
+    VECTOR_LOG_FSYNC,
+    ENCODER_MAX_BATCH_SIZE,
+    ENCODER_MAX_WAIT_MS,
+    VECTOR_COMPACT_RATIO,
+    VECTOR_INDEX_MMAP,
+    VECTOR_RERANK_FACTOR,
+    VECTOR_SEARCH_MAX_CANDIDATES,
+    VECTOR_EXACT_SEARCH_MAX_IDS,
+    COMMENT_CHUNK_WORDS,
+    COMMENT_CHUNK_OVERLAP,
+    EMBEDDING_BACKEND,
+)
+from embeddings.index_factory import (
+    DEFAULT_INDEX_PARAMS,
+    apply_search_params,
+    create_index,
+    empty_copy,
+    evaluate_index,
+    index_ids,
+    is_compressed,
+    load_index_params,
+    min_training_points,
+    reconstruct_all,
+    requires_training,
+    rerank_exact,
+    save_index_params,
+    search_parameters,
+    supports_selectors,
+    train_index,
+)
+from embeddings.vector_log import VectorLog
+from embeddings.embedding_cache import EmbeddingCache
+from embeddings.batch_encoder import BatchEncoder
+from embeddings.chunking import chunk_text
+from embeddings.encoders import encoder_cache_key, load_sentence_encoder
+from sqlalchemy import select, cast, String
 import asyncio
 
 # Configuration
 INDEX_FILE = "faiss_index.bin"
+INDEX_PARAMS_FILE = "faiss_index.json"
+INDEX_LOG_FILE = "faiss_index.log"
 DIMENSIONS = 384  # Example dimensionality for 'all-MiniLM-L6-v2' model
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_CACHE_KEY = encoder_cache_key(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND)
+# Retried searches widen nprobe/efSearch at most this many times
+SEARCH_MAX_ROUNDS = 4
+# Candidates fetched per result while comment chunks share the threads' id space
+CHUNK_OVERFETCH = 4
+# Map the index file read-only instead of reading it into memory
+INDEX_MMAP_FLAGS = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
 
 class VectorDB:
-    def __init__(self):
-        self.embedding_index_to_thread: Dict[int, str] = {}
-        self.index: Optional[faiss.Index] = None
+    """
+    FAISS-backed semantic index over threads and their comments.
+
+    Vectors are stored under stable ids in an IndexIDMap2. embedding_mapping maps
+    a thread's own vector id to the thread, and comment_embedding_mapping maps the
+    vectors of comment chunks to their comment and thread. Re-embedding allocates
+    new ids, and ids that are in the index but no longer mapped are tombstones.
+    Tombstones are excluded at query time and physically dropped by background
+    compaction.
+
+    Only one process may open the index: vector ids come from an in-memory
+    counter and new vectors go to a single log, so initialize() fails while
+    another process holds the log (see VectorLog). Run uvicorn with one worker.
+    Workers therefore do not share a memory-mapped index; see VECTOR_INDEX_MMAP.
+    """
+
+    def __init__(
+        self,
+        feedback_snapshot: Optional[FeedbackSnapshot] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+    ):
+        # Every live vector id (thread or comment chunk) to its thread
+        self.embedding_index_to_thread: Dict[int, int] = {}
+        # A thread's own vector, and all vectors credited to a thread
+        self.thread_to_embedding_index: Dict[int, int] = {}
+        self.thread_vector_ids: Dict[int, Set[int]] = {}
+        # Comment chunk vectors
+        self.embedding_index_to_comment: Dict[int, int] = {}
+        self.comment_vector_ids: Dict[int, List[int]] = {}
+        # Vector ids still in the index whose thread was deleted or re-embedded.
+        # Replaced, never mutated, so searches in executor threads can use the
+        # set they read without the index lock.
+        self.tombstones: FrozenSet[int] = frozenset()
+        # (tombstones it was built from, IDSelectorBatch, IDSelectorNot)
+        self._tombstone_selector: Optional[Tuple] = None
+        self._next_vector_id = 0
+        self.index: Optional[faiss.IndexIDMap2] = None
+        self.index_params: Dict = {}
+        # True while self.index is backed by the read-only mapping of INDEX_FILE
+        self._index_mapped = False
         self.embedding_model: Optional[SentenceTransformer] = None
+        self._model_future: Optional[asyncio.Future] = None
+        # When set, feedback counts are read from memory instead of the feedback table
+        self.feedback_snapshot = feedback_snapshot
+        # When set, embeddings of previously seen texts are served from the cache
+        self.embedding_cache = embedding_cache
+        # Coalesces concurrent encode calls into shared model batches
+        self.batch_encoder: Optional[BatchEncoder] = None
+        # Vectors added since the last snapshot of INDEX_FILE
+        self.vector_log: Optional[VectorLog] = None
+        # Guards index mutation against concurrent adds and snapshots
+        self._index_lock = threading.Lock()
+        # Only one snapshot is written at a time
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_future: Optional[asyncio.Future] = None
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._compaction_future: Optional[asyncio.Future] = None
+        # Bumped whenever search results may change; result caches compare against it
+        self.generation = 0
 
     async def initialize(self):
         """
-        Initialize the embedding model, FAISS index, and load existing mappings.
+        Open the FAISS index and load existing mappings. The embedding model is
+        loaded in the background; encode() waits for it and readiness() reports it.
         """
         logging.info("Initializing VectorDB...")
-        
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
-        logging.info(f"Initialized embedding model: {EMBEDDING_MODEL_NAME}")
+
+        # Load the embedding model without holding up startup
+        loop = asyncio.get_event_loop()
+        self._model_future = loop.run_in_executor(executor, self._load_model)
 
         # Initialize FAISS index
+        configured_params = {
+            **DEFAULT_INDEX_PARAMS,
+            "index_type": VECTOR_INDEX_TYPE,
+            "nprobe": VECTOR_INDEX_NPROBE,
+            "ef_search": VECTOR_INDEX_EF_SEARCH,
+        }
         if os.path.exists(INDEX_FILE):
-            self.index = faiss.read_index(INDEX_FILE)
-            logging.info("FAISS index loaded from disk.")
+            self.index = faiss.read_index(INDEX_FILE, INDEX_MMAP_FLAGS if VECTOR_INDEX_MMAP else 0)
+            self._index_mapped = VECTOR_INDEX_MMAP
+            # Indexes written before parameters were persisted are always flat
+            self.index_params = load_index_params(INDEX_PARAMS_FILE) or {**DEFAULT_INDEX_PARAMS, "index_type": "flat"}
+            apply_search_params(self.index, self.index_params)
+            if not isinstance(self.index, faiss.IndexIDMap2):
+                self._ensure_writable()
+                self.index = self._wrap_positional_index(self.index)
+            logging.info(f"FAISS index ({self.index_params['index_type']}) loaded from disk.")
+            if self.index_params["index_type"] != VECTOR_INDEX_TYPE:
+                logging.warning(
+                    f"Configured index type '{VECTOR_INDEX_TYPE}' differs from the stored "
+                    f"'{self.index_params['index_type']}' index. Run "
+                    f"`python -m backend.manage --rebuild-index {VECTOR_INDEX_TYPE}` to convert it."
+                )
+        elif requires_training(VECTOR_INDEX_TYPE):
+            # IVF indexes need training data; start flat until there is enough to rebuild
+            self.index_params = {**configured_params, "index_type": "flat"}
+            self.index = faiss.IndexIDMap2(create_index(DIMENSIONS, self.index_params))
+            logging.warning(
+                f"Index type '{VECTOR_INDEX_TYPE}' needs training; starting with a flat index. "
+                f"Rebuild once the corpus is populated."
+            )
         else:
-            self.index = faiss.IndexFlatL2(DIMENSIONS)  # Using L2 distance
+            self.index_params = configured_params
+            self.index = faiss.IndexIDMap2(create_index(DIMENSIONS, self.index_params))
             logging.info("Initialized new FAISS index.")
 
+        # Replay vectors logged since the last snapshot
+        self.vector_log = VectorLog(INDEX_LOG_FILE, DIMENSIONS, fsync=VECTOR_LOG_FSYNC)
+        self.replay_log()
+        self._snapshot_task = asyncio.create_task(self._snapshot_periodically())
+
         # Load existing embedding mappings from the database
-        self.embedding_index_to_thread = await self.load_embedding_mapping()
-        logging.info(f"Loaded {len(self.embedding_index_to_thread)} embedding mappings.")
+        for vector_id, thread_id in (await self.load_embedding_mapping()).items():
+            self._map_vector(vector_id, thread_id)
+        for row in await self.load_comment_embedding_mapping():
+            self._map_vector(row["faiss_index"], row["thread_id"], row["comment_id"])
+        logging.info(
+            f"Loaded {len(self.embedding_index_to_thread)} embedding mappings "
+            f"({len(self.embedding_index_to_comment)} comment chunks)."
+        )
+
+        # Anything in the index without a mapping is a tombstone
+        stored_ids = index_ids(self.index)
+        self.tombstones = frozenset(stored_ids.tolist()) - set(self.embedding_index_to_thread)
+        self._tombstone_selector = None
+        self._next_vector_id = max(
+            int(stored_ids.max()) + 1 if len(stored_ids) else 0,
+            max(self.embedding_index_to_thread, default=-1) + 1,
+        )
+        if self.tombstones:
+            logging.info(f"Found {len(self.tombstones)} tombstoned vectors.")
+            self._maybe_compact()
+
+    def _load_model(self):
+        """
+        Load the embedding model and run one warm-up encode, so the first real
+        query does not pay for lazy initialization inside the model.
+        """
+        start = time.perf_counter()
+        model = load_sentence_encoder(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND)
+        model.encode(["warm up"])
+        self.batch_encoder = BatchEncoder(
+            model.encode,
+            executor=executor,
+            max_batch_size=ENCODER_MAX_BATCH_SIZE,
+            max_wait_ms=ENCODER_MAX_WAIT_MS,
+        )
+        self.embedding_model = model
+        logging.info(
+            f"Loaded embedding model {EMBEDDING_MODEL_NAME} ({EMBEDDING_BACKEND}) "
+            f"in {time.perf_counter() - start:.2f}s."
+        )
+
+    async def wait_until_ready(self):
+        """
+        Wait for the background model load started by initialize().
+
+        Raises:
+            RuntimeError: If initialize() has not been called.
+            Exception: Whatever the model load raised, if it failed.
+        """
+        if self._model_future is None:
+            raise RuntimeError("VectorDB is not initialized. Call 'initialize' first.")
+        await asyncio.shield(self._model_future)
+
+    def readiness(self) -> Dict:
+        """
+        Whether search is warm: the index is open and the model is loaded.
+        """
+        model_error = None
+        if self._model_future and self._model_future.done() and self._model_future.exception():
+            model_error = str(self._model_future.exception())
+        return {
+            "ready": self.index is not None and self.embedding_model is not None,
+            "index_loaded": self.index is not None,
+            "index_mmap": self._index_mapped,
+            "model_loaded": self.embedding_model is not None,
+            "model_error": model_error,
+        }
+
+    def _ensure_writable(self):
+        """
+        Copy a memory-mapped index into private memory before its first write;
+        the mapping is read-only. From then on the process holds the whole
+        index in RAM, so the mapping only saves memory until something is
+        indexed. Caller holds the index lock.
+        """
+        if not self._index_mapped:
+            return
+        self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+        apply_search_params(self.index, self.index_params)
+        self._index_mapped = False
+        logging.info("Copied memory-mapped FAISS index into memory for writing.")
 
     async def load_embedding_mapping(self) -> Dict[int, str]:
         """
@@ -59,144 +287,899 @@ class VectorDB:
         rows = await database.fetch_all(query)
         return {row["faiss_index"]: row["thread_id"] for row in rows}
 
-    def save_index(self):
+    async def load_comment_embedding_mapping(self) -> List:
         """
-        Save the FAISS index to disk.
+        Load comment chunk mappings from the database.
+
+        Returns:
+            List: Rows of (faiss_index, comment_id, thread_id).
         """
-        if self.index:
-            faiss.write_index(self.index, INDEX_FILE)
-            logging.info("FAISS index saved to disk.")
+        query = select(
+            comment_embedding_mapping.c.faiss_index,
+            comment_embedding_mapping.c.comment_id,
+            comment_embedding_mapping.c.thread_id,
+        ).order_by(comment_embedding_mapping.c.faiss_index)
+        return await database.fetch_all(query)
+
+    def _map_vector(self, vector_id: int, thread_id: int, comment_id: Optional[int] = None):
+        """
+        Record a live vector in the in-memory mappings.
+        """
+        self.embedding_index_to_thread[vector_id] = thread_id
+        self.thread_vector_ids.setdefault(thread_id, set()).add(vector_id)
+        if comment_id is None:
+            self.thread_to_embedding_index[thread_id] = vector_id
         else:
+            self.embedding_index_to_comment[vector_id] = comment_id
+            self.comment_vector_ids.setdefault(comment_id, []).append(vector_id)
+
+    def _unmap_vector(self, vector_id: int):
+        """
+        Remove a vector from the in-memory mappings.
+        """
+        thread_id = self.embedding_index_to_thread.pop(vector_id, None)
+        if thread_id is None:
+            return
+        thread_vectors = self.thread_vector_ids.get(thread_id)
+        if thread_vectors is not None:
+            thread_vectors.discard(vector_id)
+            if not thread_vectors:
+                del self.thread_vector_ids[thread_id]
+
+        comment_id = self.embedding_index_to_comment.pop(vector_id, None)
+        if comment_id is None:
+            if self.thread_to_embedding_index.get(thread_id) == vector_id:
+                del self.thread_to_embedding_index[thread_id]
+        else:
+            comment_vectors = self.comment_vector_ids.get(comment_id, [])
+            if vector_id in comment_vectors:
+                comment_vectors.remove(vector_id)
+            if not comment_vectors:
+                self.comment_vector_ids.pop(comment_id, None)
+
+    def _wrap_positional_index(self, index: faiss.Index) -> faiss.IndexIDMap2:
+        """
+        Convert an index written before vectors had ids. Each vector's id is its
+        old position, which is what embedding_mapping already stores.
+        """
+        vectors = reconstruct_all(index)
+        wrapped = empty_copy(index)
+        wrapped.add_with_ids(vectors, np.arange(len(vectors), dtype="int64"))
+        logging.info(f"Converted positional FAISS index with {len(vectors)} vectors to an ID-mapped index.")
+        return wrapped
+
+    def replay_log(self):
+        """
+        Re-add logged vectors that are not yet in the loaded snapshot.
+
+        Vector ids are never reused, so a logged id already present in the index
+        is part of the snapshot and replay is idempotent.
+        """
+        ids, vectors = self.vector_log.replay()
+        pending = ~np.isin(ids, index_ids(self.index))
+        if not pending.any():
+            return
+        self._ensure_writable()
+        self.index.add_with_ids(vectors[pending], ids[pending])
+        logging.info(f"Replayed {int(pending.sum())} vectors from {INDEX_LOG_FILE}.")
+
+    def save_index(self):
+        """
+        Snapshot the FAISS index to disk and drop the log records it covers.
+
+        The index is serialized under the index lock, then written to a temporary
+        file and atomically moved over INDEX_FILE, so adds are only blocked for
+        the in-memory copy and a crash never leaves a partial index file.
+        """
+        if not self.index:
             logging.warning("FAISS index is not initialized. Cannot save.")
+            return
+
+        with self._snapshot_lock:
+            with self._index_lock:
+                data = faiss.serialize_index(self.index)
+                params = dict(self.index_params)
+                if self.vector_log:
+                    self.vector_log.rotate()
+
+            tmp_path = f"{INDEX_FILE}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(data.tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, INDEX_FILE)
+            save_index_params(INDEX_PARAMS_FILE, params)
+
+            if self.vector_log:
+                self.vector_log.discard_rotated()
+            logging.info("FAISS index saved to disk.")
+
+    def _maybe_snapshot(self):
+        """
+        Start a background snapshot once enough vectors have been logged.
+        """
+        if self.vector_log.records < VECTOR_SNAPSHOT_EVERY:
+            return
+        if self._snapshot_future and not self._snapshot_future.done():
+            return
+        loop = asyncio.get_event_loop()
+        self._snapshot_future = loop.run_in_executor(executor, self.save_index)
+
+    async def _snapshot_periodically(self):
+        """
+        Snapshot logged vectors every VECTOR_SNAPSHOT_INTERVAL_SECONDS.
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(VECTOR_SNAPSHOT_INTERVAL_SECONDS)
+            if self.vector_log.records:
+                try:
+                    await loop.run_in_executor(executor, self.save_index)
+                except Exception as e:
+                    logging.error(f"Periodic FAISS snapshot failed: {e}")
+
+    def _search_params(self, selector: Optional[faiss.IDSelector] = None, widen: int = 1) -> faiss.SearchParameters:
+        """
+        Search parameters that exclude tombstoned vectors. Backends that cannot
+        take a selector get plain parameters; see _drop_excluded.
+
+        Args:
+            selector (Optional[faiss.IDSelector]): Selector to use instead of the
+                tombstone filter; it must exclude tombstones itself.
+            widen (int): Multiplier for nprobe/efSearch on retried searches.
+        """
+        params = self.index_params
+        if widen > 1:
+            nprobe = (params.get("nprobe") or 1) * widen
+            params = {
+                **params,
+                "nprobe": min(nprobe, params["nlist"]) if params.get("nlist") else nprobe,
+                "ef_search": (params.get("ef_search") or 16) * widen,
+            }
+        if not supports_selectors(params["index_type"]):
+            return search_parameters(params)
+        if selector is not None:
+            return search_parameters(params, selector)
+        tombstones = self.tombstones
+        if not tombstones:
+            return search_parameters(params)
+        cached = self._tombstone_selector
+        if cached is None or cached[0] is not tombstones:
+            # Keep the batch selector referenced; IDSelectorNot only holds a pointer to it
+            batch = faiss.IDSelectorBatch(np.fromiter(tombstones, dtype="int64"))
+            cached = (tombstones, batch, faiss.IDSelectorNot(batch))
+            self._tombstone_selector = cached
+        return search_parameters(params, cached[2])
+
+    def _drop_excluded(
+        self, distances: np.ndarray, indices: np.ndarray, selector: Optional[faiss.IDSelector] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Drop the hits a selector (by default, the tombstone filter) would have
+        excluded, for backends that cannot apply it during the search.
+        """
+        tombstones = self.tombstones
+        keep = np.array([
+            vector_id != -1 and (
+                selector.is_member(vector_id) if selector is not None else vector_id not in tombstones
+            )
+            for vector_id in indices.tolist()
+        ], dtype=bool)
+        return distances[keep], indices[keep]
+
+    def _add_tombstones(self, vector_ids: List[int]):
+        with self._index_lock:
+            self.tombstones = self.tombstones | frozenset(vector_ids)
+
+    def compact(self):
+        """
+        Physically drop tombstoned vectors by re-adding the live vectors to an
+        empty copy of the index (training is kept), then snapshot it.
+        """
+        with self._index_lock:
+            if not self.tombstones:
+                return
+            # empty_copy resets a clone, which a read-only mapping does not allow
+            self._ensure_writable()
+            ids = index_ids(self.index)
+            live = ~np.isin(ids, np.fromiter(self.tombstones, dtype="int64"))
+            vectors = reconstruct_all(self.index)[live]
+            compacted = empty_copy(self.index)
+            compacted.add_with_ids(vectors, ids[live])
+            apply_search_params(compacted, self.index_params)
+            removed = len(ids) - int(live.sum())
+            self.index = compacted
+            self._index_mapped = False
+            self.tombstones = frozenset()
+            self._tombstone_selector = None
+        logging.info(f"Compacted FAISS index: removed {removed} tombstoned vectors.")
+        self.save_index()
+
+    def _maybe_compact(self):
+        """
+        Start a background compaction once tombstones make up VECTOR_COMPACT_RATIO of the index.
+        """
+        if not self.tombstones or len(self.tombstones) < VECTOR_COMPACT_RATIO * self.index.ntotal:
+            return
+        if self._compaction_future and not self._compaction_future.done():
+            return
+        loop = asyncio.get_event_loop()
+        self._compaction_future = loop.run_in_executor(executor, self.compact)
+
+    async def close(self):
+        """
+        Stop background snapshots and write a final snapshot if anything is logged.
+        """
+        if self.batch_encoder:
+            await self.batch_encoder.close()
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+        if self._compaction_future:
+            await self._compaction_future
+        if self._snapshot_future:
+            await self._snapshot_future
+        if self.vector_log:
+            if self.vector_log.records:
+                self.save_index()
+            self.vector_log.close()
+
+    async def rebuild_index(self, index_type: str, **params):
+        """
+        Rebuild the FAISS index as a different backend, e.g. to move an existing
+        flat index over to HNSW or IVF.
+
+        Live vectors are re-added under the same ids, so embedding_mapping is
+        unchanged. Exact vectors from embedding_vectors are used where stored,
+        so moving off a compressed backend does not carry its quantization
+        error along. Tombstones are dropped.
+
+        Args:
+            index_type (str): Target backend, one of INDEX_FACTORY_STRINGS.
+            **params: Overrides for index parameters such as nlist, nprobe, ef_search.
+        """
+        if not self.index:
+            raise RuntimeError("VectorDB is not initialized. Call 'initialize' first.")
+
+        exact = await self.fetch_exact_vectors()
+
+        def _rebuild():
+            # Hold the index lock throughout so no add lands in the old index
+            with self._index_lock:
+                ids = index_ids(self.index)
+                live = ~np.isin(ids, np.fromiter(self.tombstones, dtype="int64"))
+                vectors = self._with_exact_vectors(reconstruct_all(self.index)[live], ids[live], exact)
+                if len(vectors) < min_training_points(index_type):
+                    raise ValueError(
+                        f"Index type '{index_type}' needs at least {min_training_points(index_type)} "
+                        f"vectors to train; the index has {len(vectors)}."
+                    )
+                new_params = {**self.index_params, "nlist": None, **params, "index_type": index_type}
+                base = create_index(DIMENSIONS, new_params, n_vectors=len(vectors))
+                train_index(base, vectors)
+                new_index = faiss.IndexIDMap2(base)
+                new_index.add_with_ids(vectors, ids[live])
+                self.index, self.index_params = new_index, new_params
+                self._index_mapped = False
+                self.tombstones = frozenset()
+                self._tombstone_selector = None
+                self.generation += 1
+            self.save_index()
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(executor, _rebuild)
+        logging.info(f"Rebuilt FAISS index as {index_type} with {self.index.ntotal} vectors.")
+
+    @staticmethod
+    def _with_exact_vectors(vectors: np.ndarray, ids: np.ndarray, exact: Dict[int, np.ndarray]) -> np.ndarray:
+        """
+        Overwrite reconstructed rows with their stored exact vectors, where there is one.
+        """
+        for row, vector_id in enumerate(ids.tolist()):
+            vector = exact.get(vector_id)
+            if vector is not None:
+                vectors[row] = vector
+        return vectors
+
+    async def fetch_exact_vectors(self, vector_ids: Optional[List[int]] = None) -> Dict[int, np.ndarray]:
+        """
+        Load exact vectors from embedding_vectors.
+
+        Args:
+            vector_ids (Optional[List[int]]): Vector ids to load, or None for all.
+
+        Returns:
+            Dict[int, np.ndarray]: Vectors by id; ids without a stored vector are absent.
+        """
+        query = select(embedding_vectors.c.faiss_index, embedding_vectors.c.vector)
+        if vector_ids is not None:
+            if not vector_ids:
+                return {}
+            query = query.where(embedding_vectors.c.faiss_index.in_(vector_ids))
+        rows = await database.fetch_all(query)
+        return {row["faiss_index"]: np.frombuffer(row["vector"], dtype="float32") for row in rows}
+
+    async def rerank(
+        self, query_vector: np.ndarray, distances: np.ndarray, vector_ids: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Replace approximate distances from a compressed index with exact ones.
+
+        Candidates without a stored exact vector keep their approximate distance.
+
+        Args:
+            query_vector (np.ndarray): Query embedding of shape (DIMENSIONS,).
+            distances (np.ndarray): Approximate distances from the index.
+            vector_ids (np.ndarray): Candidate ids from the index (-1 for no result).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (distances, vector_ids), nearest first.
+        """
+        found = vector_ids != -1
+        distances, vector_ids = distances[found], vector_ids[found]
+        exact = await self.fetch_exact_vectors(vector_ids.tolist())
+        if not exact:
+            return distances, vector_ids
+
+        has_exact = np.array([vector_id in exact for vector_id in vector_ids.tolist()])
+        exact_distances, exact_ids = rerank_exact(
+            query_vector,
+            vector_ids[has_exact],
+            np.stack([exact[vector_id] for vector_id in vector_ids[has_exact].tolist()]),
+            len(vector_ids),
+        )
+        distances = np.concatenate([exact_distances, distances[~has_exact]])
+        vector_ids = np.concatenate([exact_ids, vector_ids[~has_exact]])
+        order = np.argsort(distances, kind="stable")
+        return distances[order], vector_ids[order]
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """
+        Update and persist query-time search parameters.
+        """
+        if nprobe is not None:
+            self.index_params["nprobe"] = nprobe
+        if ef_search is not None:
+            self.index_params["ef_search"] = ef_search
+        apply_search_params(self.index, self.index_params)
+        save_index_params(INDEX_PARAMS_FILE, self.index_params)
+        self.generation += 1
+
+    async def evaluate(self, k: int = 10, n_queries: int = 100) -> Dict:
+        """
+        Report recall@k, search latency and bytes per vector of the current
+        index, using a sample of stored vectors as queries.
+
+        Ground truth uses the exact vectors in embedding_vectors where stored
+        (reconstructed ones otherwise), and compressed indexes are measured
+        with the same re-ranking pass search uses.
+        """
+        if not self.index:
+            raise RuntimeError("VectorDB is not initialized. Call 'initialize' first.")
+        if self.index.ntotal == 0:
+            raise ValueError("The FAISS index is empty.")
+
+        exact = await self.fetch_exact_vectors()
+        index_type = self.index_params["index_type"]
+        rerank_factor = VECTOR_RERANK_FACTOR if is_compressed(index_type) else 0
+
+        def _evaluate():
+            ids = index_ids(self.index)
+            vectors = self._with_exact_vectors(reconstruct_all(self.index), ids, exact)
+            rng = np.random.default_rng(0)
+            sample = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+            report = evaluate_index(
+                self.index, vectors, vectors[sample], min(k, len(vectors)), ids=ids, rerank_factor=rerank_factor
+            )
+            return {"index_type": index_type, "ntotal": self.index.ntotal, "rerank_factor": rerank_factor, **report}
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(executor, _evaluate)
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, serving repeated texts from the embedding cache and sending
+        the rest through the batching encoder.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), DIMENSIONS).
+        """
+        if self.embedding_model is None:
+            await self.wait_until_ready()
+
+        if self.embedding_cache is None:
+            return await self.batch_encoder.encode(texts)
+
+        loop = asyncio.get_event_loop()
+        vectors = await loop.run_in_executor(executor, self.embedding_cache.lookup, EMBEDDING_CACHE_KEY, texts)
+
+        # Encode each distinct missing text once
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            encoded = await self.batch_encoder.encode(missing)
+            await loop.run_in_executor(executor, self.embedding_cache.store, EMBEDDING_CACHE_KEY, missing, encoded)
+            by_text = dict(zip(missing, encoded))
+            vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return np.stack(vectors)
+
+    async def _add_vectors(self, embeddings: np.ndarray) -> List[int]:
+        """
+        Log and add embeddings to FAISS under freshly allocated ids.
+
+        Returns:
+            List[int]: The new vector ids, one per embedding.
+        """
+        # Blocking operation, run under the index lock
+        def _add_embeddings(embeddings: np.ndarray) -> np.ndarray:
+            with self._index_lock:
+                vector_ids = np.arange(self._next_vector_id, self._next_vector_id + len(embeddings), dtype="int64")
+                self._next_vector_id += len(embeddings)
+                self._ensure_writable()
+                self.vector_log.append(vector_ids, embeddings)
+                self.index.add_with_ids(embeddings, vector_ids)
+            logging.info(f"Added {len(embeddings)} embeddings to FAISS index.")
+            return vector_ids
+
+        # Offload FAISS add operation to the executor
+        loop = asyncio.get_event_loop()
+        return (await loop.run_in_executor(executor, _add_embeddings, embeddings)).tolist()
+
+    async def _retire_vectors(self, vector_ids: List[int]):
+        """
+        Drop vectors from the in-memory mappings and tombstone them.
+        """
+        if not vector_ids:
+            return
+        for vector_id in vector_ids:
+            self._unmap_vector(vector_id)
+        self.generation += 1
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(executor, self._add_tombstones, vector_ids)
+        self._maybe_compact()
 
     async def add_to_index_bulk(self, thread_ids: List[int], texts: List[str]):
         """
-        Asynchronously add multiple embeddings to the FAISS index and update the mapping.
+        Asynchronously embed threads and add or replace their vectors in the index.
+
+        Each vector gets a new id. A thread that was already indexed has its old
+        vector tombstoned, so re-embedding is an update rather than a duplicate.
 
         Args:
-            thread_ids (List[str]): List of thread IDs associated with the texts.
+            thread_ids (List[int]): List of thread IDs associated with the texts.
             texts (List[str]): List of texts to embed and store.
         """
         if len(thread_ids) != len(texts):
             raise ValueError("The number of thread_ids must match the number of texts.")
 
-        if not self.embedding_model or not self.index:
+        if not self.index:
             raise RuntimeError("VectorDB is not initialized. Call 'initialize' first.")
 
+        # Only the last text for a repeated thread id is kept
+        latest = dict(zip(thread_ids, texts))
+        thread_ids, texts = list(latest), list(latest.values())
+
         # Encode texts to embeddings asynchronously
-        loop = asyncio.get_event_loop()
-        embeddings = await loop.run_in_executor(executor, self.embedding_model.encode, texts)
-        embeddings = np.array(embeddings, dtype="float32")
+        embeddings = await self.encode(texts)
+        vector_ids = await self._add_vectors(embeddings)
 
-        # Add embeddings to FAISS (blocking operation)
-        def _add_embeddings(embeddings: np.ndarray):
-            self.index.add(embeddings)
-            logging.info(f"Added {len(texts)} embeddings to FAISS index.")
+        # Replace the mappings and exact vectors of re-embedded threads in one transaction
+        replaced = [self.thread_to_embedding_index[t] for t in thread_ids if t in self.thread_to_embedding_index]
+        async with database.transaction():
+            if replaced:
+                await database.execute(
+                    embedding_mapping.delete().where(embedding_mapping.c.thread_id.in_(thread_ids))
+                )
+                await database.execute(
+                    embedding_vectors.delete().where(embedding_vectors.c.faiss_index.in_(replaced))
+                )
+            await database.execute_many(
+                embedding_mapping.insert(),
+                [{"faiss_index": v, "thread_id": t} for v, t in zip(vector_ids, thread_ids)],
+            )
+            await database.execute_many(
+                embedding_vectors.insert(),
+                [{"faiss_index": v, "vector": e.tobytes()} for v, e in zip(vector_ids, embeddings)],
+            )
+        logging.info(f"Updated embedding_mapping for {len(thread_ids)} threads.")
 
-        # Offload FAISS add operation to the executor
-        await loop.run_in_executor(executor, _add_embeddings, embeddings)
+        # Update in-memory mapping
+        await self._retire_vectors(replaced)
+        for thread_id, vector_id in zip(thread_ids, vector_ids):
+            self._map_vector(vector_id, thread_id)
+        self.generation += 1
+
+        # The vectors are durable in the log; snapshot the full index only occasionally
+        self._maybe_snapshot()
+
+    async def add_comments_bulk(self, comment_ids: List[int], thread_ids: List[int], texts: List[str]):
+        """
+        Embed comments chunk by chunk and add or replace their vectors.
+
+        Long comments are split into overlapping word windows. A comment that
+        was already indexed has all of its old chunk vectors tombstoned.
+
+        Args:
+            comment_ids (List[int]): Comments to index.
+            thread_ids (List[int]): Thread of each comment; matching chunks rank the thread.
+            texts (List[str]): Comment texts.
+        """
+        if not (len(comment_ids) == len(thread_ids) == len(texts)):
+            raise ValueError("comment_ids, thread_ids and texts must have the same length.")
+
+        if not self.index:
+            raise RuntimeError("VectorDB is not initialized. Call 'initialize' first.")
+
+        # Only the last text for a repeated comment id is kept
+        latest = {comment_id: (thread_id, text) for comment_id, thread_id, text in zip(comment_ids, thread_ids, texts)}
+        chunks = [
+            (comment_id, thread_id, chunk_no, chunk)
+            for comment_id, (thread_id, text) in latest.items()
+            for chunk_no, chunk in enumerate(chunk_text(text, COMMENT_CHUNK_WORDS, COMMENT_CHUNK_OVERLAP))
+        ]
+
+        vector_ids: List[int] = []
+        if chunks:
+            embeddings = await self.encode([chunk for _, _, _, chunk in chunks])
+            vector_ids = await self._add_vectors(embeddings)
 
-        # Calculate starting index for new embeddings
-        current_index = self.index.ntotal - len(texts)
+        # Replace the comments' chunk mappings and exact vectors in one transaction
+        replaced = [v for comment_id in latest for v in self.comment_vector_ids.get(comment_id, [])]
+        async with database.transaction():
+            if replaced:
+                await database.execute(
+                    comment_embedding_mapping.delete().where(comment_embedding_mapping.c.comment_id.in_(list(latest)))
+                )
+                await database.execute(
+                    embedding_vectors.delete().where(embedding_vectors.c.faiss_index.in_(replaced))
+                )
+            if chunks:
+                await database.execute_many(
+                    comment_embedding_mapping.insert(),
+                    [
+                        {"faiss_index": v, "comment_id": c, "thread_id": t, "chunk": n}
+                        for v, (c, t, n, _) in zip(vector_ids, chunks)
+                    ],
+                )
+                await database.execute_many(
+                    embedding_vectors.insert(),
+                    [{"faiss_index": v, "vector": e.tobytes()} for v, e in zip(vector_ids, embeddings)],
+                )
+        logging.info(f"Indexed {len(latest)} comments as {len(chunks)} chunks.")
 
         # Update in-memory mapping
-        for i, thread_id in enumerate(thread_ids):
-            faiss_idx = current_index + i
-            self.embedding_index_to_thread[faiss_idx] = thread_id
-
-        # Update the database with new mappings asynchronously
-        async def _update_mapping_db():
-            async with database.transaction():
-                for i, thread_id in enumerate(thread_ids):
-                    faiss_idx = current_index + i
-                    insert_query = embedding_mapping.insert().values(
-                        faiss_index=faiss_idx,
-                        thread_id=thread_id
-                    )
-                    await database.execute(insert_query)
-            logging.info(f"Updated embedding_mapping for {len(thread_ids)} threads.")
+        await self._retire_vectors(replaced)
+        for vector_id, (comment_id, thread_id, _, _) in zip(vector_ids, chunks):
+            self._map_vector(vector_id, thread_id, comment_id)
+        self.generation += 1
 
-        await _update_mapping_db()
+        self._maybe_snapshot()
 
-        # Save the updated FAISS index
-        self.save_index()
+    async def delete_comments(self, comment_ids: List[int]):
+        """
+        Remove comments from the index. Their chunk mappings are deleted and
+        their vectors tombstoned until the next compaction.
 
-    async def search_embeddings(self, query: str, k: int = 5) -> List[Dict]:
+        Args:
+            comment_ids (List[int]): Comments to remove; unindexed ids are ignored.
+        """
+        vector_ids = [v for comment_id in comment_ids for v in self.comment_vector_ids.get(comment_id, [])]
+        if not vector_ids:
+            return
+
+        async with database.transaction():
+            await database.execute(
+                comment_embedding_mapping.delete().where(comment_embedding_mapping.c.faiss_index.in_(vector_ids))
+            )
+            await database.execute(
+                embedding_vectors.delete().where(embedding_vectors.c.faiss_index.in_(vector_ids))
+            )
+        await self._retire_vectors(vector_ids)
+        logging.info(f"Removed {len(vector_ids)} comment chunks from the FAISS index.")
+
+    async def delete_threads(self, thread_ids: List[int]):
+        """
+        Remove threads, including their comment chunks, from the index. Their
+        mappings are deleted and their vectors tombstoned until the next compaction.
+
+        Args:
+            thread_ids (List[int]): Threads to remove; unknown ids are ignored.
+        """
+        vector_ids = [v for thread_id in thread_ids for v in self.thread_vector_ids.get(thread_id, ())]
+        if not vector_ids:
+            return
+
+        async with database.transaction():
+            await database.execute(
+                embedding_mapping.delete().where(embedding_mapping.c.faiss_index.in_(vector_ids))
+            )
+            await database.execute(
+                comment_embedding_mapping.delete().where(comment_embedding_mapping.c.faiss_index.in_(vector_ids))
+            )
+            await database.execute(
+                embedding_vectors.delete().where(embedding_vectors.c.faiss_index.in_(vector_ids))
+            )
+        await self._retire_vectors(vector_ids)
+        logging.info(f"Removed {len(vector_ids)} vectors of {len(thread_ids)} threads from the FAISS index.")
+
+    def stats(self) -> Dict:
+        """
+        Size and maintenance state of the index.
+        """
+        return {
+            "index_type": self.index_params.get("index_type"),
+            "vectors": self.index.ntotal if self.index else 0,
+            "live_vectors": len(self.embedding_index_to_thread),
+            "comment_vectors": len(self.embedding_index_to_comment),
+            "tombstones": len(self.tombstones),
+            "logged_since_snapshot": self.vector_log.records if self.vector_log else 0,
+        }
+
+    async def search_embeddings(
+        self, query: str, k: int = 5, min_approvals: int = 0, hide_flagged: bool = False
+    ) -> List[Dict]:
         """
         Asynchronously search the FAISS index for the most relevant embeddings
         and adjust scores based on feedback.
 
+        Feedback filters are applied inside the FAISS search through an ID
+        selector, so a strict filter still yields k results when enough threads
+        qualify. Backends that cannot take a selector (pq) drop the excluded
+        hits afterwards and rely on the widening below. A min_approvals
+        allow-list of at most VECTOR_EXACT_SEARCH_MAX_IDS vectors is scored
+        exactly instead, since an approximate search finds few of them. Hits are collapsed to one per thread, and a thread's comment
+        chunks can take many candidate slots. Whenever fewer than k threads come
+        back, the candidate count is doubled and the search repeated until k
+        threads are found, the index has nothing more to give or
+        VECTOR_SEARCH_MAX_CANDIDATES are fetched. nprobe/efSearch are widened
+        along with it, up to SEARCH_MAX_ROUNDS times.
+
         Args:
             query (str): The query to embed and search.
             k (int): Number of top results to return.
+            min_approvals (int): Only return threads with at least this many approvals.
+            hide_flagged (bool): Exclude threads that have been flagged.
 
         Returns:
             List[Dict]: List of retrieved metadata (thread_id, text, adjusted_distance, flags, approvals).
         """
 
-        if not self.embedding_model or not self.index:
+        if not self.index:
             raise RuntimeError("VectorDB is not initialized. Call 'initialize' first.")
 
         loop = asyncio.get_event_loop()
 
         # Encode the query asynchronously
-        query_embedding = await loop.run_in_executor(executor, self.embedding_model.encode, [query])
-        query_embedding = np.array(query_embedding, dtype="float32")
+        query_embedding = await self.encode([query])
 
-        # Define a blocking function for FAISS search
-        def _search(query_embedding: np.ndarray, k: int):
-            distances, indices = self.index.search(query_embedding, k)
-            return distances, indices
+        filtered = min_approvals > 0 or hide_flagged
+        selector = await self._feedback_selector(min_approvals, hide_flagged) if filtered else None
+        if filtered and selector is None:
+            return []
 
-        # Offload FAISS search to the executor
-        distances, indices = await loop.run_in_executor(executor, _search, query_embedding, k)
+        def passes(result: Dict) -> bool:
+            # Feedback may have changed since the selector was built
+            return result["approvals"] >= min_approvals and not (hide_flagged and result["flags"] > 0)
 
-        results = []
-        for distance, idx in zip(distances[0], indices[0]):
+        index_type = self.index_params["index_type"]
+        rerank = VECTOR_RERANK_FACTOR > 0 and is_compressed(index_type)
+        allowed = selector[0] if min_approvals > 0 else None
+        exact = None
+        if allowed is not None and len(allowed) <= VECTOR_EXACT_SEARCH_MAX_IDS:
+            exact = await self._search_exact(query_embedding[0], allowed)
+        if exact is not None:
+            results = [result for result in await self._hydrate_hits(*exact) if passes(result)]
+            return sorted(results, key=lambda x: x["adjusted_distance"])[:k]
+
+        # Compressed indexes over-fetch candidates for exact re-ranking, and
+        # comment chunks for collapsing to threads
+        fetch_k = k * VECTOR_RERANK_FACTOR if rerank else k
+        if self.embedding_index_to_comment:
+            fetch_k *= CHUNK_OVERFETCH
+        approximate = index_type == "hnsw" or index_type.startswith("ivf")
+
+        # Define a blocking function for FAISS search, skipping tombstoned vectors
+        def _search(query_embedding: np.ndarray, k: int, widen: int):
+            params = self._search_params(selector[-1] if selector else None, widen)
+            distances, indices = self.index.search(query_embedding, k, params=params)
+            distances, indices = distances[0], indices[0]
+            found = int((indices != -1).sum())
+            if not supports_selectors(index_type):
+                distances, indices = self._drop_excluded(distances, indices, selector[-1] if selector else None)
+            return distances, indices, found
+
+        widen = 1
+        rounds = 1
+        while True:
+            limit = min(self.index.ntotal, VECTOR_SEARCH_MAX_CANDIDATES)
+            fetch_k = min(fetch_k, limit)
+            # Offload FAISS search to the executor
+            distances, indices, found = await loop.run_in_executor(
+                executor, _search, query_embedding, max(fetch_k, 1), widen
+            )
+            if rerank:
+                distances, indices = await self.rerank(query_embedding[0], distances, indices)
+
+            results = await self._hydrate_hits(distances, indices)
+            if filtered:
+                results = [result for result in results if passes(result)]
+
+            # Stop once the page has k threads, the index has nothing more to
+            # give or the candidate cap is reached
+            exhausted = fetch_k >= limit or (found < fetch_k and not approximate)
+            if len(results) >= k or exhausted:
+                break
+            fetch_k *= 2
+            if rounds < SEARCH_MAX_ROUNDS:
+                widen *= 2
+                rounds += 1
+
+        # Sort results by adjusted distance
+        sorted_results = sorted(results, key=lambda x: x["adjusted_distance"])
+
+        # Return top k results
+        return sorted_results[:k]
+
+    async def _search_exact(self, query_vector: np.ndarray, vector_ids: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Score a small set of vectors by exact distance to the query.
+
+        Exact vectors come from embedding_vectors, and vectors without one are
+        reconstructed from the index.
+
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray]]: (distances, vector_ids), nearest
+            first, or None if some vector can be neither loaded nor reconstructed.
+        """
+        exact = await self.fetch_exact_vectors(vector_ids.tolist())
+        missing = [vector_id for vector_id in vector_ids.tolist() if vector_id not in exact]
+        if missing:
+            def _reconstruct():
+                with self._index_lock:
+                    return {vector_id: self.index.reconstruct(vector_id) for vector_id in missing}
+
+            loop = asyncio.get_event_loop()
+            try:
+                exact.update(await loop.run_in_executor(executor, _reconstruct))
+            except RuntimeError:
+                # e.g. IVF indexes without a direct map
+                return None
+        return rerank_exact(query_vector, vector_ids, np.stack([exact[v] for v in vector_ids.tolist()]), len(vector_ids))
+
+    async def _hydrate_hits(self, distances: np.ndarray, indices: np.ndarray) -> List[Dict]:
+        """
+        Turn raw FAISS hits into scored thread results.
+        """
+        # Map vector ids to thread IDs, keeping the best distance per thread
+        hits: Dict[int, float] = {}
+        for distance, idx in zip(distances, indices):
             if idx == -1:
                 continue  # No more results
-
-            thread_id = self.embedding_index_to_thread.get(idx)
+            thread_id = self.embedding_index_to_thread.get(int(idx))
             if not thread_id:
                 continue  # Mapping not found
+            if thread_id not in hits or distance < hits[thread_id]:
+                hits[thread_id] = float(distance)
 
-            # Fetch context text from the database asynchronously
-            query_conversation = select([threads.c.id, threads.c.text]).where(
-                threads.c.id == thread_id
-            )
-            conversation = await database.fetch_one(query_conversation)
-            if not conversation:
-                continue  # Conversation not found
+        # Hydrate all hits with a single query
+        metadata = await self.fetch_thread_metadata(list(hits))
 
-            # Fetch feedback for this context asynchronously
-            query_feedback = select([feedback.c.flags, feedback.c.approvals]).where(
-                feedback.c.context_id == thread_id
-            )
-            feedback_data = await database.fetch_one(query_feedback)
+        results = []
+        for thread_id, distance in hits.items():
+            thread = metadata.get(thread_id)
+            if not thread:
+                continue  # Thread not found
 
-            flags = feedback_data["flags"] if feedback_data else 0
-            approvals = feedback_data["approvals"] if feedback_data else 0
+            flags = thread["flags"]
+            approvals = thread["approvals"]
 
             # Adjust scores based on feedback (simple penalty/boost)
             adjusted_distance = distance + (flags * 0.1) - (approvals * 0.05)
 
             results.append({
                 "thread_id": thread_id,
-                "text": conversation["text"],
+                "text": thread["text"],
                 "adjusted_distance": adjusted_distance,
                 "flags": flags,
                 "approvals": approvals
             })
+        return results
 
-        # Sort results by adjusted distance
-        sorted_results = sorted(results, key=lambda x: x["adjusted_distance"])
+    async def _feedback_selector(self, min_approvals: int, hide_flagged: bool) -> Optional[Tuple]:
+        """
+        Build an ID selector for the feedback filters.
 
-        # Return top k results
-        return sorted_results[:k]
+        With min_approvals the qualifying threads are few, so their vectors are
+        allow-listed. With only hide_flagged, the flagged threads' vectors are
+        deny-listed along with the tombstones.
+
+        Returns:
+            Optional[Tuple]: Selector objects; search with the last one. The others
+            must stay referenced because FAISS selectors only hold pointers to
+            them. An allow-list starts with the array of allowed vector ids.
+            None if no indexed thread has enough approvals.
+        """
+        if self.feedback_snapshot is not None and self.feedback_snapshot.loaded:
+            counts = self.feedback_snapshot.counts.items()
+        else:
+            condition = feedback.c.approvals >= min_approvals if min_approvals > 0 else feedback.c.flags > 0
+            rows = await database.fetch_all(
+                select(feedback.c.context_id, feedback.c.flags, feedback.c.approvals).where(condition)
+            )
+            counts = ((row["context_id"], (row["flags"] or 0, row["approvals"] or 0)) for row in rows)
+
+        def keep(flags: int, approvals: int) -> bool:
+            if min_approvals > 0:
+                return approvals >= min_approvals and not (hide_flagged and flags > 0)
+            return flags > 0
+
+        # Cover the thread's own vector and its comment chunks
+        vector_ids = [
+            vector_id
+            for context_id, (flags, approvals) in counts
+            if keep(flags, approvals) and str(context_id).isdigit()
+            for vector_id in self.thread_vector_ids.get(int(context_id), ())
+        ]
+
+        if min_approvals > 0:
+            if not vector_ids:
+                return None
+            allowed = np.array(vector_ids, dtype="int64")
+            return allowed, faiss.IDSelectorBatch(allowed)
+        batch = faiss.IDSelectorBatch(np.array(vector_ids + list(self.tombstones), dtype="int64"))
+        return batch, faiss.IDSelectorNot(batch)
+
+    async def fetch_thread_metadata(self, thread_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Fetch text and feedback counts for a set of threads in one round-trip.
+
+        Feedback comes from the in-memory snapshot when one is configured,
+        otherwise it is LEFT JOINed from the feedback table.
+
+        Args:
+            thread_ids (List[int]): Threads to hydrate.
+
+        Returns:
+            Dict[int, Dict]: Mapping of thread_id to {"text", "flags", "approvals"}.
+        """
+        if not thread_ids:
+            return {}
+
+        use_snapshot = self.feedback_snapshot is not None and self.feedback_snapshot.loaded
+        if use_snapshot:
+            query = select(
+                threads.c.id, threads.c.title, threads.c.description
+            ).where(threads.c.id.in_(thread_ids))
+        else:
+            query = select(
+                threads.c.id,
+                threads.c.title,
+                threads.c.description,
+                feedback.c.flags,
+                feedback.c.approvals,
+            ).select_from(
+                threads.outerjoin(feedback, feedback.c.context_id == cast(threads.c.id, String))
+            ).where(threads.c.id.in_(thread_ids))
+
+        rows = await database.fetch_all(query)
+
+        metadata = {}
+        for row in rows:
+            if use_snapshot:
+                flags, approvals = self.feedback_snapshot.get(row["id"])
+            else:
+                flags, approvals = row["flags"] or 0, row["approvals"] or 0
+            text = row["title"]
+            if row["description"]:
+                text = f"{text}\n{row['description']}"
+            metadata[row["id"]] = {"text": text, "flags": flags, "approvals": approvals}
+        return metadata
 
     async def index_conversation(self, thread_id: int, text: str) -> Dict:
         """
-        Asynchronously index a new conversation by generating and storing its embedding.
+        Asynchronously index a conversation by generating and storing its embedding,
+        replacing any previous embedding of the same thread.
 
         Args:
             thread_id (int): Unique identifier for the conversation.
@@ -0,0 +1,142 @@
+# embeddings/vector_log.py
+
+"""
+Vector Write-Ahead Log
+
+This module implements the append-only log of vectors added to the FAISS index
+since its last snapshot. Appends cost O(batch) instead of rewriting the whole
+index file, and the log is replayed on top of the snapshot at startup.
+
+Each record is a little-endian int64 vector id followed by the float32 vector.
+A torn record at the end of the file (crash mid-append) is ignored on replay.
+
+Vector ids are allocated in memory by the process that owns the log, so only
+one process may write it. The log holds an exclusive lock on `path + ".lock"`
+while open, and a second process opening it fails instead of interleaving
+records and reusing ids.
+"""
+
+import fcntl
+import logging
+import os
+import threading
+from typing import Tuple
+
+import numpy as np
+
+
+class VectorLog:
+    def __init__(self, path: str, dimensions: int, fsync: bool = True):
+        """
+        Open (or create) the log at `path`.
+
+        Args:
+            path (str): Log file path. The rotated log lives at `path + ".1"`.
+            dimensions (int): Vector dimensionality.
+            fsync (bool): Fsync after every append for durability.
+
+        Raises:
+            RuntimeError: If another process has the log open.
+        """
+        self.path = path
+        self.rotated_path = f"{path}.1"
+        self.lock_path = f"{path}.lock"
+        self._lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise RuntimeError(
+                f"{path} is in use by another process. The vector index supports a "
+                f"single writer; run one worker process."
+            )
+        self.dimensions = dimensions
+        self.fsync = fsync
+        self.record_dtype = np.dtype([("id", "<i8"), ("vector", "<f4", (dimensions,))])
+        self._lock = threading.Lock()
+        self._truncate_torn_record(self.path)
+        self._file = open(self.path, "ab")
+        self.records = os.path.getsize(self.path) // self.record_dtype.itemsize
+
+    def _truncate_torn_record(self, path: str):
+        """
+        Drop a partial record left at the end of the file by a crash, so new
+        appends start on a record boundary.
+        """
+        if not os.path.exists(path):
+            return
+        size = os.path.getsize(path)
+        torn = size % self.record_dtype.itemsize
+        if torn:
+            logging.warning(f"Truncating torn record at the end of {path}.")
+            with open(path, "r+b") as file:
+                file.truncate(size - torn)
+
+    def append(self, ids: np.ndarray, vectors: np.ndarray):
+        """
+        Append a batch of vectors to the log.
+
+        Args:
+            ids (np.ndarray): Vector ids, one per row of `vectors`.
+            vectors (np.ndarray): float32 array of shape (n, dimensions).
+        """
+        batch = np.empty(len(ids), dtype=self.record_dtype)
+        batch["id"] = ids
+        batch["vector"] = vectors
+        with self._lock:
+            self._file.write(batch.tobytes())
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.records += len(batch)
+
+    def rotate(self):
+        """
+        Move the current records aside so a snapshot can be taken while new
+        appends go to a fresh log. Records left over from an earlier, unfinished
+        snapshot are kept in front of the new ones.
+        """
+        with self._lock:
+            self._file.close()
+            if os.path.exists(self.rotated_path):
+                with open(self.rotated_path, "ab") as rotated, open(self.path, "rb") as current:
+                    rotated.write(current.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.rotated_path)
+            self._file = open(self.path, "ab")
+            self.records = 0
+
+    def discard_rotated(self):
+        """
+        Delete the rotated log once the snapshot containing it is on disk.
+        """
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+    def replay(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Read every complete record, rotated log first.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (ids, vectors) in append order.
+        """
+        chunks = []
+        for path in (self.rotated_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as file:
+                data = file.read()
+            usable = len(data) - len(data) % self.record_dtype.itemsize
+            if usable != len(data):
+                logging.warning(f"Ignoring torn record at the end of {path}.")
+            chunks.append(np.frombuffer(data[:usable], dtype=self.record_dtype))
+
+        records = np.concatenate(chunks) if chunks else np.empty(0, dtype=self.record_dtype)
+        return records["id"].copy(), records["vector"].copy()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
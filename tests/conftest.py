@@ -0,0 +1,42 @@
+# tests/conftest.py
+
+"""
+Shared Test Fixtures
+
+This file contains fixtures shared by the test modules that need a migrated
+chatweaver database.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+
+import backend.database
+from backend.database import metadata, writes
+from backend.database.migrations import run_migrations
+from backend.database.pool import SQLitePool
+from backend.services import bulk_import
+from embeddings.indexing import incremental_indexer
+from embeddings.retrieval import lexical_retrieval
+
+# Modules that bind `database` at import time and use it directly
+DATABASE_USERS = [backend.database, writes, bulk_import, incremental_indexer, lexical_retrieval]
+
+
+@pytest.fixture
+def migrated_pool(tmp_path, monkeypatch):
+    """
+    SQLitePool over a fresh, fully migrated database, installed as
+    `backend.database.database` in every module that uses it.
+
+    Connected lazily by each test, inside its event loop.
+    """
+    path = str(tmp_path / "chatweaver.db")
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        metadata.create_all(connection)
+        run_migrations(connection)
+    engine.dispose()
+    pool = SQLitePool(path, readers=1)
+    for module in DATABASE_USERS:
+        monkeypatch.setattr(module, "database", pool)
+    return pool
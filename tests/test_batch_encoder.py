@@ -0,0 +1,67 @@
+# tests/test_batch_encoder.py
+
+"""
+Unit Tests for the Micro-Batching Encoder
+
+This file contains test cases for coalescing concurrent encode requests.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from embeddings.batch_encoder import BatchEncoder
+
+
+def fake_encode(texts):
+    return np.array([[len(text), i] for i, text in enumerate(texts)], dtype="float32")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch():
+    """
+    Requests arriving within the wait window should be encoded in one call,
+    and each caller should get back only its own rows.
+    """
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return fake_encode(texts)
+
+    encoder = BatchEncoder(encode, max_batch_size=64, max_wait_ms=50)
+    results = await asyncio.gather(
+        encoder.encode(["a"]),
+        encoder.encode(["bb", "ccc"]),
+        encoder.encode(["dddd"]),
+    )
+    await encoder.close()
+
+    assert calls == [["a", "bb", "ccc", "dddd"]]
+    assert [r[:, 0].tolist() for r in results] == [[1], [2, 3], [4]]
+    assert encoder.stats()["mean_batch_size"] == 4
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_flushed_without_waiting():
+    """
+    A batch that reaches max_batch_size should not wait out max_wait_ms.
+    """
+    encoder = BatchEncoder(fake_encode, max_batch_size=2, max_wait_ms=10_000)
+    result = await asyncio.wait_for(encoder.encode(["a", "b"]), timeout=1)
+    await encoder.close()
+    assert result.shape == (2, 2)
+
+
+@pytest.mark.asyncio
+async def test_encode_errors_reach_every_caller():
+    def failing_encode(texts):
+        raise RuntimeError("model unavailable")
+
+    encoder = BatchEncoder(failing_encode, max_wait_ms=20)
+    results = await asyncio.gather(
+        encoder.encode(["a"]), encoder.encode(["b"]), return_exceptions=True
+    )
+    await encoder.close()
+    assert all(isinstance(r, RuntimeError) for r in results)
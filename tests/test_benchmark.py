@@ -0,0 +1,61 @@
+# tests/test_benchmark.py
+
+"""
+Unit Tests for the Benchmarks
+
+This file contains test cases for the benchmark suites, their shared report
+format and the comparison of results across runs.
+"""
+
+import copy
+
+import pytest
+
+from backend.benchmarks import schema, serializer
+from backend.benchmarks.report import compare_results
+from backend.benchmarks.retrieval import run_benchmark, synthetic_corpus
+
+
+def test_synthetic_corpus_is_reproducible_and_normalized():
+    vectors, queries = synthetic_corpus(500, 10, dimensions=16, seed=3)
+    again, _ = synthetic_corpus(500, 10, dimensions=16, seed=3)
+    assert vectors.shape == (500, 16) and queries.shape == (10, 16)
+    assert (vectors == again).all()
+    assert abs(float((vectors ** 2).sum(axis=1).mean()) - 1.0) < 1e-4
+
+
+def test_run_benchmark_reports_every_backend():
+    report = run_benchmark(sizes=[1000], index_types=["flat", "sq_fp16"], n_queries=10, k=5, concurrency=2)
+    results = {r["index_type"]: r for r in report["results"]}
+    assert set(results) == {"flat", "sq_fp16"}
+    assert results["flat"]["recall_at_k"] == 1.0
+    for result in results.values():
+        assert result["qps"] > 0
+        assert result["p99_ms"] >= result["p50_ms"]
+        assert result["file_bytes"] > 0
+    assert report["config"]["sizes"] == [1000]
+
+
+def test_compare_results_flags_recall_drop():
+    report = run_benchmark(sizes=[1000], index_types=["flat"], n_queries=10, k=5, concurrency=1)
+    assert compare_results(report, report) == []
+    worse = copy.deepcopy(report)
+    worse["results"][0]["recall_at_k"] -= 0.1
+    assert any("recall_at_k" in regression for regression in compare_results(report, worse))
+
+
+def test_every_suite_writes_the_shared_format():
+    reports = [
+        schema.run_benchmark(n_categories=2, n_threads=20, n_comments=200, n_samples=5),
+        serializer.run_benchmark(n_comments=50, repeats=2),
+    ]
+    for report in reports:
+        assert set(report) >= {"suite", "environment", "config", "results"}
+        names = [result["name"] for result in report["results"]]
+        assert len(names) == len(set(names))
+        assert compare_results(report, report) == []
+    assert "get_comments:after" in [result["name"] for result in reports[0]["results"]]
+    assert reports[1]["summary"]["identical"]
+
+    with pytest.raises(ValueError):
+        compare_results(reports[0], reports[1])
@@ -0,0 +1,105 @@
+# tests/test_bulk_import.py
+
+"""
+Unit Tests for Bulk Comment Import
+
+This file contains test cases for flattening comment trees and NDJSON streams
+and for importing them with client-side parent ids resolved.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend.database import categories, comments, threads
+from backend.models import BulkCommentLine, BulkCommentNode
+from backend.services import bulk_import
+from backend.services.bulk_import import parse_ndjson, plan_lines, plan_tree
+from embeddings.indexing.incremental_indexer import IncrementalIndexer
+
+
+def test_tree_is_flattened_parents_first():
+    tree = [
+        BulkCommentNode(temp_id="a", text="a", replies=[
+            BulkCommentNode(temp_id="a1", text="a1", replies=[BulkCommentNode(text="a11")]),
+        ]),
+        BulkCommentNode(temp_id="b", text="b"),
+    ]
+    plan = plan_tree(tree, parent_id=7)
+    assert [(c.text, c.parent_index, c.parent_id) for c in plan] == [
+        ("a", None, 7), ("a1", 0, None), ("a11", 1, None), ("b", None, 7),
+    ]
+
+
+def test_lines_must_reply_to_earlier_lines():
+    plan = plan_lines([
+        BulkCommentLine(temp_id="x", text="x", parent_id=3),
+        BulkCommentLine(text="y", parent_temp_id="x"),
+    ])
+    assert [(c.parent_index, c.parent_id) for c in plan] == [(None, 3), (0, None)]
+    with pytest.raises(HTTPException) as error:
+        plan_lines([BulkCommentLine(text="y", parent_temp_id="later"), BulkCommentLine(temp_id="later", text="x")])
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_ndjson_lines_can_span_chunks():
+    async def chunks():
+        yield b'{"temp_id": "a", "te'
+        yield b'xt": "a"}\n\n{"parent_temp_id": "a", "text": "b"}'
+
+    lines = await parse_ndjson(chunks())
+    assert [(line.temp_id, line.parent_temp_id, line.text) for line in lines] == [("a", None, "a"), (None, "a", "b")]
+
+
+@pytest.mark.asyncio
+async def test_import_resolves_temp_ids_in_one_transaction(migrated_pool):
+    await migrated_pool.connect()
+    await migrated_pool.execute(categories.insert().values(id=1, name="General"))
+    await migrated_pool.execute(threads.insert().values(id=1, category_id=1, title="t"))
+    await migrated_pool.execute(comments.insert().values(id=1, thread_id=1, text="Root Comment"))
+
+    plan = plan_tree([BulkCommentNode(temp_id="q", text="q", replies=[BulkCommentNode(temp_id="r", text="r")])], parent_id=1)
+    result = await bulk_import.import_comments(1, plan)
+    assert result["id_map"] == {"q": 2, "r": 3}
+    rows = await migrated_pool.fetch_all(comments.select().order_by(comments.c.id))
+    assert [(row["id"], row["parent_id"], row["path"]) for row in rows[1:]] == [
+        (2, 1, "0000000001/0000000002/"),
+        (3, 2, "0000000001/0000000002/0000000003/"),
+    ]
+
+    with pytest.raises(HTTPException) as error:
+        await bulk_import.import_comments(1, plan_tree([BulkCommentNode(text="x")], parent_id=99))
+    assert error.value.status_code == 400
+    assert await migrated_pool.fetch_val("SELECT COUNT(*) FROM comments") == 3
+    await migrated_pool.disconnect()
+
+
+class RecordingVectorDB:
+    def __init__(self):
+        self.comment_ids = []
+
+    async def add_comments_bulk(self, comment_ids, thread_ids, texts):
+        self.comment_ids.extend(comment_ids)
+
+
+@pytest.mark.asyncio
+async def test_import_larger_than_the_index_queue_does_not_wait(migrated_pool):
+    await migrated_pool.connect()
+    await migrated_pool.execute(categories.insert().values(id=1, name="General"))
+    await migrated_pool.execute(threads.insert().values(id=1, category_id=1, title="t"))
+    result = await bulk_import.import_comments(1, plan_lines([BulkCommentLine(text=f"c{i}") for i in range(50)]))
+
+    vector_db = RecordingVectorDB()
+    indexer = IncrementalIndexer(vector_db, max_queue_size=8, batch_size=4, max_wait_ms=10)
+    await indexer.start(backfill=False)
+    # Returns at once although 50 comments do not fit in the queue
+    indexer.enqueue_ids(result["ids"])
+    assert indexer.stats()["pending"] == 0 and indexer.stats()["feeding"] == 1
+
+    while indexer.stats()["feeding"]:
+        await asyncio.sleep(0.01)
+    await indexer.stop()
+    await migrated_pool.disconnect()
+    assert sorted(vector_db.comment_ids) == result["ids"]
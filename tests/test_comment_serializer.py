@@ -0,0 +1,43 @@
+# tests/test_comment_serializer.py
+
+"""
+Unit Tests for the Comment Tree Serializer
+
+This file contains test cases for building comment trees from rows and
+serializing them to the same JSON as the CommentResponse models.
+"""
+
+import json
+
+from backend.services.comment_serializer import build_comment_tree, dumps
+from backend.benchmarks.serializer import pydantic_body, synthetic_rows
+
+
+def test_output_matches_pydantic_path():
+    rows = synthetic_rows(300, seed=1)
+    assert dumps(build_comment_tree(rows)) == pydantic_body(rows)
+
+
+def test_page_roots_keep_page_order():
+    rows = synthetic_rows(20, seed=2)
+    root_ids = [5, 3]
+    tree = build_comment_tree(rows, root_ids)
+    assert [comment["id"] for comment in tree] == root_ids
+    # A listed comment is not also nested under its parent
+    nested = json.dumps(tree)
+    assert nested.count('"id": 5,') == 1 and nested.count('"id": 3,') == 1
+
+
+def test_deep_reply_chain_is_serialized():
+    rows = synthetic_rows(1, seed=3)
+    index = {name: position for position, name in enumerate(rows[0].keys())}
+    chain = [rows[0]] + [
+        type(rows[0])([comment_id, 1, comment_id - 1, "reply", 0, 0, None, False, None], index)
+        for comment_id in range(2, 401)
+    ]
+    tree = json.loads(dumps(build_comment_tree(chain)))
+    depth = 0
+    while tree:
+        depth += 1
+        tree = tree[0]["replies"]
+    assert depth == 400
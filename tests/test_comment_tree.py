@@ -0,0 +1,76 @@
+# tests/test_comment_tree.py
+
+"""
+Unit Tests for Comment Tree Queries
+
+This file contains test cases for the recursive ancestor and subtree queries.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+
+from backend.database import comments, metadata
+from backend.database.comment_tree import ancestors_query, subtree_query, subtree_size_query
+from backend.database.migrations import run_migrations
+
+
+@pytest.fixture
+def connection():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        run_migrations(connection)
+        # Thread 1: a 200-deep reply chain 1 -> 2 -> ... -> 200, plus 201 and 202 replying to 2
+        connection.execute(comments.insert(), [
+            {"id": i, "thread_id": 1, "parent_id": i - 1 if i > 1 else None, "text": f"c{i}"}
+            for i in range(1, 201)
+        ])
+        connection.execute(comments.insert(), [
+            {"id": 201, "thread_id": 1, "parent_id": 2, "text": "c201"},
+            {"id": 202, "thread_id": 1, "parent_id": 2, "text": "c202"},
+            # Thread 2 reply whose parent belongs to thread 1
+            {"id": 300, "thread_id": 2, "parent_id": 5, "text": "c300"},
+        ])
+        yield connection
+
+
+def test_ancestors_are_fetched_root_first(connection):
+    rows = connection.execute(ancestors_query(200, 1)).mappings().all()
+    assert [row["id"] for row in rows] == list(range(1, 201))
+    assert rows[0]["depth"] == 199 and rows[-1]["depth"] == 0
+    assert rows[-1]["text"] == "c200"
+
+
+def test_ancestors_stay_within_the_thread(connection):
+    assert [row["id"] for row in connection.execute(ancestors_query(300, 2)).mappings()] == [300]
+    assert connection.execute(ancestors_query(200, 2)).all() == []
+
+
+def test_subtree_is_breadth_first(connection):
+    rows = connection.execute(subtree_query(2)).mappings().all()
+    ids = [row["id"] for row in rows]
+    assert ids[:4] == [2, 3, 201, 202]
+    assert len(ids) == 199 + 2
+    assert 300 not in ids
+    assert connection.execute(subtree_query(2, thread_id=2)).all() == []
+    assert [row["depth"] for row in rows[:4]] == [0, 1, 1, 1]
+
+
+def test_subtree_is_a_range_scan_over_paths(connection):
+    assert connection.execute(subtree_size_query(2)).scalar() == 201
+    assert connection.execute(subtree_size_query(999)).scalar() == 0
+    plan = " ".join(
+        row[3] for row in connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + str(subtree_query(2).compile(compile_kwargs={"literal_binds": True}))
+        )
+    )
+    assert "ix_comments_thread_id_path (thread_id=? AND path>? AND path<?)" in plan
+
+
+def test_paths_follow_new_comments_and_reparenting(connection):
+    connection.execute(comments.insert(), [{"id": 400, "thread_id": 1, "parent_id": 201, "text": "late reply"}])
+    assert [row["id"] for row in connection.execute(subtree_query(201)).mappings()] == [201, 400]
+    connection.execute(comments.update().where(comments.c.id == 201).values(parent_id=3))
+    ids = [row["id"] for row in connection.execute(subtree_query(3)).mappings()]
+    assert 201 in ids and 400 in ids
+    assert 201 not in [row["id"] for row in connection.execute(subtree_query(2)).mappings() if row["depth"] == 1]
@@ -0,0 +1,54 @@
+# tests/test_conditional.py
+
+"""
+Unit Tests for Conditional GET
+
+This file contains test cases for ETag matching and for the triggers that
+maintain category versions.
+"""
+
+from sqlalchemy import create_engine
+
+from backend.database import metadata
+from backend.database.migrations import run_migrations
+from backend.services.conditional import etag_matches, make_etag, not_modified
+
+
+def test_etag_matching():
+    etag = make_etag("thread", 12, 7)
+    assert etag == 'W/"thread-12-v7"'
+    assert etag_matches(etag, etag)
+    # Weak comparison, lists and wildcards
+    assert etag_matches('"thread-12-v7"', etag)
+    assert etag_matches('W/"thread-3-v1", W/"thread-12-v7"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"thread-12-v6"', etag)
+    assert not etag_matches(None, etag)
+
+    response = not_modified(etag)
+    assert response.status_code == 304 and response.headers["etag"] == etag
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_thread_writes_bump_the_category_version():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        run_migrations(connection)
+        sql = connection.exec_driver_sql
+        sql("INSERT INTO categories (id, name) VALUES (1, 'a'), (2, 'b')")
+
+        def versions():
+            return [row[0] for row in sql("SELECT version FROM categories ORDER BY id")]
+
+        sql("INSERT INTO threads (id, category_id, title) VALUES (1, 1, 't')")
+        sql("UPDATE threads SET root_comment_id = 1 WHERE id = 1")
+        assert versions() == [2, 0]
+        # Comment writes change the thread's version only
+        sql("INSERT INTO comments (id, thread_id, text) VALUES (1, 1, 'root')")
+        assert versions() == [2, 0]
+        sql("UPDATE threads SET category_id = 2 WHERE id = 1")
+        assert versions() == [3, 1]
+        sql("DELETE FROM threads WHERE id = 1")
+        assert versions() == [3, 2]
+    engine.dispose()
@@ -0,0 +1,39 @@
+# tests/test_context_service.py
+
+"""
+Unit Tests for the Context Service
+
+This file contains test cases for merging vector and lexical rankings in
+retrieve_threads.
+"""
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from backend.services import context_service
+
+
+class FakeVectorDB:
+    async def fetch_thread_metadata(self, thread_ids):
+        return {thread_id: {"text": "", "flags": 0, "approvals": 9} for thread_id in thread_ids}
+
+
+@pytest.mark.asyncio
+async def test_fused_order_is_kept_and_feedback_only_breaks_ties(monkeypatch):
+    async def retrieve_relevant_threads(vector_db, query, k, min_approvals=0, hide_flagged=False):
+        return [
+            {"thread_id": 1, "text": "", "flags": 3, "approvals": 0},
+            {"thread_id": 2, "text": "", "flags": 0, "approvals": 5},
+        ]
+
+    async def search_lexical(query, k, min_approvals=0, hide_flagged=False):
+        return [(3, -2.0), (4, -1.0), (1, -0.5)]
+
+    monkeypatch.setattr(context_service, "retrieve_relevant_threads", retrieve_relevant_threads)
+    monkeypatch.setattr(context_service, "search_lexical", search_lexical)
+
+    results = await context_service.retrieve_threads(FakeVectorDB(), "query", 0, False, k=4)
+    # Thread 1 is ranked by both retrievers, so its flags do not sink it.
+    # Threads 2 and 4 are both second in one ranking; 4 has the better net score.
+    assert [result["thread_id"] for result in results] == [1, 3, 4, 2]
@@ -0,0 +1,119 @@
+# tests/test_embedding_cache.py
+
+"""
+Unit Tests for the Embedding Cache
+
+This file contains test cases for the LRU and on-disk tiers of the embedding
+cache, including the size bound of the disk tier.
+"""
+
+import sqlite3
+
+import numpy as np
+
+from embeddings.embedding_cache import EmbeddingCache
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+class CountingEncoder:
+    """
+    Deterministic stand-in for SentenceTransformer.encode that records its inputs.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text), text.count("a"), 1.0] for text in texts], dtype="float32")
+
+
+def test_repeated_texts_skip_the_encoder():
+    """
+    Only texts not seen before should reach the encoder, once each.
+    """
+    cache = EmbeddingCache()
+    encoder = CountingEncoder()
+
+    first = cache.encode(MODEL_NAME, encoder.encode, ["alpha", "beta", "alpha"])
+    second = cache.encode(MODEL_NAME, encoder.encode, ["beta", "gamma"])
+
+    assert encoder.calls == [["alpha", "beta"], ["gamma"]]
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_array_equal(first[1], second[0])
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_entries_are_scoped_by_model():
+    cache = EmbeddingCache()
+    encoder = CountingEncoder()
+    cache.encode(MODEL_NAME, encoder.encode, ["alpha"])
+    cache.encode("other-model", encoder.encode, ["alpha"])
+    assert len(encoder.calls) == 2
+
+
+def test_lru_evicts_least_recently_used():
+    cache = EmbeddingCache(capacity=2)
+    encoder = CountingEncoder()
+    cache.encode(MODEL_NAME, encoder.encode, ["a", "b"])
+    cache.lookup(MODEL_NAME, ["a"])  # "b" is now least recently used
+    cache.encode(MODEL_NAME, encoder.encode, ["c"])
+
+    hits = cache.lookup(MODEL_NAME, ["a", "b", "c"])
+    assert hits[0] is not None and hits[1] is None and hits[2] is not None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """
+    Embeddings written to disk should be served by a new cache instance.
+    """
+    path = str(tmp_path / "embedding_cache.db")
+    encoder = CountingEncoder()
+    expected = EmbeddingCache(path).encode(MODEL_NAME, encoder.encode, ["alpha"])
+
+    cache = EmbeddingCache(path)
+    result = cache.encode(MODEL_NAME, encoder.encode, ["alpha"])
+
+    np.testing.assert_array_equal(result, expected)
+    assert len(encoder.calls) == 1
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["hit_rate"] == 1.0
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "embedding_cache.db")
+    encoder = CountingEncoder()
+    cache = EmbeddingCache(path, capacity=1, disk_capacity=10)
+    texts = [f"text {i}" for i in range(10)]
+    cache.encode(MODEL_NAME, encoder.encode, texts)
+    # Read "text 0" back from disk so it is recently used
+    cache.encode(MODEL_NAME, encoder.encode, ["text 9", "text 0"])
+    cache.encode(MODEL_NAME, encoder.encode, ["new"])
+
+    stats = cache.stats()
+    assert stats["disk_entries"] == 9 and stats["disk_evictions"] == 2 and stats["disk_bytes"] > 0
+    reopened = EmbeddingCache(path, capacity=1, disk_capacity=10)
+    hits = reopened.lookup(MODEL_NAME, ["text 0", "new"] + texts[1:])
+    # The two evicted rows are among those written in the first batch and never read back
+    assert hits[0] is not None and hits[1] is not None
+    assert sum(hit is None for hit in hits[2:]) == 2
+
+
+def test_unbounded_cache_files_are_upgraded(tmp_path):
+    path = str(tmp_path / "embedding_cache.db")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE embedding_cache (model TEXT NOT NULL, text_hash TEXT NOT NULL,"
+        " vector BLOB NOT NULL, PRIMARY KEY (model, text_hash)) WITHOUT ROWID"
+    )
+    connection.executemany(
+        "INSERT INTO embedding_cache VALUES (?, ?, ?)",
+        [(MODEL_NAME, str(i), np.zeros(3, dtype="float32").tobytes()) for i in range(5)],
+    )
+    connection.commit()
+    connection.close()
+
+    cache = EmbeddingCache(path, disk_capacity=3)
+    assert cache.stats()["disk_entries"] == 2
@@ -0,0 +1,53 @@
+# tests/test_encoders.py
+
+"""
+Unit Tests for Encoder Backends
+
+This file contains test cases for the encoder parity check and throughput benchmark.
+"""
+
+import numpy as np
+
+from embeddings.encoders import benchmark_encoder, encoder_cache_key, parity_check
+
+
+def _fake_encoder(noise: float = 0.0, seed: int = 0):
+    """
+    Deterministic stand-in for SentenceTransformer.encode, optionally perturbed.
+    """
+    rng = np.random.default_rng(seed)
+    base = {}
+
+    def encode(texts):
+        rows = []
+        for text in texts:
+            if text not in base:
+                base[text] = np.random.default_rng(abs(hash(text)) % 2**32).normal(size=16)
+            rows.append(base[text] + noise * rng.normal(size=16))
+        return np.stack(rows).astype("float32")
+
+    return encode
+
+
+def test_parity_check_identical_encoders_agree():
+    encode = _fake_encoder()
+    report = parity_check(encode, encode)
+    assert report["min_cosine"] > 0.999
+    assert report["neighbour_agreement"] == 1.0
+
+
+def test_parity_check_detects_drift():
+    report = parity_check(_fake_encoder(), _fake_encoder(noise=5.0, seed=1))
+    assert report["mean_cosine"] < 0.9
+    assert report["neighbour_agreement"] < 1.0
+
+
+def test_benchmark_encoder_reports_per_core_throughput():
+    report = benchmark_encoder(_fake_encoder(), texts=["a", "b"], repeats=2, cores=2)
+    assert report["batch_size"] == 2
+    assert report["texts_per_second_per_core"] == report["texts_per_second"] / 2
+
+
+def test_encoder_cache_key_separates_quantized_backends():
+    assert encoder_cache_key("m", "torch") == "m"
+    assert encoder_cache_key("m", "onnx_int8") != encoder_cache_key("m", "torch")
@@ -0,0 +1,80 @@
+# tests/test_feedback_accumulator.py
+
+"""
+Unit Tests for Write-Behind Feedback
+
+This file contains test cases for the atomic feedback upsert and for batching,
+retry and snapshot updates in the feedback accumulator.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+
+from backend.database import feedback, metadata
+from backend.services.feedback_service import FeedbackAccumulator, FeedbackSnapshot, feedback_upsert_statement
+
+
+def loaded_snapshot() -> FeedbackSnapshot:
+    snapshot = FeedbackSnapshot()
+    snapshot.loaded = True
+    return snapshot
+
+
+def test_upsert_adds_to_existing_counters():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(feedback_upsert_statement(), [{"context_id": "1", "flags": 1, "approvals": 0}])
+        connection.execute(feedback_upsert_statement(), [
+            {"context_id": "1", "flags": 2, "approvals": 3},
+            {"context_id": "2", "flags": 0, "approvals": 1},
+        ])
+        rows = connection.execute(feedback.select().order_by(feedback.c.context_id)).fetchall()
+    assert [tuple(row) for row in rows] == [("1", 3, 3), ("2", 0, 1)]
+
+
+@pytest.mark.asyncio
+async def test_votes_are_summed_and_flushed_in_one_batch():
+    batches = []
+
+    async def write(deltas):
+        batches.append(dict(deltas))
+
+    snapshot = loaded_snapshot()
+    accumulator = FeedbackAccumulator(snapshot, flush_interval_ms=10000, max_events=3, write=write)
+    await accumulator.start()
+    accumulator.add("1", "flag")
+    accumulator.add("1", "approve")
+    # Retrieval sees votes before they are written
+    assert snapshot.get("1") == (1, 1)
+    assert batches == []
+
+    accumulator.add("2", "flag")
+    await asyncio.sleep(0.05)
+    assert batches == [{"1": (1, 1), "2": (1, 0)}]
+    await accumulator.stop()
+    assert accumulator.stats()["flushed_events"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_votes_for_the_next_one():
+    batches = []
+    failures = [RuntimeError("database is locked")]
+
+    async def write(deltas):
+        if failures:
+            raise failures.pop()
+        batches.append(dict(deltas))
+
+    accumulator = FeedbackAccumulator(loaded_snapshot(), flush_interval_ms=10000, write=write)
+    await accumulator.start()
+    accumulator.add("1", "flag")
+    with pytest.raises(RuntimeError):
+        await accumulator.flush()
+    accumulator.add("1", "flag")
+    # stop() writes what is still pending
+    await accumulator.stop()
+    assert batches == [{"1": (2, 0)}]
+    assert accumulator.stats()["failed_flushes"] == 1
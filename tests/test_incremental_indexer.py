@@ -0,0 +1,164 @@
+# tests/test_incremental_indexer.py
+
+"""
+Unit Tests for the Incremental Comment Indexer
+
+This file contains test cases for batching, ordering, backpressure and retries
+of background comment indexing, and for chunking comment text.
+"""
+
+import asyncio
+
+import pytest
+
+from backend.database import categories, comment_embedding_mapping
+from backend.database.writes import create_thread_with_root, insert_comment, update_comment
+from embeddings.chunking import chunk_text
+from embeddings.indexing.incremental_indexer import IncrementalIndexer
+
+
+class FakeVectorDB:
+    def __init__(self):
+        self.calls = []
+
+    async def add_comments_bulk(self, comment_ids, thread_ids, texts):
+        self.calls.append(("add", list(comment_ids), list(texts)))
+
+    async def delete_comments(self, comment_ids):
+        self.calls.append(("delete", list(comment_ids)))
+
+
+@pytest.mark.asyncio
+async def test_queued_comments_are_indexed_in_one_batch():
+    """
+    Comments queued within the wait window should reach VectorDB in one bulk
+    call, with the latest text winning for a comment edited in the meantime.
+    """
+    vector_db = FakeVectorDB()
+    indexer = IncrementalIndexer(vector_db, batch_size=10, max_wait_ms=50)
+    await indexer.start(backfill=False)
+
+    await indexer.enqueue(1, 7, "first")
+    await indexer.enqueue(2, 7, "second")
+    await indexer.enqueue(1, 7, "first, edited")
+    await indexer.stop()
+
+    assert vector_db.calls == [("add", [1, 2], ["first, edited", "second"])]
+    stats = indexer.stats()
+    assert stats["indexed"] == 2 and stats["batches"] == 1 and stats["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_after_enqueue_wins():
+    vector_db = FakeVectorDB()
+    indexer = IncrementalIndexer(vector_db, batch_size=10, max_wait_ms=50)
+    await indexer.start(backfill=False)
+
+    await indexer.enqueue(1, 7, "text")
+    await indexer.enqueue_delete(1)
+    await indexer.stop()
+
+    assert vector_db.calls == [("delete", [1])]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure():
+    """
+    Writers should wait once max_queue_size comments are pending.
+    """
+    indexer = IncrementalIndexer(FakeVectorDB(), max_queue_size=2)
+    indexer._queue = asyncio.Queue(maxsize=2)  # Queue without a worker draining it
+
+    await indexer.enqueue(1, 7, "a")
+    await indexer.enqueue(2, 7, "b")
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(indexer.enqueue(3, 7, "c"), timeout=0.05)
+    assert indexer.stats()["pending"] == 2
+
+
+@pytest.mark.asyncio
+async def test_backfill_skips_placeholder_root_comments(migrated_pool):
+    await migrated_pool.connect()
+    category_id = await migrated_pool.execute(categories.insert().values(name="General"))
+    thread, root = await create_thread_with_root(category_id, "Title", None)
+    reply = await insert_comment(thread["id"], root["id"], "a real comment")
+    other, other_root = await create_thread_with_root(category_id, "Other", None)
+    # Indexed before placeholders were excluded
+    await migrated_pool.execute(
+        comment_embedding_mapping.insert().values(faiss_index=0, comment_id=other_root["id"], thread_id=other["id"])
+    )
+
+    vector_db = FakeVectorDB()
+    indexer = IncrementalIndexer(vector_db, max_wait_ms=50)
+    await indexer.start(backfill=False)
+    await indexer.backfill()
+    await indexer.stop()
+    await migrated_pool.disconnect()
+
+    assert vector_db.calls == [("delete", [other_root["id"]]), ("add", [reply["id"]], ["a real comment"])]
+
+
+class FlakyVectorDB(FakeVectorDB):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    async def add_comments_bulk(self, comment_ids, thread_ids, texts):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("encoder unavailable")
+        await super().add_comments_bulk(comment_ids, thread_ids, texts)
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_with_current_text(migrated_pool):
+    await migrated_pool.connect()
+    category_id = await migrated_pool.execute(categories.insert().values(name="General"))
+    thread, root = await create_thread_with_root(category_id, "Title", None)
+    reply = await insert_comment(thread["id"], root["id"], "first")
+
+    vector_db = FlakyVectorDB(failures=1)
+    indexer = IncrementalIndexer(vector_db, max_wait_ms=10, retry_backoff_seconds=0.05)
+    await indexer.start(backfill=False)
+    await indexer.enqueue(reply["id"], thread["id"], "first")
+    await indexer.drain()
+    stats = indexer.stats()
+    assert stats["failed"] == 1 and stats["retrying"] == 1 and stats["current_lag_seconds"] > 0
+
+    # Edited before the retry; the retry indexes the current text
+    await update_comment(reply["id"], text="edited")
+    while not vector_db.calls:
+        await asyncio.sleep(0.01)
+    await indexer.stop()
+    await migrated_pool.disconnect()
+
+    assert vector_db.calls == [("add", [reply["id"]], ["edited"])]
+    assert indexer.stats()["retrying"] == 0
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded(migrated_pool):
+    await migrated_pool.connect()
+    category_id = await migrated_pool.execute(categories.insert().values(name="General"))
+    thread, root = await create_thread_with_root(category_id, "Title", None)
+    reply = await insert_comment(thread["id"], root["id"], "text")
+
+    vector_db = FlakyVectorDB(failures=10)
+    indexer = IncrementalIndexer(vector_db, max_wait_ms=10, max_retries=2, retry_backoff_seconds=0.01)
+    await indexer.start(backfill=False)
+    await indexer.enqueue(reply["id"], thread["id"], "text")
+    while not indexer.stats()["abandoned"]:
+        await asyncio.sleep(0.01)
+    await indexer.stop()
+    await migrated_pool.disconnect()
+
+    stats = indexer.stats()
+    assert stats["failed"] == 3 and stats["retrying"] == 0 and stats["current_lag_seconds"] == 0.0
+
+
+def test_chunk_text_splits_with_overlap():
+    words = [f"w{i}" for i in range(10)]
+    chunks = chunk_text(" ".join(words), max_words=4, overlap=1)
+    assert chunks == ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"]
+    assert chunk_text("short text", max_words=4) == ["short text"]
+    assert chunk_text("   ") == []
@@ -0,0 +1,151 @@
+# tests/test_index_factory.py
+
+"""
+Unit Tests for the Index Factory
+
+This file contains test cases for building, tuning and evaluating FAISS index backends.
+"""
+
+import faiss
+import numpy as np
+import pytest
+
+from embeddings.index_factory import (
+    DEFAULT_INDEX_PARAMS,
+    MIN_PQ_TRAINING_POINTS,
+    choose_nlist,
+    compare_backends,
+    create_index,
+    empty_copy,
+    evaluate_index,
+    index_ids,
+    index_size_bytes,
+    load_index_params,
+    min_training_points,
+    reconstruct_all,
+    rerank_exact,
+    save_index_params,
+    search_parameters,
+    train_index,
+)
+
+DIMENSIONS = 16
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    rng = np.random.default_rng(42)
+    return rng.random((2000, DIMENSIONS), dtype="float32")
+
+
+def test_flat_index_has_perfect_recall(vectors):
+    """
+    A flat index is exact, so it should match brute force.
+    """
+    index = create_index(DIMENSIONS, {**DEFAULT_INDEX_PARAMS, "index_type": "flat"})
+    index.add(vectors)
+    report = evaluate_index(index, vectors, vectors[:20], k=5)
+    assert report["recall_at_k"] == 1.0
+    assert report["p99_ms"] >= report["p50_ms"]
+
+
+def test_ivf_index_trains_and_reconstructs(vectors):
+    """
+    IVF indexes should be trained with an nlist chosen from the corpus size,
+    and vectors should be recoverable in insertion order for rebuilds.
+    """
+    params = {**DEFAULT_INDEX_PARAMS, "index_type": "ivf_flat", "nprobe": 4}
+    index = create_index(DIMENSIONS, params, n_vectors=len(vectors))
+    assert params["nlist"] == choose_nlist(len(vectors))
+    assert not index.is_trained
+
+    train_index(index, vectors)
+    index.add(vectors)
+    np.testing.assert_allclose(reconstruct_all(index)[:10], vectors[:10])
+    assert evaluate_index(index, vectors, vectors[:20], k=5)["recall_at_k"] > 0.5
+
+
+def test_hnsw_index_needs_no_training(vectors):
+    """
+    HNSW indexes can be filled without a training step.
+    """
+    index = create_index(DIMENSIONS, {**DEFAULT_INDEX_PARAMS, "index_type": "hnsw"})
+    assert index.is_trained
+    index.add(vectors)
+    assert evaluate_index(index, vectors, vectors[:20], k=5)["recall_at_k"] > 0.9
+
+
+def test_sq8_index_is_smaller_and_reranking_restores_recall(vectors):
+    """
+    SQ8 should store vectors in about a quarter of the space of a flat index,
+    and exact re-ranking of over-fetched candidates should recover full recall.
+    """
+    flat = create_index(DIMENSIONS, {**DEFAULT_INDEX_PARAMS, "index_type": "flat"})
+    flat.add(vectors)
+    sq8 = create_index(DIMENSIONS, {**DEFAULT_INDEX_PARAMS, "index_type": "sq8"})
+    train_index(sq8, vectors)
+    sq8.add(vectors)
+    assert index_size_bytes(sq8) < index_size_bytes(flat) / 3
+
+    report = evaluate_index(sq8, vectors, vectors[:20], k=5, rerank_factor=4)
+    assert report["recall_at_k"] == 1.0
+
+
+def test_rerank_exact_orders_by_true_distance():
+    query = np.zeros(2, dtype="float32")
+    candidates = np.array([[3, 0], [1, 0], [2, 0]], dtype="float32")
+    distances, ids = rerank_exact(query, np.array([7, 8, 9]), candidates, k=2)
+    np.testing.assert_array_equal(ids, [8, 9])
+    np.testing.assert_allclose(distances, [1, 4])
+
+
+def test_tombstoned_ids_are_filtered_and_compacted(vectors):
+    """
+    An ID selector should hide tombstoned vectors from search, and compacting
+    into an empty copy should keep the training and the live ids.
+    """
+    params = {**DEFAULT_INDEX_PARAMS, "index_type": "ivf_flat", "nprobe": 8}
+    base = create_index(DIMENSIONS, params, n_vectors=len(vectors))
+    train_index(base, vectors)
+    index = faiss.IndexIDMap2(base)
+    ids = np.arange(100, 100 + len(vectors), dtype="int64")
+    index.add_with_ids(vectors, ids)
+
+    batch = faiss.IDSelectorBatch(ids[:1])
+    _, found = index.search(vectors[:1], 5, params=search_parameters(params, faiss.IDSelectorNot(batch)))
+    assert ids[0] not in found[0]
+
+    compacted = empty_copy(index)
+    assert compacted.ntotal == 0 and compacted.is_trained
+    compacted.add_with_ids(reconstruct_all(index)[1:], ids[1:])
+    np.testing.assert_array_equal(index_ids(compacted), ids[1:])
+    _, found = compacted.search(vectors[1:2], 1)
+    assert found[0][0] == ids[1]
+
+
+def test_unknown_index_type_is_rejected():
+    with pytest.raises(ValueError):
+        create_index(DIMENSIONS, {**DEFAULT_INDEX_PARAMS, "index_type": "annoy"})
+
+
+def test_index_params_round_trip(tmp_path):
+    """
+    Search parameters persisted next to the index should load back unchanged.
+    """
+    path = tmp_path / "faiss_index.json"
+    assert load_index_params(str(path)) is None
+    params = {**DEFAULT_INDEX_PARAMS, "index_type": "hnsw", "ef_search": 128}
+    save_index_params(str(path), params)
+    assert load_index_params(str(path)) == params
+
+
+def test_small_corpus_skips_backends_it_cannot_train(vectors):
+    """
+    Between MIN_POINTS_PER_CENTROID and 2^PQ_NBITS vectors, IVF-Flat can be
+    trained but PQ cannot; the comparison skips PQ instead of failing.
+    """
+    small = vectors[:100]
+    assert min_training_points("ivf_flat") <= len(small) < min_training_points("ivf_pq") == MIN_PQ_TRAINING_POINTS
+    report = compare_backends(small, vectors[:5], k=5, params={"pq_m": 4}, rerank_factor=0)
+    assert "ivf_flat" in report and "sq8" in report
+    assert "pq" not in report and "ivf_pq" not in report
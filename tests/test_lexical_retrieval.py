@@ -0,0 +1,84 @@
+# tests/test_lexical_retrieval.py
+
+"""
+Unit Tests for Lexical Retrieval
+
+This file contains test cases for the FTS5 schema and its sync triggers, for
+building safe MATCH expressions from free text and for ranking threads.
+"""
+
+import sqlite3
+
+import pytest
+
+from backend.database import categories, writes
+from backend.database.fts import fts_statements
+from embeddings.retrieval import lexical_retrieval
+from embeddings.retrieval.lexical_retrieval import build_match_expression, search_lexical
+
+
+@pytest.fixture
+def connection():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE threads (id INTEGER PRIMARY KEY, title TEXT, description TEXT)")
+    connection.execute("CREATE TABLE comments (id INTEGER PRIMARY KEY, thread_id INTEGER, text TEXT)")
+    # A row written before the FTS tables exist must be picked up by the rebuild
+    connection.execute("INSERT INTO threads (title) VALUES ('legacy thread')")
+    for statement in fts_statements(existing_tables=["threads", "comments"]):
+        connection.execute(statement)
+    yield connection
+    connection.close()
+
+
+def match(connection, table, query):
+    rows = connection.execute(
+        f"SELECT rowid FROM {table} WHERE {table} MATCH ? ORDER BY rowid", (build_match_expression(query),)
+    )
+    return [row[0] for row in rows]
+
+
+def test_fts_tables_follow_inserts_updates_and_deletes(connection):
+    assert match(connection, "threads_fts", "legacy") == [1]
+
+    connection.execute("INSERT INTO comments (thread_id, text) VALUES (1, 'psycopg2 raised ECONNREFUSED 127.0.0.1')")
+    assert match(connection, "comments_fts", "ECONNREFUSED") == [1]
+    assert match(connection, "comments_fts", "127.0.0.1") == [1]
+
+    connection.execute("UPDATE comments SET text = 'resolved' WHERE id = 1")
+    assert match(connection, "comments_fts", "ECONNREFUSED") == []
+    assert match(connection, "comments_fts", "resolved") == [1]
+
+    connection.execute("DELETE FROM comments WHERE id = 1")
+    assert match(connection, "comments_fts", "resolved") == []
+
+
+def test_snake_case_identifiers_stay_whole(connection):
+    connection.execute("INSERT INTO comments (thread_id, text) VALUES (1, 'set connect_timeout higher')")
+    assert match(connection, "comments_fts", "connect_timeout") == [1]
+    assert match(connection, "comments_fts", "timeout") == []
+
+
+def test_match_expression_quotes_operators_and_punctuation():
+    assert build_match_expression('error AND "NOT" x.y') == '"error" OR "AND" OR "NOT" OR "x.y"'
+    assert build_match_expression("*** ---") == ""
+    assert build_match_expression("pool timeout", "AND") == '"pool" AND "timeout"'
+
+
+@pytest.mark.asyncio
+async def test_threads_matching_every_term_rank_first(migrated_pool, monkeypatch):
+    monkeypatch.setattr(lexical_retrieval, "LEXICAL_CANDIDATE_FACTOR", 2)
+    await migrated_pool.connect()
+    category_id = await migrated_pool.execute(categories.insert().values(name="General"))
+    thread_ids = []
+    for i in range(20):
+        thread, root = await writes.create_thread_with_root(category_id, f"Thread {i}", None)
+        await writes.insert_comment(thread["id"], root["id"], "error error error in the logs")
+        thread_ids.append(thread["id"])
+    both = thread_ids[7]
+    await writes.insert_comment(both, None, "pool timeout error")
+
+    assert len(await search_lexical("error", k=3)) == 3
+    # Only one thread has both terms; OR-ed matches fill the rest
+    hits = await search_lexical("error timeout", k=3)
+    assert hits[0][0] == both and len(hits) == 3
+    await migrated_pool.disconnect()
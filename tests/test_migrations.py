@@ -0,0 +1,83 @@
+# tests/test_migrations.py
+
+"""
+Unit Tests for Schema Migrations
+
+This file contains test cases for applying versioned migrations to new and
+existing databases.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+
+from backend.database import metadata
+from backend.database.fts import create_fts_tables
+from backend.database import migrations
+from backend.database.migrations import MIGRATIONS, run_migrations, schema_version
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def index_names(connection):
+    return {row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_migrations_bring_a_new_database_to_the_latest_version(engine):
+    with engine.begin() as connection:
+        assert run_migrations(connection) == MIGRATIONS[-1][0]
+        assert schema_version(connection) == MIGRATIONS[-1][0]
+        assert {"ix_comments_thread_id_id", "ix_comments_parent_id", "ix_threads_category_id"} <= index_names(connection)
+        plan = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM comments WHERE thread_id = 1 ORDER BY id"
+        ).all()
+        assert "ix_comments_thread_id_id" in plan[0][3]
+
+
+def test_migrations_are_applied_once(engine):
+    with engine.begin() as connection:
+        run_migrations(connection)
+        connection.exec_driver_sql("DROP INDEX ix_comments_parent_id")
+        run_migrations(connection)
+        assert "ix_comments_parent_id" not in index_names(connection)
+
+
+def test_migrations_tolerate_objects_created_before_versioning(engine):
+    with engine.begin() as connection:
+        # A database from before migrations were tracked already has its FTS tables
+        create_fts_tables(connection)
+        connection.exec_driver_sql("INSERT INTO categories (id, name) VALUES (1, 'c')")
+        connection.exec_driver_sql("INSERT INTO threads (id, category_id, title) VALUES (1, 1, 'legacy')")
+        assert schema_version(connection) == 0
+        run_migrations(connection)
+        hits = connection.exec_driver_sql("SELECT rowid FROM threads_fts WHERE threads_fts MATCH 'legacy'").all()
+        assert hits == [(1,)]
+
+
+def test_failed_migration_is_rolled_back_with_its_version(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'partial.db'}")
+    metadata.create_all(engine)
+
+    def half_applied(connection):
+        connection.exec_driver_sql("CREATE TABLE half_applied (id INTEGER)")
+        raise RuntimeError("crash mid-migration")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", [
+        (1, "Applies", migrations.execute_all(["CREATE TABLE applied (id INTEGER)"])),
+        (2, "Fails halfway", half_applied),
+    ])
+    with pytest.raises(RuntimeError):
+        with engine.begin() as connection:
+            run_migrations(connection)
+
+    with engine.connect() as connection:
+        tables = {row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        # Migration 1 stays applied; nothing of migration 2 remains
+        assert "applied" in tables and "half_applied" not in tables
+        assert schema_version(connection) == 1
+    engine.dispose()
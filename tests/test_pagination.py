@@ -0,0 +1,38 @@
+# tests/test_pagination.py
+
+"""
+Unit Tests for Keyset Pagination
+
+This file contains test cases for cursor encoding and for paging a query by id.
+"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+
+from backend.database import categories, metadata
+from backend.services.pagination import decode_cursor, encode_cursor, keyset_page, split_page
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(None) is None
+    for cursor in ("zzz", encode_cursor(1)[:-2], "e30"):
+        with pytest.raises(HTTPException) as error:
+            decode_cursor(cursor)
+        assert error.value.status_code == 400
+
+
+def test_pages_cover_every_row_once():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(categories.insert(), [{"id": i, "name": f"c{i}"} for i in range(1, 11)])
+        seen, cursor = [], None
+        while True:
+            rows = connection.execute(keyset_page(categories.select(), categories.c.id, 3, cursor)).mappings().all()
+            page, cursor = split_page(rows, 3)
+            seen += [row["id"] for row in page]
+            if cursor is None:
+                break
+    assert seen == list(range(1, 11))
@@ -0,0 +1,60 @@
+# tests/test_retrieval_cache.py
+
+"""
+Unit Tests for the Retrieval Result Cache
+
+This file contains test cases for key normalization, generation-based
+invalidation, TTL expiry and LRU eviction.
+"""
+
+from backend.services.retrieval_cache import RetrievalCache
+
+RESULTS = [{"thread_id": 1, "text": "thread 1", "flags": 0, "approvals": 2}]
+
+
+def test_key_normalizes_case_and_whitespace():
+    assert RetrievalCache.key("  FAISS   index ", 5, 0, False) == RetrievalCache.key("faiss index", 5, 0, False)
+    assert RetrievalCache.key("faiss index", 5, 0, False) != RetrievalCache.key("faiss index", 5, 1, False)
+
+
+def test_index_generation_change_makes_entry_stale():
+    cache = RetrievalCache()
+    key = cache.key("query", 5, 0, False)
+    cache.put(key, cache.stamp(3), RESULTS)
+    assert cache.get(key, cache.stamp(3)) == RESULTS
+    assert cache.get(key, cache.stamp(4)) is None
+    assert cache.stats()["stale"] == 1
+
+
+def test_invalidate_drops_entries():
+    cache = RetrievalCache()
+    key = cache.key("query", 5, 0, False)
+    cache.put(key, cache.stamp(0), RESULTS)
+    cache.invalidate()
+    assert cache.get(key, cache.stamp(0)) is None
+
+
+def test_result_computed_across_invalidation_is_not_cached():
+    cache = RetrievalCache()
+    key = cache.key("query", 5, 0, False)
+    stamp = cache.stamp(0)
+    # Feedback changes while the search is running
+    cache.invalidate()
+    cache.put(key, stamp, RESULTS)
+    assert cache.get(key, cache.stamp(0)) is None
+
+
+def test_ttl_and_lru_eviction():
+    cache = RetrievalCache(capacity=2, ttl_seconds=0)
+    key = cache.key("expired", 5, 0, False)
+    cache.put(key, cache.stamp(0), RESULTS)
+    assert cache.get(key, cache.stamp(0)) is None
+
+    cache = RetrievalCache(capacity=2)
+    keys = [cache.key(f"q{i}", 5, 0, False) for i in range(3)]
+    cache.put(keys[0], cache.stamp(0), RESULTS)
+    cache.put(keys[1], cache.stamp(0), RESULTS)
+    cache.get(keys[0], cache.stamp(0))
+    cache.put(keys[2], cache.stamp(0), RESULTS)
+    assert cache.get(keys[1], cache.stamp(0)) is None
+    assert cache.get(keys[0], cache.stamp(0)) == RESULTS
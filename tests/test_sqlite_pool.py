@@ -0,0 +1,114 @@
+# tests/test_sqlite_pool.py
+
+"""
+Unit Tests for the SQLite Connection Pool
+
+This file contains test cases for statement routing, transactions and row
+access in the pooled SQLite access layer.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, select
+
+from backend.database import categories, comments, metadata, threads
+from backend.database.pool import SQLitePool, is_insert, is_read
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "pool.db")
+    engine = create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine)
+    engine.dispose()
+    # Connected lazily by each test, inside its event loop
+    return SQLitePool(path, readers=2)
+
+
+def test_statements_are_routed_by_kind():
+    assert is_read("SELECT 1")
+    assert is_insert("INSERT INTO t VALUES (1)") and not is_insert("DELETE FROM t")
+    assert is_read("\n  WITH RECURSIVE t(x) AS (SELECT 1) SELECT x FROM t")
+    assert not is_read("INSERT INTO categories (name) VALUES ('a') RETURNING id")
+
+
+@pytest.mark.asyncio
+async def test_insert_returns_id_and_rows_apply_column_types(pool):
+    await pool.connect()
+    category_id = await pool.execute(categories.insert().values(name="General"))
+    thread_id = await pool.execute(threads.insert().values(category_id=category_id, title="t"))
+    await pool.execute_many(comments.insert(), [
+        {"thread_id": thread_id, "text": "first"},
+        {"thread_id": thread_id, "text": "second", "hidden": True},
+    ])
+    rows = await pool.fetch_all(comments.select().order_by(comments.c.id))
+    assert [row["text"] for row in rows] == ["first", "second"]
+    # Column defaults are bound and Boolean comes back as bool
+    assert rows[0].flags == 0 and rows[0]["hidden"] is False and rows[1]["hidden"] is True
+    assert await pool.fetch_val("SELECT COUNT(*) FROM comments WHERE thread_id = :t", {"t": thread_id}) == 2
+    # UPDATE and DELETE report rows changed, not the last insert's id
+    assert await pool.execute(comments.delete().where(comments.c.id == 999)) == 0
+    assert await pool.execute(comments.update().where(comments.c.thread_id == thread_id).values(flags=1)) == 2
+
+
+@pytest.mark.asyncio
+async def test_dialect_processors_apply_to_binds_in_lists_and_results(tmp_path):
+    events = Table("events", MetaData(), Column("id", Integer, primary_key=True), Column("at", DateTime))
+    path = str(tmp_path / "events.db")
+    engine = create_engine(f"sqlite:///{path}")
+    events.metadata.create_all(engine)
+    engine.dispose()
+    pool = SQLitePool(path, readers=1)
+    await pool.connect()
+    times = [datetime(2024, 1, day, 12, 30) for day in (1, 2, 3)]
+    await pool.execute_many(events.insert(), [{"at": at} for at in times])
+    # DateTime is stored as text and read back as datetime, also through IN lists and RETURNING
+    rows = await pool.fetch_all(select(events.c.at).where(events.c.at.in_(times[1:])).order_by(events.c.id))
+    assert [row["at"] for row in rows] == times[1:]
+    returned = await pool.fetch_one(events.insert().values(at=times[0]).returning(events.c.at))
+    assert returned["at"] == times[0]
+    await pool.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_reads_do_not_wait_for_an_open_transaction(pool):
+    await pool.connect()
+    await pool.execute(categories.insert().values(name="before"))
+    inside = asyncio.Event()
+    release = asyncio.Event()
+
+    async def writer():
+        async with pool.transaction():
+            await pool.execute(categories.insert().values(name="uncommitted"))
+            # The transaction sees its own write
+            assert await pool.fetch_val("SELECT COUNT(*) FROM categories") == 2
+            inside.set()
+            await release.wait()
+
+    task = asyncio.create_task(writer())
+    await inside.wait()
+    # Another task reads the last committed state without blocking
+    count = await asyncio.wait_for(pool.fetch_val("SELECT COUNT(*) FROM categories"), 1)
+    assert count == 1
+    release.set()
+    await task
+    assert await pool.fetch_val("SELECT COUNT(*) FROM categories") == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_transaction_and_savepoint_roll_back(pool):
+    await pool.connect()
+    with pytest.raises(RuntimeError):
+        async with pool.transaction():
+            await pool.execute(categories.insert().values(name="a"))
+            raise RuntimeError("abort")
+    async with pool.transaction():
+        await pool.execute(categories.insert().values(name="b"))
+        with pytest.raises(RuntimeError):
+            async with pool.transaction():
+                await pool.execute(categories.insert().values(name="c"))
+                raise RuntimeError("abort")
+    rows = await pool.fetch_all(categories.select())
+    assert [row["name"] for row in rows] == ["b"]
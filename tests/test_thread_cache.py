@@ -0,0 +1,63 @@
+# tests/test_thread_cache.py
+
+"""
+Unit Tests for the Thread Tree Cache
+
+This file contains test cases for version-based invalidation and size-bounded
+LRU eviction of cached comment trees, and for the triggers that maintain
+thread versions.
+"""
+
+from sqlalchemy import create_engine
+
+from backend.database import metadata
+from backend.database.migrations import run_migrations
+from backend.services.thread_cache import ThreadTreeCache
+
+
+def test_entry_is_only_served_at_its_version():
+    cache = ThreadTreeCache()
+    cache.put(1, 3, b"[]")
+    assert cache.get(1, 3) == b"[]"
+    assert cache.get(1, 4) is None
+    assert cache.stats()["stale"] == 1 and cache.stats()["entries"] == 0
+
+
+def test_eviction_by_count_and_bytes():
+    cache = ThreadTreeCache(capacity=2, max_bytes=40)
+    cache.put(1, 0, b"x" * 10)
+    cache.put(2, 0, b"x" * 10)
+    cache.get(1, 0)
+    cache.put(3, 0, b"x" * 10)
+    # Thread 2 was least recently used
+    assert cache.get(2, 0) is None and cache.get(1, 0) is not None
+    # Larger than a quarter of max_bytes: not cached
+    cache.put(4, 0, b"x" * 11)
+    assert cache.get(4, 0) is None
+    assert cache.stats()["size_bytes"] == 20
+
+
+def test_comment_writes_bump_the_thread_version():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        run_migrations(connection)
+        sql = connection.exec_driver_sql
+        sql("INSERT INTO categories (id, name) VALUES (1, 'c')")
+        sql("INSERT INTO threads (id, category_id, title) VALUES (1, 1, 'a'), (2, 1, 'b')")
+
+        def versions():
+            return [row[0] for row in sql("SELECT version FROM threads ORDER BY id")]
+
+        assert versions() == [0, 0]
+        sql("INSERT INTO comments (id, thread_id, text) VALUES (1, 1, 'root'), (2, 1, 'reply')")
+        # The trigger that fills in `path` does not count as a second change
+        assert versions() == [2, 0]
+        sql("UPDATE comments SET parent_id = 1 WHERE id = 2")
+        sql("UPDATE comments SET hidden = 1 WHERE id = 2")
+        assert versions() == [4, 0]
+        sql("UPDATE comments SET thread_id = 2 WHERE id = 2")
+        assert versions() == [5, 1]
+        sql("DELETE FROM comments WHERE id = 2")
+        assert versions() == [5, 2]
+    engine.dispose()
@@ -0,0 +1,178 @@
+# tests/test_vector_search.py
+
+"""
+Unit Tests for Vector Search
+
+This file contains test cases for collapsing FAISS hits to threads in
+VectorDB.search_embeddings, for excluding tombstoned vectors and for the
+feedback filters on every index backend.
+"""
+
+import faiss
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from backend.services.feedback_service import FeedbackSnapshot
+from embeddings.index_factory import DEFAULT_INDEX_PARAMS, INDEX_FACTORY_STRINGS, create_index, train_index
+from embeddings import vector_db as vector_db_module
+from embeddings.vector_db import VectorDB
+
+DIMENSIONS = 8
+
+
+def _vector_db(vectors_by_thread, index_type="flat"):
+    """
+    A VectorDB over an in-memory index of the given type; each thread's
+    vectors are mapped as chunks of one of its comments.
+    """
+    vector_db = VectorDB()
+    vector_db.index_params = {**DEFAULT_INDEX_PARAMS, "index_type": index_type, "nlist": 4, "nprobe": 4, "pq_m": 1}
+    vector_db.index = faiss.IndexIDMap2(create_index(DIMENSIONS, vector_db.index_params))
+    train_index(vector_db.index, np.concatenate([np.asarray(v, dtype="float32") for v in vectors_by_thread.values()]))
+    vector_id = 0
+    for thread_id, vectors in vectors_by_thread.items():
+        ids = np.arange(vector_id, vector_id + len(vectors), dtype="int64")
+        vector_db.index.add_with_ids(np.asarray(vectors, dtype="float32"), ids)
+        for chunk_id in ids.tolist():
+            vector_db._map_vector(chunk_id, thread_id, comment_id=thread_id * 100)
+        vector_id += len(vectors)
+    return vector_db
+
+
+@pytest.mark.asyncio
+async def test_chatty_thread_does_not_crowd_out_others():
+    query = np.zeros((1, DIMENSIONS), dtype="float32")
+    # Thread 1 has many chunks, all nearer the query than any other thread
+    vector_db = _vector_db({
+        1: [np.full(DIMENSIONS, 0.01 * (i + 1)) for i in range(40)],
+        2: [np.full(DIMENSIONS, 1.0)],
+        3: [np.full(DIMENSIONS, 2.0)],
+        4: [np.full(DIMENSIONS, 3.0)],
+    })
+
+    async def encode(texts):
+        return query
+
+    async def fetch_thread_metadata(thread_ids):
+        return {thread_id: {"text": f"thread {thread_id}", "flags": 0, "approvals": 0} for thread_id in thread_ids}
+
+    vector_db.encode = encode
+    vector_db.fetch_thread_metadata = fetch_thread_metadata
+
+    results = await vector_db.search_embeddings("banana split recipe", k=3)
+    assert [result["thread_id"] for result in results] == [1, 2, 3]
+
+    # Asking for more threads than exist returns all of them
+    results = await vector_db.search_embeddings("banana split recipe", k=10)
+    assert [result["thread_id"] for result in results] == [1, 2, 3, 4]
+
+
+def test_tombstone_selector_follows_the_current_tombstones():
+    vector_db = _vector_db({1: [np.zeros(DIMENSIONS)], 2: [np.ones(DIMENSIONS)]})
+    query = np.zeros((1, DIMENSIONS), dtype="float32")
+
+    vector_db._add_tombstones([0])
+    _, indices = vector_db.index.search(query, 2, params=vector_db._search_params())
+    assert indices[0].tolist() == [1, -1]
+    # A selector built from an older set is not reused
+    vector_db._add_tombstones([1])
+    _, indices = vector_db.index.search(query, 2, params=vector_db._search_params())
+    assert indices[0].tolist() == [-1, -1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("index_type", list(INDEX_FACTORY_STRINGS))
+async def test_search_filters_work_on_every_backend(index_type, monkeypatch):
+    rng = np.random.default_rng(0)
+    vectors = rng.random((300, DIMENSIONS), dtype="float32")
+    vector_db = _vector_db({thread_id: [vectors[thread_id - 1]] for thread_id in range(1, 301)}, index_type)
+    snapshot = FeedbackSnapshot()
+    snapshot.counts, snapshot.loaded = {"5": (0, 1), "7": (0, 2)}, True
+    vector_db.feedback_snapshot = snapshot
+
+    async def encode(texts):
+        return vectors[:1]
+
+    async def fetch_thread_metadata(thread_ids):
+        return {
+            thread_id: {"text": "", "flags": 0, "approvals": snapshot.get(thread_id)[1]}
+            for thread_id in thread_ids
+        }
+
+    async def fetch_exact_vectors(vector_ids=None):
+        return {}
+
+    vector_db.encode = encode
+    vector_db.fetch_thread_metadata = fetch_thread_metadata
+    vector_db.fetch_exact_vectors = fetch_exact_vectors
+
+    results = await vector_db.search_embeddings("query", k=3)
+    assert len(results) == 3 and 1 in [result["thread_id"] for result in results]
+
+    # The query's own vector is tombstoned but left mapped, so only the filter can drop it
+    vector_db._add_tombstones([0])
+    results = await vector_db.search_embeddings("query", k=3)
+    assert len(results) == 3 and 1 not in [result["thread_id"] for result in results]
+
+    results = await vector_db.search_embeddings("query", k=3, min_approvals=1)
+    assert sorted(result["thread_id"] for result in results) == [5, 7]
+    # Through the index's own allow-list filter instead of exact scoring
+    monkeypatch.setattr(vector_db_module, "VECTOR_EXACT_SEARCH_MAX_IDS", 0)
+    results = await vector_db.search_embeddings("query", k=3, min_approvals=1)
+    assert sorted(result["thread_id"] for result in results) == [5, 7]
+
+
+class RecordingIndex:
+    """
+    Wraps an index and records the k of every search.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.searches = []
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
+
+    def search(self, query, k, params=None):
+        self.searches.append(k)
+        return self.index.search(query, k, params=params)
+
+
+@pytest.mark.asyncio
+async def test_strict_filters_are_searched_exactly_or_capped(monkeypatch):
+    rng = np.random.default_rng(1)
+    vectors = rng.random((500, DIMENSIONS), dtype="float32")
+    vector_db = _vector_db({thread_id: [vectors[thread_id - 1]] for thread_id in range(1, 501)}, "hnsw")
+    vector_db.index = RecordingIndex(vector_db.index)
+    snapshot = FeedbackSnapshot()
+    snapshot.counts, snapshot.loaded = {"400": (0, 1)}, True
+    vector_db.feedback_snapshot = snapshot
+
+    async def encode(texts):
+        return vectors[:1]
+
+    async def fetch_thread_metadata(thread_ids):
+        return {thread_id: {"text": "", "flags": 0, "approvals": snapshot.get(thread_id)[1]} for thread_id in thread_ids}
+
+    async def fetch_exact_vectors(vector_ids=None):
+        return {}
+
+    vector_db.encode = encode
+    vector_db.fetch_thread_metadata = fetch_thread_metadata
+    vector_db.fetch_exact_vectors = fetch_exact_vectors
+
+    # A small allow-list is scored exactly, without searching the index
+    results = await vector_db.search_embeddings("query", k=3, min_approvals=1)
+    assert [result["thread_id"] for result in results] == [400]
+    assert vector_db.index.searches == []
+
+    # Otherwise widening stops at the candidate cap instead of the whole corpus
+    monkeypatch.setattr(vector_db_module, "VECTOR_EXACT_SEARCH_MAX_IDS", 0)
+    monkeypatch.setattr(vector_db_module, "VECTOR_SEARCH_MAX_CANDIDATES", 48)
+    snapshot.counts = {}
+    vector_db._add_tombstones(list(range(498)))
+    results = await vector_db.search_embeddings("query", k=3, hide_flagged=True)
+    assert len(results) <= 2 and max(vector_db.index.searches) == 48
@@ -0,0 +1,42 @@
+# tests/test_writes.py
+
+"""
+Unit Tests for Comment and Thread Writes
+
+This file contains test cases for the RETURNING-based write helpers.
+"""
+
+import pytest
+
+from backend.database import categories
+from backend.database import writes
+
+
+@pytest.mark.asyncio
+async def test_thread_is_created_with_its_root_comment(migrated_pool):
+    await migrated_pool.connect()
+    category_id = await migrated_pool.execute(categories.insert().values(name="General"))
+    thread, root = await writes.create_thread_with_root(category_id, "Title", None)
+    assert thread["root_comment_id"] == root["id"]
+    assert root["thread_id"] == thread["id"] and root["parent_id"] is None
+    assert migrated_pool.transactions == 1
+    await migrated_pool.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_writes_return_rows_and_report_missing_targets(migrated_pool):
+    await migrated_pool.connect()
+    category_id = await migrated_pool.execute(categories.insert().values(name="General"))
+    thread, root = await writes.create_thread_with_root(category_id, "Title", None)
+
+    reply = await writes.insert_comment(thread["id"], root["id"], "reply", require_thread=True)
+    assert reply["text"] == "reply" and reply["hidden"] is False
+    assert await writes.insert_comment(thread["id"] + 1, None, "orphan", require_thread=True) is None
+
+    updated = await writes.update_comment(reply["id"], text="edited", model_name="gpt")
+    assert (updated["text"], updated["model_name"]) == ("edited", "gpt")
+    assert await writes.update_comment(12345, text="missing") is None
+
+    assert await writes.delete_comment(reply["id"])
+    assert not await writes.delete_comment(reply["id"])
+    await migrated_pool.disconnect()